@@ -1,58 +1,234 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Query
-from sqlalchemy.orm import Session
+import os
+import tempfile
+from fastapi import APIRouter, Header, Request, status, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.exc import DataError, IntegrityError
-from typing import Optional
-from app.core.database import get_db
-from app.services.caf_solicitud_service import CafSolicitudService
-from app.schemas.caf_solicitud import ApprovalRequest, ApprovalResponse
+from datetime import date, datetime
+from typing import Literal, Optional
+from app.core.async_db import run_db
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.services.building_catalog import etag_matches
+from app.services.caf_export import EXPORT_FORMATS, CafExportService
+from app.services.caf_import import CafImportService
+from app.services.caf_solicitud_service import (
+    BulkValidationError, CafSolicitudService, RowVersionRequiredError, SolicitudConflictError, parse_detail_fields
+)
+from app.schemas.caf_solicitud import (
+    ApprovalRequest, ApprovalResponse, CafSolicitudBulkRequest, CafSolicitudBulkResponse, CafSolicitudDetail,
+    CafSolicitudListResponse
+)
 
 
 router = APIRouter()
 
 
+@router.get("/caf-solicitud", status_code=status.HTTP_200_OK, response_model=CafSolicitudListResponse)
+async def list_caf_solicitudes(
+    approve: Optional[str] = Query(None, description="pendiente, requiere_correcciones, aprobado o rechazado_definitivo"),
+    responsable: Optional[str] = Query(None, description="Email exacto del responsable"),
+    usuario: Optional[str] = Query(None, description="Email exacto del usuario que capturó"),
+    building: Optional[str] = Query(None, description="Building exacto"),
+    tipo: Optional[str] = Query(None, description="Tipo de contratación"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha mínima (campo Fecha)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha máxima (campo Fecha)"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.CAF_LIST_MAX_PAGE_SIZE, description="Solicitudes por página"),
+    cursor: Optional[int] = Query(None, description="next_cursor de la página anterior")
+):
+    """
+    Lista solicitudes CAF filtradas, más recientes primero, con paginación por cursor.
+    
+    Ejemplo (bandeja del aprobador): `?responsable=aprobador@mpagroup.mx&approve=pendiente`
+    
+    Cada fila trae solo las columnas del listado; el detalle completo se obtiene
+    con GET /caf-solicitud/{id}. Para la siguiente página se envía `cursor` con
+    el `next_cursor` de la respuesta (NULL = no hay más).
+    """
+    try:
+        service = CafSolicitudService()
+        return await run_db(
+            service.list_solicitudes,
+            limit=limit,
+            cursor=cursor,
+            approve=approve,
+            responsable=responsable,
+            usuario=usuario,
+            building=building,
+            tipo=tipo,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/caf-solicitud", status_code=status.HTTP_201_CREATED)
-def create_caf_solicitud(data: dict, db: Session = Depends(get_db)):
+async def create_caf_solicitud(data: dict):
     """
     Crea una nueva solicitud CAF.
     El campo 'approve' se deja como NULL (pendiente de revisión) automáticamente.
     """
     try:
         service = CafSolicitudService()
-        solicitud = service.create(db, data)
+        solicitud = await run_db(service.create, data)
         return solicitud
     except (DataError, IntegrityError) as e:
         raise HTTPException(status_code=400, detail=f"Error de datos: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error al crear la solicitud: {str(e)}")
 
-@router.get("/caf-solicitud/{solicitud_id}", status_code=status.HTTP_200_OK)
-def get_caf_solicitud_detail(solicitud_id: int, db: Session = Depends(get_db)):
-    """Obtiene el detalle de una solicitud CAF por ID"""
+@router.post("/caf-solicitud/bulk", status_code=status.HTTP_201_CREATED, response_model=CafSolicitudBulkResponse)
+async def create_caf_solicitudes_bulk(request: CafSolicitudBulkRequest):
+    """
+    Crea varias solicitudes CAF en una sola petición (migraciones e importaciones).
+    Se validan todas antes de insertar: si alguna tiene errores no se crea ninguna
+    y se responde 422 con los errores por índice.
+    Cada responsable recibe un solo correo con todas sus solicitudes.
+    """
+    if len(request.solicitudes) > settings.CAF_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo {settings.CAF_BULK_MAX_ITEMS} solicitudes por petición"
+        )
+    try:
+        service = CafSolicitudService()
+        ids = await run_db(service.create_bulk, request.solicitudes)
+        return CafSolicitudBulkResponse(created=len(ids), ids=ids)
+    except BulkValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors)
+    except (DataError, IntegrityError) as e:
+        raise HTTPException(status_code=400, detail=f"Error de datos: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error al crear las solicitudes: {str(e)}")
+
+@router.post("/caf-solicitud/import", status_code=status.HTTP_200_OK)
+async def import_caf_solicitudes(
+    request: Request,
+    sheet: Optional[str] = Query(None, description="Hoja a importar (default: la hoja activa)"),
+    dry_run: bool = Query(False, description="Solo validar, sin insertar"),
+    notify: bool = Query(False, description="Notificar a los responsables por correo")
+):
+    """
+    Importa solicitudes CAF desde un libro de Excel (.xlsx).
+    
+    El archivo se envía como cuerpo binario de la petición (no multipart):
+    `Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet`.
+    La primera fila debe tener los nombres de las columnas de TBL_CAF_Solicitud
+    (sin distinguir mayúsculas, espacios, guiones bajos ni acentos).
+    
+    Las filas válidas se insertan por bloques; las filas con errores se omiten y
+    se reportan con su número de fila.
+    """
+    # El cuerpo se copia por partes a un archivo temporal (openpyxl necesita un archivo con seek)
+    upload = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+    try:
+        size = 0
+        with upload:
+            async for part in request.stream():
+                size += len(part)
+                if size > settings.CAF_IMPORT_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"El archivo excede {settings.CAF_IMPORT_MAX_BYTES} bytes"
+                    )
+                upload.write(part)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Se requiere el archivo .xlsx en el cuerpo de la petición")
+        
+        report = await run_db(CafImportService().import_workbook, upload.name, sheet=sheet, dry_run=dry_run, notify=notify)
+        return report.to_dict()
+    except HTTPException:
+        raise
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Archivo no válido: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error al importar las solicitudes: {str(e)}")
+    finally:
+        os.unlink(upload.name)
+
+@router.get("/caf-solicitud/export", status_code=status.HTTP_200_OK)
+async def export_caf_solicitudes(
+    format: Literal["csv", "ndjson", "xlsx"] = Query("csv", description="Formato del archivo"),
+    approve: Optional[str] = Query(None, description="pendiente, requiere_correcciones, aprobado o rechazado_definitivo"),
+    building: Optional[str] = Query(None, description="Building exacto"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha mínima (campo Fecha)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha máxima (campo Fecha)"),
+    tipo: Optional[str] = Query(None, description="Tipo de contratación")
+):
+    """
+    Exporta las solicitudes CAF filtradas como archivo descargable.
+    
+    Las filas se leen de la BD por bloques y se envían conforme llegan (CSV y
+    NDJSON empiezan a enviarse de inmediato); la memoria no depende del
+    número de solicitudes exportadas. El generador es síncrono: Starlette lo
+    recorre en el threadpool, fuera del event loop.
+    """
+    service = CafExportService()
+    try:
+        # Los filtros se validan antes de empezar a enviar la respuesta
+        stmt = service.build_query(approve, building, fecha_desde, fecha_hasta, tipo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"caf_solicitudes_{datetime.now():%Y%m%d_%H%M%S}.{extension}"
+    return StreamingResponse(
+        service.stream(stmt, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/caf-solicitud/{solicitud_id}", status_code=status.HTTP_200_OK, response_model=CafSolicitudDetail)
+async def get_caf_solicitud_detail(
+    solicitud_id: int,
+    fields: Optional[str] = Query(None, description="Columnas separadas por coma (ej. Responsable,approve,Comentarios); default: todas")
+):
+    """
+    Obtiene el detalle de una solicitud CAF por ID.
+    
+    Con `fields` solo se leen de la BD y se envían las columnas pedidas
+    (id_solicitud siempre se incluye).
+    """
+    try:
+        names = parse_detail_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     service = CafSolicitudService()
-    result = service.get_detail(db, solicitud_id)
+    result = await run_db(service.get_detail, solicitud_id, names)
     if not result:
         raise HTTPException(status_code=404, detail="Solicitud no encontrada")
-    return result
+    # Se responde el JSON ya serializado: FastAPI no pasa el objeto por jsonable_encoder
+    return Response(CafSolicitudDetail.dump_json(result, names), media_type="application/json")
 
 @router.put("/caf-solicitud/{solicitud_id}", status_code=status.HTTP_200_OK)
-def update_caf_solicitud(solicitud_id: int, data: dict, db: Session = Depends(get_db)):
-    """Actualiza una solicitud CAF existente"""
+async def update_caf_solicitud(solicitud_id: int, data: dict):
+    """
+    Actualiza una solicitud CAF existente.
+    
+    El body debe incluir RowVersion (el recibido en el detalle): sin él responde
+    428 y, si la solicitud se modificó después, 409 sin aplicar los cambios.
+    """
     try:
         service = CafSolicitudService()
-        result = service.update(db, solicitud_id, data)
+        result = await run_db(service.update, solicitud_id, data)
         if not result:
             raise HTTPException(status_code=404, detail="Solicitud no encontrada")
         return result
+    except HTTPException:
+        raise
+    except RowVersionRequiredError as e:
+        raise HTTPException(status_code=status.HTTP_428_PRECONDITION_REQUIRED, detail=str(e))
+    except SolicitudConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except (DataError, IntegrityError) as e:
         raise HTTPException(status_code=400, detail=f"Error de datos: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error al actualizar la solicitud: {str(e)}")
 
 @router.patch("/caf-solicitud/{solicitud_id}/approval", status_code=status.HTTP_200_OK, response_model=ApprovalResponse)
-def approve_or_reject_solicitud(
+async def approve_or_reject_solicitud(
     solicitud_id: int, 
-    approval_data: ApprovalRequest, 
-    db: Session = Depends(get_db)
+    approval_data: ApprovalRequest
 ) -> ApprovalResponse:
     """
     Aprueba, rechaza o marca para correcciones una solicitud CAF.
@@ -66,40 +242,50 @@ def approve_or_reject_solicitud(
     Body esperado:
     {
         "approve": "requiere_correcciones" | "aprobado" | "rechazado_definitivo",
-        "comentarios": "string"  // Obligatorio solo para "requiere_correcciones"
+        "comentarios": "string",  // Obligatorio solo para "requiere_correcciones"
+        "row_version": 1          // Obligatorio: RowVersion del detalle
     }
     
     Ejemplos:
     
     1. Aprobar:
     {
-        "approve": "aprobado"
+        "approve": "aprobado",
+        "row_version": 3
     }
     
     2. Solicitar correcciones:
     {
         "approve": "requiere_correcciones",
-        "comentarios": "Falta información del proveedor y montos actualizados"
+        "comentarios": "Falta información del proveedor y montos actualizados",
+        "row_version": 3
     }
     
     3. Rechazar definitivamente (sin comentarios):
     {
-        "approve": "rechazado_definitivo"
+        "approve": "rechazado_definitivo",
+        "row_version": 3
     }
     
     4. Rechazar definitivamente (con comentarios):
     {
         "approve": "rechazado_definitivo",
-        "comentarios": "No cumple con los requisitos mínimos de la empresa"
+        "comentarios": "No cumple con los requisitos mínimos de la empresa",
+        "row_version": 3
     }
+    
+    Concurrencia: "row_version" es obligatorio (sin él se responde 428). Si otro
+    aprobador cambió la solicitud mientras tanto se responde 409 y no se
+    sobrescribe su decisión.
     """
     try:
         service = CafSolicitudService()
-        result = service.approve_or_reject(
-            db, 
+        result = await run_db(
+            service.approve_or_reject,
             solicitud_id, 
             approval_data.approve, 
-            approval_data.comentarios
+            approval_data.comentarios,
+            approval_data.row_version
         )
         
         if not result:
@@ -118,9 +304,16 @@ def approve_or_reject_solicitud(
             approve=result.approve,
             status=approval_data.approve,
             comentarios=result.Comentarios,
+            row_version=result.RowVersion,
             message=f"Solicitud #{result.id_solicitud} {status_messages[approval_data.approve]} exitosamente"
         )
         
+    except HTTPException:
+        raise
+    except RowVersionRequiredError as e:
+        raise HTTPException(status_code=status.HTTP_428_PRECONDITION_REQUIRED, detail=str(e))
+    except SolicitudConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -128,11 +321,14 @@ def approve_or_reject_solicitud(
 
 
 @router.get("/buildings/select", status_code=status.HTTP_200_OK)
-def get_buildings_for_select(db: Session = Depends(get_db)):
+async def get_buildings_for_select(if_none_match: Optional[str] = Header(None)):
     """
     Obtiene lista de edificios para usar en un componente Select.
     El filtrado/búsqueda se realiza en el frontend.
     
+    El catálogo se sirve desde caché con ETag: si el cliente envía If-None-Match
+    con el ETag vigente se responde 304 sin cuerpo.
+    
     Returns:
     ```json
     [
@@ -144,4 +340,14 @@ def get_buildings_for_select(db: Session = Depends(get_db)):
     ```
     """
     service = CafSolicitudService()
-    return service.get_buildings_for_select(db)
+    entry = await run_db(service.get_buildings_catalog)
+    if entry is None:
+        return FastJSONResponse([], headers={"Cache-Control": "no-store"})
+    
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={settings.BUILDING_CATALOG_MAX_AGE_SECONDS}"
+    }
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
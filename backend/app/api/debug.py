@@ -1,5 +1,10 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
 from datetime import datetime, timezone
+from app.core.database import get_db, get_engine
+from app.core.db_pool import get_pool_status
+from app.repositories.outbox_repository import OutboxRepository
 from app.events.observer_initializer import get_observers_status
 from app.events.event_dispatcher import get_event_dispatcher
 
@@ -78,24 +83,54 @@ def get_observer_status():
     return get_observers_status()
 
 
+@router.get("/observers/queue")
+def get_event_queue_metrics():
+    """
+    Endpoint de debugging para ver las métricas de la cola de eventos asíncrona.
+    """
+    return get_event_dispatcher().get_queue_metrics()
+
+
+@router.get("/outbox/status")
+def get_outbox_status(db: Session = Depends(get_db)):
+    """
+    Endpoint de debugging para ver cuántos eventos hay en el outbox por estado.
+    """
+    return {"outbox": OutboxRepository(db).count_by_status()}
+
+
+@router.get("/db/pool")
+def get_db_pool_status():
+    """
+    Endpoint de debugging con el estado del pool de conexiones a SQL Server:
+    conexiones en uso, overflow, espera en checkout y latencia de conexión.
+    """
+    return get_pool_status(get_engine())
+
+
 @router.get("/observers/events")
-def get_event_history():
+def get_event_history(
+    solicitud_id: Optional[int] = None,
+    event_type: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=500),
+    before: Optional[int] = None
+):
     """
-    Endpoint de debugging para ver el historial de eventos procesados.
+    Endpoint de debugging para ver el historial de eventos procesados (del más reciente al más antiguo).
+    Filtra por solicitud o tipo de evento; `before` recibe el `next_before` de la página anterior.
     """
     dispatcher = get_event_dispatcher()
-    events = dispatcher.get_event_history()
+    records = dispatcher.get_event_history(
+        solicitud_id=solicitud_id,
+        event_type=event_type,
+        limit=limit,
+        before=before
+    )
     
     return {
-        "total_events": len(events),
-        "events": [
-            {
-                "type": event.__class__.__name__,
-                "timestamp": event.timestamp.isoformat(),
-                "solicitud_id": getattr(event, 'solicitud_id', None)
-            }
-            for event in events[-10:]  # Últimos 10 eventos
-        ]
+        "total_events": dispatcher.get_history_stats()["total_recorded"],
+        "events": [record.to_dict() for record in records],
+        "next_before": records[-1].seq if len(records) == limit else None
     }
 
 
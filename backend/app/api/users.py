@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.user_service import UserService
-from app.schemas.user import UserListResponse
+from app.services.eligibility_rules import invalidate_eligibility_rules
+from app.services.user_search import InvalidCursorError
+from app.schemas.user import UserListResponse, UserLookupRequest, UserLookupResponse
 
 
 router = APIRouter()
 
 
 @router.get("/users", status_code=status.HTTP_200_OK, response_model=UserListResponse)
-def list_directory_users(db: Session = Depends(get_db)):
+def list_directory_users(
+    q: Optional[str] = Query(None, max_length=100, description="Prefijos a buscar en nombre y email"),
+    department: Optional[str] = Query(None, description="Filtrar por departamento"),
+    limit: Optional[int] = Query(None, ge=1, le=999, description="Usuarios por página (default 50 al buscar)"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    db: Session = Depends(get_db)
+):
     """
     Lista usuarios del directorio de Azure AD.
+    Sin parámetros retorna la lista completa de usuarios elegibles (hasta 999).
+    Con q, department, limit o cursor retorna una página de la búsqueda y next_cursor
+    mientras haya más resultados.
 
     Requiere permisos:
     - User.Read.All (Application)
@@ -21,7 +33,64 @@ def list_directory_users(db: Session = Depends(get_db)):
     """
     try:
         service = UserService(db)
-        return service.list_users()
+        if q is None and department is None and limit is None and cursor is None:
+            return service.list_users()
+        return service.search_users(q=q, department=department, limit=limit or 50, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener usuarios: {str(e)}"
+        )
+
+
+@router.post("/users/refresh", status_code=status.HTTP_200_OK)
+def refresh_directory_users(full: bool = False, db: Session = Depends(get_db)):
+    """
+    Fuerza la sincronización del snapshot del directorio de Azure AD.
+
+    Args:
+        full: True para descargar el directorio completo en lugar del delta
+
+    Returns:
+        dict: Estado del snapshot después de sincronizar
+    """
+    try:
+        service = UserService(db)
+        return service.refresh_directory(full=full)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Error al sincronizar directorio: {str(e)}"
+        )
+
+
+@router.post("/users/eligibility/refresh", status_code=status.HTTP_200_OK)
+def refresh_eligibility_rules():
+    """
+    Descarta las reglas de elegibilidad cacheadas.
+    Usar después de modificar CAT_Elegibilidad_Usuario para que /users las aplique de inmediato.
+    """
+    invalidate_eligibility_rules()
+    return {"message": "Reglas de elegibilidad invalidadas"}
+
+
+@router.post("/users/by-email", status_code=status.HTTP_200_OK, response_model=UserLookupResponse)
+def get_users_by_email(request: UserLookupRequest, db: Session = Depends(get_db)):
+    """
+    Obtiene varios usuarios por email en una sola llamada (ej. Responsable y Usuario de un formulario).
+    No aplica filtros de puesto.
+
+    Args:
+        request: Lista de emails (máximo 100)
+
+    Returns:
+        UserLookupResponse: Usuario por email en minúsculas (null si no se encuentra)
+    """
+    try:
+        service = UserService(db)
+        return {"users": service.get_users_by_email(request.emails)}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
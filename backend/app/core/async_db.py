@@ -0,0 +1,89 @@
+"""
+Acceso asíncrono a la base de datos para los endpoints `async def`.
+
+No hay un driver asíncrono estable para SQL Server, así que cada operación se
+ejecuta completa (sesión, consultas, commit y cierre) en un pool de hilos
+dedicado a la base de datos. El event loop queda libre mientras pyodbc espera
+y la concurrencia de la BD deja de depender del threadpool compartido de
+FastAPI (40 hilos) para ajustarse al tamaño del pool de conexiones.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncDbExecutor:
+    """Ejecuta funciones síncronas de acceso a datos en hilos dedicados, cada una con su propia sesión."""
+
+    def __init__(self, max_workers: int, session_factory: Callable[[], Session] = SessionLocal):
+        """
+        Args:
+            max_workers: Hilos del pool (idealmente pool_size + max_overflow del engine)
+            session_factory: Crea las sesiones de base de datos
+        """
+        self.max_workers = max_workers
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+
+    def _run_in_session(self, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        # La sesión nace y muere en el mismo hilo (las sesiones no son thread-safe)
+        db = self._session_factory()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Ejecuta fn(db, *args, **kwargs) en un hilo de BD y espera el resultado sin bloquear el event loop.
+        Las excepciones de fn se propagan al llamador.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run_in_session, fn, args, kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+# Singleton global del executor de BD
+_async_db_executor: Optional[AsyncDbExecutor] = None
+_async_db_lock = threading.Lock()
+
+def get_async_db_executor() -> AsyncDbExecutor:
+    """
+    Obtiene la instancia singleton del executor de base de datos.
+    Returns:
+        AsyncDbExecutor: Instancia única del executor
+    """
+    global _async_db_executor
+    if _async_db_executor is None:
+        with _async_db_lock:
+            if _async_db_executor is None:
+                _async_db_executor = AsyncDbExecutor(max_workers=settings.DB_ASYNC_WORKERS)
+                logger.info(f"AsyncDbExecutor inicializado con {settings.DB_ASYNC_WORKERS} hilos")
+    return _async_db_executor
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Atajo: ejecuta fn(db, *args, **kwargs) en el executor de base de datos."""
+    return await get_async_db_executor().run(fn, *args, **kwargs)
+
+
+def shutdown_async_db_executor() -> None:
+    """Detiene el executor de base de datos (al apagar la aplicación)."""
+    global _async_db_executor
+    with _async_db_lock:
+        if _async_db_executor is not None:
+            _async_db_executor.shutdown()
+            _async_db_executor = None
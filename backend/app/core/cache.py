@@ -0,0 +1,70 @@
+"""
+Caché LRU en memoria con expiración por entrada (thread-safe).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+# Marca de "no está en caché" (None es un valor válido: resultado negativo)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Caché LRU acotada en número de entradas, con TTL por entrada.
+    Al llenarse descarta la entrada usada hace más tiempo.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 300):
+        """
+        Args:
+            maxsize: Entradas máximas
+            ttl_seconds: TTL por defecto de cada entrada
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Valor vigente de key, o default si no existe o expiró."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Guarda value; ttl_seconds reemplaza el TTL por defecto (ej. resultados negativos)."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
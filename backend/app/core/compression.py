@@ -0,0 +1,186 @@
+"""
+Compresión de respuestas (brotli o gzip) según el Accept-Encoding del cliente.
+
+Middleware ASGI puro: solo intercepta los mensajes http.response.start y
+http.response.body, sin depender de clases internas de Starlette. Las respuestas
+menores a minimum_size se envían sin comprimir (el costo de CPU no compensa los
+bytes ahorrados) y las que ya traen Content-Encoding o son formatos ya
+comprimidos (XLSX, ZIP, imágenes) o eventos SSE pasan tal cual. Las respuestas
+en streaming se comprimen por partes conforme se envían.
+"""
+import logging
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/vnd.openxmlformats-officedocument",
+    "application/zip",
+    "application/gzip",
+    "image/",
+)
+
+
+def parse_accept_encoding(value: str) -> dict:
+    """{codificación: q} del header Accept-Encoding (ej. 'br;q=1.0, gzip;q=0.8, *;q=0')."""
+    encodings = {}
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name.strip().lower()] = q
+    return encodings
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits 31 = formato gzip (encabezado y CRC)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, *, final: bool) -> bytes:
+        data = self._compressor.compress(data)
+        # Z_SYNC_FLUSH entrega lo comprimido hasta ahora (exportaciones en streaming)
+        return data + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, brotli_module, quality: int):
+        self._compressor = brotli_module.Compressor(quality=quality)
+
+    def compress(self, data: bytes, *, final: bool) -> bytes:
+        data = self._compressor.process(data)
+        return data + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _CompressedResponse:
+    """Envuelve `send` de una respuesta y comprime su cuerpo si corresponde."""
+
+    def __init__(self, send: Send, encoding: str, compressor, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self.start_message: Message = None
+        self.passthrough = False
+        self.started = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Se retiene hasta ver el primer fragmento del cuerpo
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES)
+            )
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            if not more_body and len(body) < self.minimum_size:
+                # Respuesta completa y pequeña: sin comprimir
+                self.passthrough = True
+                await self._send_start()
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Streaming: la longitud final no se conoce
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+                await self._send_start()
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self._send_start()
+
+        await self.send({
+            "type": "http.response.body",
+            "body": self.compressor.compress(body, final=not more_body),
+            "more_body": more_body,
+        })
+
+    async def _send_start(self) -> None:
+        if not self.started and self.start_message is not None:
+            self.started = True
+            await self.send(self.start_message)
+
+
+class CompressionMiddleware:
+    """Comprime con brotli (si está habilitado e instalado) o gzip, lo que el cliente prefiera."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli: bool = False,
+        brotli_quality: int = 4
+    ) -> None:
+        """
+        Args:
+            minimum_size: Bytes mínimos del cuerpo para comprimir
+            gzip_level: Nivel de gzip (1 = más rápido, 9 = más compresión)
+            brotli: Ofrecer brotli (requiere el paquete brotli)
+            brotli_quality: Calidad de brotli (0-11; 4-5 es el punto medio para respuestas dinámicas)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._brotli = None
+        if brotli:
+            try:
+                import brotli as brotli_module
+                self._brotli = brotli_module
+            except ImportError:
+                logger.warning("COMPRESSION_BROTLI habilitado pero brotli no está instalado; se usa solo gzip")
+
+    def _choose_encoding(self, accept_encoding: str):
+        encodings = parse_accept_encoding(accept_encoding)
+        wildcard = encodings.get("*", 0.0)
+        candidates = []
+        if self._brotli is not None:
+            candidates.append("br")
+        candidates.append("gzip")
+        best, best_q = None, 0.0
+        for encoding in candidates:
+            q = encodings.get(encoding, wildcard)
+            # En empate gana el primero (br)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+        if encoding == "br":
+            compressor = _BrotliCompressor(self._brotli, self.brotli_quality)
+        elif encoding == "gzip":
+            compressor = _GzipCompressor(self.gzip_level)
+        else:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressedResponse(send, encoding, compressor, self.minimum_size))
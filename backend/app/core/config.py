@@ -32,9 +32,88 @@ class Settings:
         "sender_email": os.getenv("GRAPH_SENDER_EMAIL", "noreply@empresa.com")
     }
     
+    # Pool de conexiones a SQL Server
+    # - POOL_TIMEOUT: segundos máximos esperando una conexión libre
+    # - POOL_RECYCLE: segundos de vida de una conexión antes de renovarla
+    # - FAST_EXECUTEMANY: envía los executemany de pyodbc como un solo lote
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_FAST_EXECUTEMANY: bool = os.getenv("DB_FAST_EXECUTEMANY", "true").lower() == "true"
+    # Hilos dedicados a la BD para los endpoints async (por defecto, conexiones máximas del pool)
+    DB_ASYNC_WORKERS: int = int(os.getenv("DB_ASYNC_WORKERS", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+    
+    # Cliente HTTP de Graph: pool de conexiones persistentes y timeouts (segundos)
+    GRAPH_HTTP_POOL_CONNECTIONS: int = int(os.getenv("GRAPH_HTTP_POOL_CONNECTIONS", "4"))
+    GRAPH_HTTP_POOL_MAXSIZE: int = int(os.getenv("GRAPH_HTTP_POOL_MAXSIZE", "20"))
+    GRAPH_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("GRAPH_HTTP_CONNECT_TIMEOUT", "5"))
+    GRAPH_HTTP_READ_TIMEOUT: float = float(os.getenv("GRAPH_HTTP_READ_TIMEOUT", "30"))
+    # HTTP/2 usa httpx[http2] (en requirements.txt); si no está instalado se usa HTTP/1.1 con keep-alive
+    GRAPH_HTTP2: bool = os.getenv("GRAPH_HTTP2", "false").lower() == "true"
+    
+    # Despacho de eventos de dominio (notificaciones por correo)
+    # - MODE: "async" encola los eventos y los entregan workers; "sync" los entrega en la petición
+    EVENT_DISPATCH_MODE: str = os.getenv("EVENT_DISPATCH_MODE", "async")
+    EVENT_WORKERS: int = int(os.getenv("EVENT_WORKERS", "2"))
+    EVENT_QUEUE_MAXSIZE: int = int(os.getenv("EVENT_QUEUE_MAXSIZE", "1000"))
+    EVENT_QUEUE_PUT_TIMEOUT: float = float(os.getenv("EVENT_QUEUE_PUT_TIMEOUT", "0.5"))
+    EVENT_SHUTDOWN_TIMEOUT: float = float(os.getenv("EVENT_SHUTDOWN_TIMEOUT", "30"))
+    EVENT_HISTORY_CAPACITY: int = int(os.getenv("EVENT_HISTORY_CAPACITY", "1000"))
+    
+    # Outbox transaccional de eventos (TBL_CAF_Outbox) y su relay
+    OUTBOX_ENABLED: bool = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+    OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_BACKOFF_BASE_SECONDS: float = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+    
+    # Alta masiva de solicitudes (POST /caf-solicitud/bulk)
+    # - MAX_ITEMS: solicitudes por petición; BATCH_SIZE: filas por INSERT ... OUTPUT
+    CAF_BULK_MAX_ITEMS: int = int(os.getenv("CAF_BULK_MAX_ITEMS", "5000"))
+    CAF_BULK_BATCH_SIZE: int = int(os.getenv("CAF_BULK_BATCH_SIZE", "500"))
+    # Importación desde Excel (POST /caf-solicitud/import y scripts/import_caf_xlsx.py)
+    # - CHUNK_SIZE: filas validadas e insertadas por commit; MAX_BYTES: tamaño máximo del archivo subido
+    CAF_IMPORT_CHUNK_SIZE: int = int(os.getenv("CAF_IMPORT_CHUNK_SIZE", "1000"))
+    CAF_IMPORT_MAX_BYTES: int = int(os.getenv("CAF_IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+    # Exportación (GET /caf-solicitud/export): filas por bloque leído de la BD
+    CAF_EXPORT_YIELD_PER: int = int(os.getenv("CAF_EXPORT_YIELD_PER", "1000"))
+    # Listado (GET /caf-solicitud): tamaño de página por defecto y máximo
+    CAF_LIST_PAGE_SIZE: int = int(os.getenv("CAF_LIST_PAGE_SIZE", "50"))
+    CAF_LIST_MAX_PAGE_SIZE: int = int(os.getenv("CAF_LIST_MAX_PAGE_SIZE", "200"))
+    
+    # Caché del catálogo de edificios (GET /buildings/select)
+    # - TTL: recarga completa; PROBE: revalidación con conteo/min/max; MAX_AGE: Cache-Control del navegador
+    BUILDING_CATALOG_TTL_SECONDS: int = int(os.getenv("BUILDING_CATALOG_TTL_SECONDS", "3600"))
+    BUILDING_CATALOG_PROBE_SECONDS: int = int(os.getenv("BUILDING_CATALOG_PROBE_SECONDS", "60"))
+    BUILDING_CATALOG_MAX_AGE_SECONDS: int = int(os.getenv("BUILDING_CATALOG_MAX_AGE_SECONDS", "300"))
+    
+    # Compresión de respuestas (app/core/compression.py)
+    # - MINIMUM_SIZE: bytes mínimos para comprimir; GZIP_LEVEL: 1-9; BROTLI_QUALITY: 0-11
+    # - BROTLI usa el paquete brotli (en requirements.txt); si no está instalado se usa solo gzip
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI: bool = os.getenv("COMPRESSION_BROTLI", "false").lower() == "true"
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    
     # URL base del frontend para links en correos
     FRONTEND_BASE_URL: str = os.getenv("FRONTEND_BASE_URL", "http://localhost:3000")
     
+    # Snapshot en memoria del directorio de Azure AD (GET /users)
+    # - MAX_STALENESS: antigüedad máxima antes de sincronizar dentro de la petición
+    # - REFRESH: intervalo de sincronización delta en segundo plano
+    DIRECTORY_SNAPSHOT_MAX_STALENESS_SECONDS: int = int(os.getenv("DIRECTORY_SNAPSHOT_MAX_STALENESS_SECONDS", "900"))
+    DIRECTORY_SNAPSHOT_REFRESH_SECONDS: int = int(os.getenv("DIRECTORY_SNAPSHOT_REFRESH_SECONDS", "300"))
+    # Reglas de CAT_Elegibilidad_Usuario cacheadas en memoria (segundos)
+    ELIGIBILITY_RULES_TTL_SECONDS: int = int(os.getenv("ELIGIBILITY_RULES_TTL_SECONDS", "600"))
+    # Caché LRU de búsquedas de usuarios por email (/users/by-email)
+    # - TTL: usuarios encontrados; NEGATIVE_TTL: emails sin usuario (más corto)
+    USER_LOOKUP_CACHE_SIZE: int = int(os.getenv("USER_LOOKUP_CACHE_SIZE", "5000"))
+    USER_LOOKUP_TTL_SECONDS: int = int(os.getenv("USER_LOOKUP_TTL_SECONDS", "900"))
+    USER_LOOKUP_NEGATIVE_TTL_SECONDS: int = int(os.getenv("USER_LOOKUP_NEGATIVE_TTL_SECONDS", "120"))
+    
    
 # Instancia singleton de configuración
 settings = Settings()
@@ -1,19 +1,28 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from typing import Callable, Optional
+import logging
 import os
-import pyodbc
+import threading
 import urllib.parse
+from app.core.config import settings
+from app.core.db_pool import InstrumentedQueuePool, instrument_engine
 
 # Cargar variables de entorno
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 
 # Selección automática del mejor driver disponible
 def get_best_driver():
     """Detecta el mejor driver disponible para SQL Server"""
+    # Importación diferida: pyodbc requiere el driver ODBC del sistema
+    import pyodbc
     available_drivers = ["ODBC Driver 18 for SQL Server", "ODBC Driver 17 for SQL Server", "SQL Server"]
     installed_drivers = pyodbc.drivers()
     for driver in available_drivers:
@@ -23,34 +32,107 @@ def get_best_driver():
 
 
 
-# Crear connection string usando tu configuración
-driver = get_best_driver()
-server = f"{os.getenv('MASTER_DB_SERVER')},{os.getenv('MASTER_DB_PORT', '1433')}"
-database = os.getenv("MASTER_DB_NAME")
-db_user = os.getenv("MASTER_DB_USER")
-db_pass = os.getenv("MASTER_DB_PASSWORD")
-# Escapar usuario y password para la URL
-db_user_escaped = urllib.parse.quote_plus(db_user)
-db_pass_escaped = urllib.parse.quote_plus(db_pass)
+def build_database_url() -> str:
+    """Crea el connection string de SQL Server usando la configuración del .env"""
+    driver = get_best_driver()
+    server = f"{os.getenv('MASTER_DB_SERVER')},{os.getenv('MASTER_DB_PORT', '1433')}"
+    database = os.getenv("MASTER_DB_NAME")
+    db_user = os.getenv("MASTER_DB_USER")
+    db_pass = os.getenv("MASTER_DB_PASSWORD")
+
+    # Usar siempre autenticación SQL Server (usuario y contraseña)
+    if not (db_user and db_pass):
+        raise Exception("Debes definir MASTER_DB_USER y MASTER_DB_PASSWORD en el .env para usar autenticación SQL Server.")
+
+    # Escapar usuario y password para la URL
+    db_user_escaped = urllib.parse.quote_plus(db_user)
+    db_pass_escaped = urllib.parse.quote_plus(db_pass)
 
-# DEBUG: Imprimir valores de conexión
-print("[DEBUG] Conexión SQL Server:")
-print(f"  SERVER: {server}")
-print(f"  DATABASE: {database}")
-print(f"  USER: {db_user}")
-print(f"  DRIVER: {driver}")
+    logger.info(f"Conexión SQL Server: SERVER={server} DATABASE={database} DRIVER={driver}")
 
-# Usar siempre autenticación SQL Server (usuario y contraseña)
-if not (db_user and db_pass):
-    raise Exception("Debes definir MASTER_DB_USER y MASTER_DB_PASSWORD en el .env para usar autenticación SQL Server.")
+    # Siempre usar TrustServerCertificate para evitar problemas de SSL
+    return f"mssql+pyodbc://{db_user_escaped}:{db_pass_escaped}@{server}/{database}?driver={urllib.parse.quote_plus(driver)}&TrustServerCertificate=yes"
 
 
-# Siempre usar TrustServerCertificate para evitar problemas de SSL
-DATABASE_URL = f"mssql+pyodbc://{db_user_escaped}:{db_pass_escaped}@{server}/{database}?driver={urllib.parse.quote_plus(driver)}&TrustServerCertificate=yes"
+def create_default_engine() -> Engine:
+    """
+    Engine de SQL Server con el pool configurable.
+    Pre-ping descarta conexiones caídas tras periodos sin uso y recycle las
+    renueva antes de que SQL Server o el firewall las cierren.
+    """
+    engine = create_engine(
+        build_database_url(),
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        fast_executemany=settings.DB_FAST_EXECUTEMANY
+    )
+    instrument_engine(engine)
+    return engine
+
 
 # SQLAlchemy setup
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# El engine se crea en el primer uso (no al importar), así importar modelos o
+# arrancar un worker no requiere el driver ODBC ni abre conexiones
+_engine: Optional[Engine] = None
+_engine_factory: Callable[[], Engine] = create_default_engine
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    Obtiene el engine de base de datos, creándolo la primera vez.
+    Returns:
+        Engine: Instancia única del engine
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _engine_factory()
+    return _engine
+
+
+def set_engine_factory(factory: Optional[Callable[[], Engine]]) -> None:
+    """
+    Reemplaza la fábrica del engine (ej. SQLite en tests o benchmarks).
+    Descarta el engine actual; el siguiente uso crea uno nuevo con la fábrica.
+    Args:
+        factory: Función que crea el engine, o None para volver a SQL Server
+    """
+    global _engine, _engine_factory
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _engine_factory = factory or create_default_engine
+
+
+def dispose_engine() -> None:
+    """Cierra las conexiones del pool si el engine ya fue creado."""
+    if _engine is not None:
+        _engine.dispose()
+
+
+def __getattr__(name: str):
+    # Compatibilidad con `from app.core.database import engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+
+def SessionLocal(**kwargs) -> Session:
+    """Crea una sesión ligada al engine (que se crea en el primer uso)."""
+    kwargs.setdefault("bind", get_engine())
+    return _session_factory(**kwargs)
+
+
 Base = declarative_base()
 
 # Dependency para FastAPI
@@ -59,4 +141,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,142 @@
+"""
+Pool de conexiones instrumentado para el engine de SQL Server.
+Mide la espera al obtener una conexión del pool (checkout), la latencia de
+apertura de conexiones nuevas y cuenta timeouts e invalidaciones (conexiones caídas).
+"""
+import bisect
+import threading
+import time
+from typing import List
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Límites superiores de los buckets en milisegundos (el último bucket es "+inf")
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Histograma de latencias con buckets fijos (memoria constante)."""
+    __slots__ = ("_counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self._counts: List[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float) -> None:
+        self._counts[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def to_dict(self) -> dict:
+        labels = [f"<={limit}ms" for limit in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "buckets": dict(zip(labels, self._counts)),
+        }
+
+
+class PoolMetrics:
+    """Métricas acumuladas del pool (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkout_wait = LatencyHistogram()
+            self.connect_latency = LatencyHistogram()
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connections_opened = 0
+            self.invalidated = 0
+
+    def record_checkout(self, elapsed_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.checkout_wait.observe(elapsed_ms)
+
+    def record_connect(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_latency.observe(elapsed_ms)
+
+    def record_invalidated(self) -> None:
+        with self._lock:
+            self.invalidated += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connections_opened": self.connections_opened,
+                "invalidated": self.invalidated,
+                "checkout_wait": self.checkout_wait.to_dict(),
+                "connect_latency": self.connect_latency.to_dict(),
+            }
+
+
+# Métricas globales (el pool las comparte con sus recreaciones tras dispose())
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que registra el tiempo que tarda cada checkout, incluidos pre-ping y conexión nueva."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            pool_metrics.record_checkout((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        pool_metrics.record_checkout((time.perf_counter() - started) * 1000)
+        return connection
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra los listeners que miden la apertura de conexiones y las invalidaciones."""
+
+    @event.listens_for(engine, "do_connect")
+    def _before_connect(dialect, conn_rec, cargs, cparams):
+        conn_rec.info["_connect_started"] = time.perf_counter()
+        # None: SQLAlchemy continúa con la conexión normal del dialecto
+
+    @event.listens_for(engine, "connect")
+    def _after_connect(dbapi_connection, connection_record):
+        started = connection_record.info.pop("_connect_started", None)
+        if started is not None:
+            pool_metrics.record_connect((time.perf_counter() - started) * 1000)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.record_invalidated()
+
+
+def get_pool_status(engine: Engine) -> dict:
+    """Estado en vivo del pool más las métricas acumuladas."""
+    pool = engine.pool
+    status: dict = {"pool_class": pool.__class__.__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # overflow() es negativo mientras el pool base no se ha llenado
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        })
+    status["metrics"] = pool_metrics.to_dict()
+    return status
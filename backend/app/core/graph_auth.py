@@ -0,0 +1,145 @@
+"""
+Proveedor compartido de tokens de Microsoft Graph (client credentials).
+
+Mantiene una sola aplicación MSAL por (authority, client_id) para todo el proceso,
+reutiliza el token hasta poco antes de que expire, lo renueva anticipadamente en
+segundo plano y centraliza el reintento ante respuestas 401.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import msal
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Renovar en segundo plano cuando falten menos de N segundos para expirar
+REFRESH_AHEAD_SECONDS = 300
+# Por debajo de este margen el token ya no se usa y se renueva de forma síncrona
+MIN_VALIDITY_SECONDS = 60
+
+
+class GraphTokenProvider:
+    """
+    Proveedor thread-safe de tokens de aplicación para Graph API.
+    Usar get_graph_token_provider() para obtener la instancia compartida.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, authority: str, scope: list):
+        self.client_id = client_id
+        self.authority = authority
+        self.scope = scope
+        self._client_secret = client_secret
+        self._token_cache = msal.TokenCache()
+        # La app MSAL se crea en el primer uso: su constructor consulta la authority
+        self._app: Optional[msal.ConfidentialClientApplication] = None
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _acquire(self, force: bool = False) -> None:
+        """Solicita un token a AAD. Debe llamarse con _lock tomado."""
+        if force:
+            # MSAL devuelve el token cacheado si existe; se descarta para forzar uno nuevo
+            for entry in self._token_cache.find(msal.TokenCache.CredentialType.ACCESS_TOKEN):
+                self._token_cache.remove_at(entry)
+
+        if self._app is None:
+            self._app = msal.ConfidentialClientApplication(
+                self.client_id,
+                authority=self.authority,
+                client_credential=self._client_secret,
+                token_cache=self._token_cache
+            )
+
+        result = self._app.acquire_token_for_client(scopes=self.scope)
+        if "access_token" not in result:
+            raise Exception(f"Error al obtener token de Graph: {result.get('error_description')}")
+
+        self._access_token = result["access_token"]
+        self._expires_at = time.monotonic() + int(result.get("expires_in", 3600))
+
+    def _refresh_in_background(self) -> None:
+        try:
+            with self._lock:
+                if self._expires_at - time.monotonic() <= REFRESH_AHEAD_SECONDS:
+                    self._acquire(force=True)
+                    logger.info("Token de Graph renovado anticipadamente")
+        except Exception as e:
+            logger.error(f"Error renovando token de Graph en segundo plano: {str(e)}")
+        finally:
+            self._refreshing = False
+
+    def get_token(self, force_refresh: bool = False) -> str:
+        """
+        Retorna un token de acceso válido.
+        Args:
+            force_refresh: True para descartar el token actual (ej. después de un 401)
+        Returns:
+            str: Token de acceso
+        """
+        remaining = self._expires_at - time.monotonic()
+        if not force_refresh and remaining > MIN_VALIDITY_SECONDS:
+            if remaining <= REFRESH_AHEAD_SECONDS and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background, name="graph-token-refresh", daemon=True).start()
+            return self._access_token
+
+        with self._lock:
+            # Otro hilo pudo haberlo renovado mientras se esperaba el lock
+            if force_refresh or self._expires_at - time.monotonic() <= MIN_VALIDITY_SECONDS:
+                self._acquire(force=force_refresh)
+            return self._access_token
+
+    def invalidate(self) -> None:
+        """Marca el token actual como inválido; la siguiente llamada obtiene uno nuevo."""
+        with self._lock:
+            self._expires_at = 0.0
+
+    def call_with_token(self, send: Callable[[str], Any]):
+        """
+        Ejecuta una llamada a Graph con el token actual y la reintenta UNA vez
+        con un token nuevo si la respuesta es 401.
+        Args:
+            send: Función que recibe el token y ejecuta la petición HTTP
+        Returns:
+            Respuesta HTTP de la petición
+        """
+        token = self.get_token()
+        response = send(token)
+        if response.status_code == 401:
+            logger.warning("Token de Graph rechazado (401), renovando y reintentando...")
+            response = send(self.get_token(force_refresh=True))
+        return response
+
+
+# Una instancia por (authority, client_id) para todo el proceso
+_providers: Dict[Tuple[str, str], GraphTokenProvider] = {}
+_providers_lock = threading.Lock()
+
+def get_graph_token_provider(config: Optional[dict] = None) -> GraphTokenProvider:
+    """
+    Obtiene el proveedor de tokens compartido para la configuración dada.
+    Args:
+        config: Configuración de Graph (por defecto settings.GRAPH_CONFIG)
+    Returns:
+        GraphTokenProvider: Instancia única por authority y client_id
+    """
+    config = config or settings.GRAPH_CONFIG
+    key = (config["authority"], config["client_id"])
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = GraphTokenProvider(
+                client_id=config["client_id"],
+                client_secret=config["client_secret"],
+                authority=config["authority"],
+                scope=config["scope"]
+            )
+            _providers[key] = provider
+            logger.info(f"GraphTokenProvider inicializado para client_id {config['client_id']}")
+        return provider
@@ -0,0 +1,142 @@
+"""
+Cliente HTTP compartido para Microsoft Graph.
+
+Reutiliza conexiones (keep-alive) mediante un pool por host, aplica timeouts,
+acepta respuestas comprimidas (gzip/deflate) y adjunta el token de aplicación
+con reintento ante 401 a través de GraphTokenProvider.
+
+HTTP/2 es opcional (GRAPH_HTTP2=true) y usa `httpx[http2]` (en requirements.txt);
+si no está disponible se usa requests sobre HTTP/1.1 con keep-alive.
+"""
+import logging
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+from app.core.graph_auth import GraphTokenProvider, get_graph_token_provider
+
+logger = logging.getLogger(__name__)
+
+
+class GraphClient:
+    """
+    Sesión HTTP persistente para Graph API.
+    Usar get_graph_client() para obtener la instancia compartida.
+    """
+
+    def __init__(
+        self,
+        token_provider: GraphTokenProvider,
+        pool_connections: int = 4,
+        pool_maxsize: int = 20,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        http2: bool = False
+    ):
+        """
+        Args:
+            token_provider: Proveedor de tokens de Graph
+            pool_connections: Número de hosts distintos con pool propio
+            pool_maxsize: Conexiones persistentes máximas por host
+            connect_timeout: Timeout de conexión en segundos
+            read_timeout: Timeout de lectura en segundos
+            http2: Usar HTTP/2 si httpx[http2] está instalado
+        """
+        self._token_provider = token_provider
+        self._timeout = (connect_timeout, read_timeout)
+        self._session = None
+        self.http2 = False
+
+        if http2:
+            self._session = self._build_http2_session(pool_maxsize, connect_timeout, read_timeout)
+        if self._session is None:
+            self._session = self._build_session(pool_connections, pool_maxsize)
+
+    @staticmethod
+    def _build_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=False)
+        session.mount("https://", adapter)
+        session.headers.update({"Accept-Encoding": "gzip, deflate", "Accept": "application/json"})
+        return session
+
+    def _build_http2_session(self, pool_maxsize: int, connect_timeout: float, read_timeout: float):
+        try:
+            import httpx
+            import h2  # noqa: F401  (requerido por httpx para HTTP/2)
+        except ImportError:
+            logger.warning("GRAPH_HTTP2 habilitado pero httpx[http2] no está instalado; se usa HTTP/1.1")
+            return None
+
+        self.http2 = True
+        self._timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        return httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            headers={"Accept-Encoding": "gzip, deflate", "Accept": "application/json"}
+        )
+
+    def request(self, method: str, url: str, params: Optional[dict] = None,
+                json: Optional[dict] = None, headers: Optional[dict] = None):
+        """
+        Ejecuta una petición autenticada contra Graph.
+        Si el token fue rechazado (401) se renueva y se reintenta UNA vez.
+        Returns:
+            Respuesta HTTP (requests.Response o httpx.Response, misma interfaz básica)
+        """
+        def send(token: str):
+            request_headers = {"Authorization": f"Bearer {token}"}
+            if headers:
+                request_headers.update(headers)
+            return self._session.request(
+                method, url, params=params, json=json, headers=request_headers, timeout=self._timeout
+            )
+
+        return self._token_provider.call_with_token(send)
+
+    def get(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None):
+        return self.request("GET", url, params=params, headers=headers)
+
+    def post(self, url: str, json: Optional[dict] = None, headers: Optional[dict] = None):
+        return self.request("POST", url, json=json, headers=headers)
+
+    def close(self) -> None:
+        """Cierra las conexiones del pool."""
+        self._session.close()
+
+
+# Singleton global del cliente de Graph
+_graph_client_instance = None
+_graph_client_lock = threading.Lock()
+
+def get_graph_client() -> GraphClient:
+    """
+    Obtiene la instancia singleton del cliente HTTP de Graph.
+    Returns:
+        GraphClient: Cliente compartido con pool de conexiones
+    """
+    global _graph_client_instance
+    with _graph_client_lock:
+        if _graph_client_instance is None:
+            _graph_client_instance = GraphClient(
+                token_provider=get_graph_token_provider(settings.GRAPH_CONFIG),
+                pool_connections=settings.GRAPH_HTTP_POOL_CONNECTIONS,
+                pool_maxsize=settings.GRAPH_HTTP_POOL_MAXSIZE,
+                connect_timeout=settings.GRAPH_HTTP_CONNECT_TIMEOUT,
+                read_timeout=settings.GRAPH_HTTP_READ_TIMEOUT,
+                http2=settings.GRAPH_HTTP2
+            )
+            logger.info(f"GraphClient inicializado (HTTP/2: {_graph_client_instance.http2})")
+        return _graph_client_instance
+
+
+def close_graph_client() -> None:
+    """Cierra el cliente compartido (shutdown de la aplicación)."""
+    global _graph_client_instance
+    with _graph_client_lock:
+        if _graph_client_instance is not None:
+            _graph_client_instance.close()
+            _graph_client_instance = None
@@ -0,0 +1,41 @@
+"""
+Respuesta JSON de la API serializada con orjson.
+
+orjson serializa en C dicts, listas, fechas (ISO 8601), UUID y enums; lo que
+no reconoce (Decimal, modelos de Pydantic, sets) pasa por _default. Se usa
+como default_response_class de la aplicación, así que aplica a todos los
+endpoints que no devuelven una Response propia.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# OPT_NON_STR_KEYS: llaves int/date como json.dumps (se convierten a texto)
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        # Modo python: fechas, enums y UUID los sigue serializando orjson
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        # Mismo criterio que jsonable_encoder: entero si no tiene decimales
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo no serializable a JSON: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa content a JSON (bytes UTF-8)."""
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que serializa con orjson en lugar de json.dumps."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
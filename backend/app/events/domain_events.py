@@ -1,13 +1,69 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, Type
+import json
 from app.models.caf_solicitud import TBL_CAF_Solicitud
 
 
+# Campos de la solicitud que viajan serializados con el evento (outbox).
+# Son los que usan los observers para construir las notificaciones.
+SOLICITUD_SNAPSHOT_FIELDS = (
+    "id_solicitud",
+    "Tipo_Contratacion",
+    "Responsable",
+    "Usuario",
+    "Building",
+    "Cliente",
+    "Proveedor",
+    "approve",
+    "Comentarios",
+)
+
+
+class SolicitudSnapshot:
+    """
+    Copia de los campos de una solicitud necesarios para notificar.
+    Sustituye a la entidad ORM cuando el evento se reconstruye desde el outbox.
+    """
+    __slots__ = SOLICITUD_SNAPSHOT_FIELDS
+    
+    def __init__(self, **fields):
+        for name in SOLICITUD_SNAPSHOT_FIELDS:
+            object.__setattr__(self, name, fields.get(name))
+    
+    @classmethod
+    def from_solicitud(cls, solicitud) -> 'SolicitudSnapshot':
+        return cls(**{name: getattr(solicitud, name, None) for name in SOLICITUD_SNAPSHOT_FIELDS})
+    
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in SOLICITUD_SNAPSHOT_FIELDS}
+
+
 class DomainEvent:
     """Clase base para todos los eventos del dominio."""
     
+    # Atributos propios del evento (además de la solicitud) que se serializan
+    payload_fields: tuple = ()
+    
     def __init__(self, timestamp: Optional[datetime] = None):
         self.timestamp = timestamp or datetime.now()
+    
+    def to_payload(self) -> dict:
+        """Serializa el evento a un dict JSON-compatible."""
+        payload = {"timestamp": self.timestamp.isoformat()}
+        solicitud = getattr(self, "solicitud", None)
+        if solicitud is not None:
+            payload["solicitud"] = SolicitudSnapshot.from_solicitud(solicitud).to_dict()
+        for name in self.payload_fields:
+            payload[name] = getattr(self, name)
+        return payload
+    
+    @classmethod
+    def from_payload(cls, payload: dict) -> 'DomainEvent':
+        """Reconstruye el evento a partir de to_payload()."""
+        kwargs = {name: payload.get(name) for name in cls.payload_fields}
+        if "solicitud" in payload:
+            kwargs["solicitud"] = SolicitudSnapshot(**payload["solicitud"])
+        return cls(timestamp=datetime.fromisoformat(payload["timestamp"]), **kwargs)
 
 
 class SolicitudCreada(DomainEvent):
@@ -33,6 +89,8 @@ class SolicitudCreada(DomainEvent):
 class SolicitudAprobada(DomainEvent):
     """Evento disparado cuando se aprueba una solicitud CAF."""
     
+    payload_fields = ("aprobado_por",)
+    
     def __init__(self, solicitud: TBL_CAF_Solicitud, aprobado_por: str, timestamp: Optional[datetime] = None):
         super().__init__(timestamp)
         self.solicitud = solicitud
@@ -50,6 +108,8 @@ class SolicitudAprobada(DomainEvent):
 class SolicitudRechazada(DomainEvent):
     """Evento disparado cuando se rechaza una solicitud CAF."""
     
+    payload_fields = ("rechazado_por", "comentarios")
+    
     def __init__(self, solicitud: TBL_CAF_Solicitud, rechazado_por: str, comentarios: str, timestamp: Optional[datetime] = None):
         super().__init__(timestamp)
         self.solicitud = solicitud
@@ -68,6 +128,8 @@ class SolicitudRechazada(DomainEvent):
 class SolicitudActualizada(DomainEvent):
     """Evento disparado cuando se actualiza una solicitud CAF."""
     
+    payload_fields = ("campos_modificados",)
+    
     def __init__(self, solicitud: TBL_CAF_Solicitud, campos_modificados: list, timestamp: Optional[datetime] = None):
         super().__init__(timestamp)
         self.solicitud = solicitud
@@ -95,4 +157,61 @@ class SolicitudCorreccionesRealizadas(DomainEvent):
     
     @property
     def responsable(self) -> str:
-        return self.solicitud.Responsable or "N/A"
\ No newline at end of file
+        return self.solicitud.Responsable or "N/A"
+
+
+class SolicitudesCreadasLote(DomainEvent):
+    """
+    Evento disparado por el alta masiva: agrupa las solicitudes creadas para un mismo
+    responsable, de modo que recibe una sola notificación en lugar de una por solicitud.
+    """
+    
+    payload_fields = ("responsable", "solicitudes")
+    
+    def __init__(self, responsable: Optional[str], solicitudes: list, timestamp: Optional[datetime] = None):
+        super().__init__(timestamp)
+        self.responsable = responsable
+        # Campos de SOLICITUD_SNAPSHOT_FIELDS de cada solicitud (dicts serializables)
+        self.solicitudes = solicitudes
+    
+    @property
+    def solicitud_id(self) -> Optional[int]:
+        # El lote no pertenece a una sola solicitud
+        return None
+    
+    @property
+    def solicitud_ids(self) -> list:
+        return [solicitud["id_solicitud"] for solicitud in self.solicitudes]
+
+
+# Registro de eventos serializables (nombre de clase -> clase)
+EVENT_TYPES: Dict[str, Type[DomainEvent]] = {
+    event_type.__name__: event_type
+    for event_type in (
+        SolicitudCreada,
+        SolicitudAprobada,
+        SolicitudRechazada,
+        SolicitudActualizada,
+        SolicitudCorreccionesRealizadas,
+        SolicitudesCreadasLote,
+    )
+}
+
+
+def serialize_event(event: DomainEvent) -> str:
+    """Serializa un evento a JSON para guardarlo en el outbox."""
+    return json.dumps(event.to_payload(), default=str)
+
+
+def deserialize_event(event_type: str, payload: str) -> DomainEvent:
+    """
+    Reconstruye un evento desde el outbox.
+    Args:
+        event_type: Nombre de la clase del evento
+        payload: JSON generado por serialize_event
+    """
+    try:
+        cls = EVENT_TYPES[event_type]
+    except KeyError:
+        raise ValueError(f"Tipo de evento desconocido: {event_type}")
+    return cls.from_payload(json.loads(payload))
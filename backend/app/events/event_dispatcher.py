@@ -1,25 +1,45 @@
-from abc import ABC, abstractmethod
-from typing import List, Dict, Type
-from app.events.domain_events import DomainEvent
+from abc import ABC
+from typing import Callable, List, Dict, Set, Tuple, Type, Optional
+from app.events.domain_events import DomainEvent, EVENT_TYPES
+from app.events.event_history import EventHistory, EventOutcome, EventRecord
 import logging
+import queue
+import threading
+import time
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
 
+def handles(*event_types: Type[DomainEvent]):
+    """
+    Decorador que registra un método del observer como handler de uno o más tipos de evento.
+    El dispatcher enruta el evento directamente al método (también a subclases del tipo).
+    """
+    def decorator(func):
+        func._handles_events = event_types
+        return func
+    return decorator
+
+
 class Observer(ABC):
-    """Interfaz base para todos los observers."""
+    """
+    Interfaz base para todos los observers.
+    Un observer puede declarar handlers por evento con @handles, o bien
+    sobrescribir can_handle + handle para recibir los eventos en un solo método.
+    """
     
-    @abstractmethod
     def handle(self, event: DomainEvent) -> None:
         """
         Maneja el evento recibido.
         Args:
             event: El evento del dominio a procesar
         """
-        pass
+        handler = self.get_handler(type(event))
+        if handler is None:
+            raise NotImplementedError(f"{self.__class__.__name__} no maneja {type(event).__name__}")
+        handler(event)
     
-    @abstractmethod
     def can_handle(self, event_type: Type[DomainEvent]) -> bool:
         """
         Determina si este observer puede manejar el tipo de evento.
@@ -28,18 +48,86 @@ class Observer(ABC):
         Returns:
             bool: True si puede manejar el evento
         """
-        pass
+        return self.get_handler(event_type) is not None
+    
+    @classmethod
+    def _handler_names(cls) -> Dict[type, str]:
+        """Mapa tipo de evento -> nombre del método @handles (calculado una vez por clase)."""
+        names = cls.__dict__.get("_handler_names_cache")
+        if names is None:
+            names = {}
+            # Recorrer de la base a la subclase para que las subclases sobrescriban
+            for klass in reversed(cls.__mro__):
+                for attr_name, attr in vars(klass).items():
+                    for event_type in getattr(attr, "_handles_events", ()):
+                        names[event_type] = attr_name
+            cls._handler_names_cache = names
+        return names
+    
+    def get_handler(self, event_type: Type[DomainEvent]) -> Optional[Callable[[DomainEvent], None]]:
+        """
+        Retorna el método @handles para el tipo de evento, respetando su jerarquía (MRO).
+        Returns:
+            Callable o None si el observer no declara handler para ese tipo
+        """
+        names = self._handler_names()
+        for klass in event_type.__mro__:
+            attr_name = names.get(klass)
+            if attr_name is not None:
+                return getattr(self, attr_name)
+        return None
+
+
+class ObserverStats:
+    """Contadores de entrega por observer."""
+    __slots__ = ("calls", "errors", "total_ms", "max_ms", "last_error")
+    
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_error: Optional[str] = None
+    
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "last_error": self.last_error,
+        }
 
 
 class EventDispatcher:
     """
     Despachador central de eventos (Subject del patrón Observer).
     Mantiene la lista de observers y los notifica cuando ocurren eventos.
+    
+    Modos de despacho:
+    - Síncrono (por defecto): los observers se ejecutan dentro de la petición.
+    - Asíncrono (start_async): los eventos se encolan en una cola acotada y un
+      pool de workers los entrega, de modo que la petición solo espera el commit.
+      Si la cola está llena se entrega de forma síncrona (no se pierden eventos).
+    
+    La entrega usa una tabla de rutas tipo de evento -> (observer, handler) que se
+    reconstruye al suscribir/desuscribir, así despachar es una búsqueda en un dict.
     """
     
-    def __init__(self):
+    def __init__(self, history_capacity: int = 1000):
         self._observers: List[Observer] = []
-        self._event_history: List[DomainEvent] = []  # Para debugging/auditoría
+        self._routes: Dict[type, Tuple[Tuple[Observer, Callable], ...]] = {}
+        self._routes_lock = threading.Lock()
+        self._observer_stats: Dict[Observer, ObserverStats] = {}
+        self._event_history = EventHistory(history_capacity)  # Para debugging/auditoría (acotado)
+        
+        # Despacho asíncrono
+        self._queue: Optional[queue.Queue] = None
+        self._workers: List[threading.Thread] = []
+        self._accepting = False
+        self._put_timeout = 0.0
+        self._metrics_lock = threading.Lock()
+        self._metrics = self._empty_metrics()
     
     def subscribe(self, observer: Observer) -> None:
         """
@@ -48,7 +136,10 @@ class EventDispatcher:
             observer: Observer a suscribir
         """
         if observer not in self._observers:
-            self._observers.append(observer)
+            with self._routes_lock:
+                self._observers.append(observer)
+                self._observer_stats[observer] = ObserverStats()
+                self._rebuild_routes()
             logger.info(f"Observer {observer.__class__.__name__} suscrito correctamente")
         else:
             logger.warning(f"Observer {observer.__class__.__name__} ya está suscrito")
@@ -60,43 +151,294 @@ class EventDispatcher:
             observer: Observer a desuscribir
         """
         try:
-            self._observers.remove(observer)
+            with self._routes_lock:
+                self._observers.remove(observer)
+                self._observer_stats.pop(observer, None)
+                self._rebuild_routes()
             logger.info(f"Observer {observer.__class__.__name__} desuscrito correctamente")
         except ValueError:
             logger.warning(f"Observer {observer.__class__.__name__} no estaba suscrito")
     
+    # ------------------------------------------------------------------
+    # Tabla de rutas
+    # ------------------------------------------------------------------
+    def _resolve_handler(self, observer: Observer, event_type: type) -> Optional[Callable]:
+        handler = observer.get_handler(event_type)
+        if handler is None and observer.can_handle(event_type):
+            handler = observer.handle
+        return handler
+    
+    def _build_route(self, event_type: type) -> Tuple[Tuple[Observer, Callable], ...]:
+        route = []
+        for observer in self._observers:
+            try:
+                handler = self._resolve_handler(observer, event_type)
+            except Exception as e:
+                logger.error(f"Error en can_handle de {observer.__class__.__name__}: {str(e)}")
+                continue
+            if handler is not None:
+                route.append((observer, handler))
+        return tuple(route)
+    
+    def _rebuild_routes(self) -> None:
+        """Reconstruye las rutas de los eventos conocidos (llamar con _routes_lock)."""
+        # Se reemplaza el dict completo para que los lectores nunca vean una tabla a medias
+        self._routes = {event_type: self._build_route(event_type) for event_type in EVENT_TYPES.values()}
+    
+    def _get_route(self, event_type: type) -> Tuple[Tuple[Observer, Callable], ...]:
+        route = self._routes.get(event_type)
+        if route is None:
+            # Tipo no registrado en EVENT_TYPES (ej. subclases o eventos de prueba): se agrega al vuelo
+            with self._routes_lock:
+                route = self._build_route(event_type)
+                self._routes[event_type] = route
+        return route
+    
+    def get_routing_table(self) -> Dict[str, List[str]]:
+        """Tabla de rutas legible: tipo de evento -> observers que lo reciben."""
+        return {
+            event_type.__name__: [observer.__class__.__name__ for observer, _ in route]
+            for event_type, route in self._routes.items()
+        }
+    
     def dispatch(self, event: DomainEvent) -> None:
         """
         Despacha un evento a todos los observers que puedan manejarlo.
+        En modo asíncrono solo lo encola y retorna inmediatamente.
         Args:
             event: Evento del dominio a despachar
         """
         logger.info(f"Despachando evento {event.__class__.__name__} - ID: {getattr(event, 'solicitud_id', 'N/A')}")
         
         # Guardar en historial para auditoría
-        self._event_history.append(event)
+        record = self._event_history.append(event, EventOutcome.ENCOLADO)
         
-        # Notificar a observers interesados
+        if self._accepting:
+            try:
+                self._queue.put((event, record, time.monotonic()), timeout=self._put_timeout)
+                with self._metrics_lock:
+                    self._metrics["enqueued"] += 1
+                    self._metrics["high_watermark"] = max(self._metrics["high_watermark"], self._queue.qsize())
+                return
+            except queue.Full:
+                # Backpressure: la cola está llena, se entrega en la petición actual
+                with self._metrics_lock:
+                    self._metrics["rejected"] += 1
+                logger.warning(f"Cola de eventos llena ({self._queue.maxsize}), entrega síncrona de {event.__class__.__name__}")
+        
+        self._notify(event, record)
+    
+    def deliver(self, event: DomainEvent, delivered: Optional[Set[str]] = None) -> List[str]:
+        """
+        Entrega un evento de forma síncrona en el hilo actual (usado por el relay del outbox).
+        A diferencia de dispatch, nunca encola y reporta los fallos para poder reintentar.
+        Args:
+            event: Evento del dominio a entregar
+            delivered: Nombres de los observers que ya lo procesaron en intentos anteriores;
+                       se omiten y se agregan los que lo procesen en esta entrega
+        Returns:
+            List[str]: Errores de los observers que fallaron (vacía si todo se entregó)
+        """
+        logger.info(f"Entregando evento {event.__class__.__name__} - ID: {getattr(event, 'solicitud_id', 'N/A')}")
+        record = self._event_history.append(event, EventOutcome.ENCOLADO)
+        return self._notify(event, record, delivered)
+    
+    def _notify(
+        self,
+        event: DomainEvent,
+        record: Optional[EventRecord] = None,
+        delivered: Optional[Set[str]] = None
+    ) -> List[str]:
+        """
+        Notifica el evento a los observers interesados y registra el resultado en el historial.
+        Returns:
+            List[str]: Errores de los observers que fallaron
+        """
         handled_count = 0
-        for observer in self._observers:
+        errors: List[str] = []
+        route = self._get_route(type(event))
+        for observer, handler in route:
+            name = observer.__class__.__name__
+            if delivered is not None and name in delivered:
+                continue
+            error = None
+            started = time.perf_counter()
             try:
-                if observer.can_handle(type(event)):
-                    observer.handle(event)
-                    handled_count += 1
-                    logger.debug(f"Observer {observer.__class__.__name__} procesó {event.__class__.__name__}")
+                handler(event)
+                handled_count += 1
+                if delivered is not None:
+                    delivered.add(name)
+                logger.debug(f"Observer {observer.__class__.__name__} procesó {event.__class__.__name__}")
             except Exception as e:
                 # Log del error pero no detener el flujo para otros observers
+                error = f"{observer.__class__.__name__}: {str(e)}"
+                errors.append(error)
                 logger.error(f"Error en observer {observer.__class__.__name__}: {str(e)}")
+            self._record_observer_call(observer, (time.perf_counter() - started) * 1000, error)
         
         logger.info(f"Evento {event.__class__.__name__} procesado por {handled_count} observers")
+        if record is not None:
+            if errors:
+                record.outcome = EventOutcome.FALLIDO
+            elif route:
+                record.outcome = EventOutcome.ENTREGADO
+            else:
+                record.outcome = EventOutcome.SIN_OBSERVERS
+        return errors
+    
+    def _record_observer_call(self, observer: Observer, elapsed_ms: float, error: Optional[str]) -> None:
+        stats = self._observer_stats.get(observer)
+        if stats is None:
+            return
+        with self._metrics_lock:
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = error
+    
+    def get_observer_stats(self) -> Dict[str, dict]:
+        """Llamadas, errores y tiempos de entrega por observer."""
+        with self._metrics_lock:
+            return {observer.__class__.__name__: stats.to_dict() for observer, stats in self._observer_stats.items()}
+    
+    # ------------------------------------------------------------------
+    # Despacho asíncrono
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _empty_metrics() -> Dict[str, float]:
+        return {
+            "enqueued": 0,
+            "processed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "high_watermark": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+    
+    def start_async(self, workers: int = 2, max_queue_size: int = 1000, put_timeout: float = 0.5) -> None:
+        """
+        Activa el despacho asíncrono con una cola acotada y un pool de workers.
+        Args:
+            workers: Número de hilos que entregan eventos
+            max_queue_size: Capacidad máxima de la cola
+            put_timeout: Segundos que dispatch espera por espacio antes de entregar síncronamente
+        """
+        if self._accepting:
+            logger.warning("El despacho asíncrono ya está activo")
+            return
+        
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._put_timeout = put_timeout
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"event-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._accepting = True
+        logger.info(f"Despacho asíncrono iniciado: {workers} workers, cola máxima {max_queue_size}")
+    
+    def _worker_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:  # Señal de apagado
+                    return
+                event, record, enqueued_at = item
+                wait_ms = (time.monotonic() - enqueued_at) * 1000
+                errors = self._notify(event, record)
+                with self._metrics_lock:
+                    self._metrics["processed"] += 1
+                    self._metrics["failed"] += 1 if errors else 0
+                    self._metrics["total_wait_ms"] += wait_ms
+                    self._metrics["max_wait_ms"] = max(self._metrics["max_wait_ms"], wait_ms)
+            except Exception as e:
+                logger.error(f"Error en worker de eventos: {str(e)}")
+            finally:
+                self._queue.task_done()
+    
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """
+        Detiene el despacho asíncrono entregando primero los eventos pendientes.
+        Los eventos despachados durante el apagado se entregan de forma síncrona.
+        Args:
+            timeout: Segundos máximos de espera para vaciar la cola
+        """
+        if not self._accepting:
+            return
+        self._accepting = False
+        pending = self._queue.qsize()
+        logger.info(f"Deteniendo despacho asíncrono, {pending} eventos pendientes")
+        
+        # Las señales de apagado quedan detrás de los eventos pendientes (FIFO)
+        for _ in self._workers:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(timeout=max(0.0, deadline - time.monotonic()))
+        
+        alive = [worker.name for worker in self._workers if worker.is_alive()]
+        if alive:
+            logger.error(f"Timeout vaciando la cola de eventos; quedan {self._queue.qsize()} eventos sin entregar")
+        else:
+            # Eventos encolados justo mientras se cerraba la cola
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    self._notify(item[0], item[1])
+        self._workers = []
+        logger.info("Despacho asíncrono detenido")
+    
+    def get_queue_metrics(self) -> dict:
+        """Métricas de la cola de eventos (backpressure)."""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        processed = metrics["processed"]
+        return {
+            "mode": "async" if self._accepting else "sync",
+            "workers_alive": sum(1 for worker in self._workers if worker.is_alive()),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_max_size": self._queue.maxsize if self._queue else 0,
+            "high_watermark": metrics["high_watermark"],
+            "enqueued": metrics["enqueued"],
+            "processed": processed,
+            "failed": metrics["failed"],
+            "rejected_sync_fallback": metrics["rejected"],
+            "avg_wait_ms": round(metrics["total_wait_ms"] / processed, 2) if processed else 0.0,
+            "max_wait_ms": round(metrics["max_wait_ms"], 2),
+        }
     
     def get_observers_count(self) -> int:
         """Retorna el número de observers suscritos."""
         return len(self._observers)
     
-    def get_event_history(self) -> List[DomainEvent]:
-        """Retorna el historial de eventos para debugging."""
-        return self._event_history.copy()
+    def get_event_history(
+        self,
+        solicitud_id: Optional[int] = None,
+        event_type: Optional[str] = None,
+        limit: Optional[int] = None,
+        before: Optional[int] = None
+    ) -> List[EventRecord]:
+        """
+        Retorna registros del historial (del más reciente al más antiguo) para debugging.
+        Args:
+            solicitud_id: Filtrar por solicitud
+            event_type: Filtrar por tipo de evento
+            limit: Máximo de registros (None = todos los disponibles)
+            before: Cursor de paginación (seq del último registro de la página anterior)
+        """
+        return self._event_history.query(solicitud_id=solicitud_id, event_type=event_type, limit=limit, before=before)
+    
+    def get_history_stats(self) -> dict:
+        """Tamaño del historial y total de eventos registrados desde el arranque."""
+        return {
+            "stored": len(self._event_history),
+            "capacity": self._event_history.capacity,
+            "total_recorded": self._event_history.total_recorded,
+        }
     
     def clear_history(self) -> None:
         """Limpia el historial de eventos."""
@@ -115,6 +457,7 @@ def get_event_dispatcher() -> EventDispatcher:
     """
     global _event_dispatcher_instance
     if _event_dispatcher_instance is None:
-        _event_dispatcher_instance = EventDispatcher()
+        from app.core.config import settings
+        _event_dispatcher_instance = EventDispatcher(history_capacity=settings.EVENT_HISTORY_CAPACITY)
         logger.info("EventDispatcher singleton inicializado")
     return _event_dispatcher_instance
\ No newline at end of file
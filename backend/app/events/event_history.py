@@ -0,0 +1,158 @@
+"""
+Historial acotado de eventos despachados (debugging/auditoría).
+
+Buffer circular de capacidad fija con registros compactos: solo se guarda el id
+de la solicitud, el tipo, la fecha y el resultado, nunca la entidad ORM.
+Mantiene índices por solicitud y por tipo de evento para consultar sin copiar.
+"""
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterator, List, Optional
+
+from app.events.domain_events import DomainEvent
+
+
+class EventOutcome:
+    """Resultados posibles de un evento en el historial."""
+    ENCOLADO = "encolado"
+    ENTREGADO = "entregado"
+    FALLIDO = "fallido"
+    SIN_OBSERVERS = "sin_observers"
+
+
+class EventRecord:
+    """Registro compacto de un evento despachado."""
+    __slots__ = ("seq", "event_type", "solicitud_id", "timestamp", "outcome")
+
+    def __init__(self, seq: int, event_type: str, solicitud_id: Optional[int], timestamp: datetime, outcome: str):
+        self.seq = seq
+        self.event_type = event_type
+        self.solicitud_id = solicitud_id
+        self.timestamp = timestamp
+        self.outcome = outcome
+
+    def to_dict(self) -> dict:
+        return {
+            "seq": self.seq,
+            "type": self.event_type,
+            "solicitud_id": self.solicitud_id,
+            "timestamp": self.timestamp.isoformat(),
+            "outcome": self.outcome,
+        }
+
+
+class EventHistory:
+    """
+    Buffer circular thread-safe de EventRecord indexado por solicitud y tipo.
+    La memoria es constante: al llenarse, cada registro nuevo reemplaza al más antiguo.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._buffer: List[Optional[EventRecord]] = [None] * capacity
+        self._next_seq = 0
+        self._size = 0
+        self._by_solicitud: Dict[int, Deque[int]] = {}
+        self._by_type: Dict[str, Deque[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def total_recorded(self) -> int:
+        """Eventos registrados desde el arranque (incluye los ya desalojados)."""
+        return self._next_seq
+
+    def append(self, event: DomainEvent, outcome: str) -> EventRecord:
+        """Registra un evento y retorna su registro (para actualizar el resultado después)."""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            slot = seq % self.capacity
+
+            evicted = self._buffer[slot]
+            if evicted is None:
+                self._size += 1
+            else:
+                self._unindex(self._by_solicitud, evicted.solicitud_id, evicted.seq)
+                self._unindex(self._by_type, evicted.event_type, evicted.seq)
+
+            record = EventRecord(
+                seq=seq,
+                event_type=event.__class__.__name__,
+                solicitud_id=getattr(event, "solicitud_id", None),
+                timestamp=event.timestamp,
+                outcome=outcome,
+            )
+            self._buffer[slot] = record
+            if record.solicitud_id is not None:
+                self._by_solicitud.setdefault(record.solicitud_id, deque()).append(seq)
+            self._by_type.setdefault(record.event_type, deque()).append(seq)
+            return record
+
+    @staticmethod
+    def _unindex(index: Dict, key, seq: int) -> None:
+        # El registro desalojado siempre es el más antiguo de su índice
+        seqs = index.get(key)
+        if seqs and seqs[0] == seq:
+            seqs.popleft()
+            if not seqs:
+                del index[key]
+
+    def _get(self, seq: int) -> Optional[EventRecord]:
+        record = self._buffer[seq % self.capacity]
+        return record if record is not None and record.seq == seq else None
+
+    def _candidate_seqs(self, solicitud_id: Optional[int], event_type: Optional[str], before: Optional[int]) -> Iterator[int]:
+        """Secuencias candidatas de la más reciente a la más antigua."""
+        if solicitud_id is not None and event_type is not None:
+            by_solicitud = self._by_solicitud.get(solicitud_id, ())
+            by_type = self._by_type.get(event_type, ())
+            # Recorrer el índice más pequeño y filtrar por el otro criterio
+            if len(by_solicitud) <= len(by_type):
+                return (s for s in reversed(by_solicitud) if self._buffer[s % self.capacity].event_type == event_type)
+            return (s for s in reversed(by_type) if self._buffer[s % self.capacity].solicitud_id == solicitud_id)
+        if solicitud_id is not None:
+            return reversed(self._by_solicitud.get(solicitud_id, ()))
+        if event_type is not None:
+            return reversed(self._by_type.get(event_type, ()))
+        newest = self._next_seq if before is None else min(before, self._next_seq)
+        oldest = max(0, self._next_seq - self.capacity)
+        return iter(range(newest - 1, oldest - 1, -1))
+
+    def query(
+        self,
+        solicitud_id: Optional[int] = None,
+        event_type: Optional[str] = None,
+        limit: Optional[int] = None,
+        before: Optional[int] = None
+    ) -> List[EventRecord]:
+        """
+        Consulta registros del más reciente al más antiguo.
+        Args:
+            solicitud_id: Filtrar por solicitud
+            event_type: Filtrar por tipo de evento (nombre de clase)
+            limit: Máximo de registros (None = todos los disponibles)
+            before: Cursor de paginación, retorna registros con seq < before
+        """
+        results: List[EventRecord] = []
+        with self._lock:
+            for seq in self._candidate_seqs(solicitud_id, event_type, before):
+                if before is not None and seq >= before:
+                    continue
+                record = self._get(seq)
+                if record is None:
+                    continue
+                results.append(record)
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffer = [None] * self.capacity
+            self._size = 0
+            self._by_solicitud.clear()
+            self._by_type.clear()
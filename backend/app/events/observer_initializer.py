@@ -33,6 +33,26 @@ def initialize_observers(frontend_base_url: str = None) -> None:
     logger.info(f"Observers inicializados correctamente. Total: {dispatcher.get_observers_count()}")
 
 
+def start_event_dispatch() -> None:
+    """
+    Activa el despacho asíncrono de eventos si EVENT_DISPATCH_MODE=async.
+    En modo sync los observers se siguen ejecutando dentro de la petición.
+    """
+    if settings.EVENT_DISPATCH_MODE != "async":
+        logger.info("Despacho de eventos en modo síncrono")
+        return
+    get_event_dispatcher().start_async(
+        workers=settings.EVENT_WORKERS,
+        max_queue_size=settings.EVENT_QUEUE_MAXSIZE,
+        put_timeout=settings.EVENT_QUEUE_PUT_TIMEOUT
+    )
+
+
+def stop_event_dispatch() -> None:
+    """Vacía la cola de eventos pendientes y detiene los workers."""
+    get_event_dispatcher().shutdown(timeout=settings.EVENT_SHUTDOWN_TIMEOUT)
+
+
 def get_observers_status() -> dict:
     """
     Retorna el estado actual de los observers registrados.
@@ -42,6 +62,10 @@ def get_observers_status() -> dict:
     dispatcher = get_event_dispatcher()
     return {
         "observers_count": dispatcher.get_observers_count(),
-        "events_processed": len(dispatcher.get_event_history()),
+        "events_processed": dispatcher.get_history_stats()["total_recorded"],
+        "history": dispatcher.get_history_stats(),
+        "dispatch": dispatcher.get_queue_metrics(),
+        "routes": dispatcher.get_routing_table(),
+        "observers": dispatcher.get_observer_stats(),
         "status": "active"
     }
\ No newline at end of file
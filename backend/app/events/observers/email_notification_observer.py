@@ -1,12 +1,11 @@
-from typing import Type
 import logging
-from app.events.event_dispatcher import Observer
+from app.events.event_dispatcher import Observer, handles
 from app.events.domain_events import (
-    DomainEvent, 
     SolicitudCreada, 
     SolicitudAprobada, 
     SolicitudRechazada,
-    SolicitudCorreccionesRealizadas
+    SolicitudCorreccionesRealizadas,
+    SolicitudesCreadasLote
 )
 from app.services.email_service import email_service
 
@@ -17,7 +16,9 @@ logger = logging.getLogger(__name__)
 class EmailNotificationObserver(Observer):
     """
     Observer que maneja el envío de correos electrónicos cuando ocurren eventos de solicitudes CAF.
-    Se suscribe a: SolicitudCreada, SolicitudAprobada, SolicitudRechazada
+    Se suscribe a: SolicitudCreada, SolicitudAprobada, SolicitudRechazada, SolicitudCorreccionesRealizadas,
+    SolicitudesCreadasLote
+    (cada evento se enruta directamente a su método @handles).
     """
     
     def __init__(self, frontend_base_url: str = "http://localhost:3000"):
@@ -27,45 +28,9 @@ class EmailNotificationObserver(Observer):
             frontend_base_url: URL base del frontend para generar links
         """
         self.frontend_base_url = frontend_base_url
-        self.supported_events = {
-            SolicitudCreada,
-            SolicitudAprobada, 
-            SolicitudRechazada,
-            SolicitudCorreccionesRealizadas
-        }
         logger.info(f"EmailNotificationObserver inicializado con frontend: {frontend_base_url}")
     
-    def can_handle(self, event_type: Type[DomainEvent]) -> bool:
-        """
-        Determina si este observer puede manejar el tipo de evento.
-        Args:
-            event_type: Tipo de evento del dominio
-        Returns:
-            bool: True si puede manejar el evento
-        """
-        return event_type in self.supported_events
-    
-    def handle(self, event: DomainEvent) -> None:
-        """
-        Maneja el evento recibido enviando el correo correspondiente.
-        Args:
-            event: El evento del dominio a procesar
-        """
-        try:
-            if isinstance(event, SolicitudCreada):
-                self._handle_solicitud_creada(event)
-            elif isinstance(event, SolicitudAprobada):
-                self._handle_solicitud_aprobada(event)
-            elif isinstance(event, SolicitudRechazada):
-                self._handle_solicitud_rechazada(event)
-            elif isinstance(event, SolicitudCorreccionesRealizadas):
-                self._handle_solicitud_correcciones_realizadas(event)
-            else:
-                logger.warning(f"Tipo de evento no soportado: {type(event).__name__}")
-        except Exception as e:
-            logger.error(f"Error procesando evento {type(event).__name__}: {str(e)}")
-            raise
-    
+    @handles(SolicitudCreada)
     def _handle_solicitud_creada(self, event: SolicitudCreada) -> None:
         """
         Envía correo de notificación cuando se crea una nueva solicitud.
@@ -93,12 +58,42 @@ class EmailNotificationObserver(Observer):
             if result.get("status") == "success":
                 logger.info(f"Correo de notificación enviado exitosamente para solicitud #{event.solicitud_id}")
             else:
-                logger.error(f"Error enviando correo de notificación: {result}")
+                # Falla explícita para que el relay del outbox reintente la entrega
+                raise Exception(f"Error enviando correo de notificación: {result}")
                 
         except Exception as e:
             logger.error(f"Excepción enviando correo de notificación: {str(e)}")
             raise
     
+    @handles(SolicitudesCreadasLote)
+    def _handle_solicitudes_creadas_lote(self, event: SolicitudesCreadasLote) -> None:
+        """
+        Envía un solo correo al responsable con todas las solicitudes de un alta masiva.
+        Args:
+            event: Evento con las solicitudes creadas para el responsable
+        """
+        logger.info(f"Enviando correo de alta masiva ({len(event.solicitudes)} solicitudes) a {event.responsable}")
+        
+        responsable_email = event.responsable or "jose.serna@mpagroup.mx"
+        
+        try:
+            result = email_service.send_caf_batch_notification(
+                to_email=responsable_email,
+                solicitudes=event.solicitudes,
+                frontend_base_url=self.frontend_base_url
+            )
+            
+            if result.get("status") == "success":
+                logger.info(f"Correo de alta masiva enviado exitosamente a {responsable_email}")
+            else:
+                # Falla explícita para que el relay del outbox reintente la entrega
+                raise Exception(f"Error enviando correo de alta masiva: {result}")
+                
+        except Exception as e:
+            logger.error(f"Excepción enviando correo de alta masiva: {str(e)}")
+            raise
+    
+    @handles(SolicitudAprobada)
     def _handle_solicitud_aprobada(self, event: SolicitudAprobada) -> None:
         """
         Envía correo de confirmación cuando se aprueba una solicitud.
@@ -129,12 +124,14 @@ class EmailNotificationObserver(Observer):
             if result.get("status") == "success":
                 logger.info(f"Correo de aprobación enviado exitosamente para solicitud #{event.solicitud_id}")
             else:
-                logger.error(f"Error enviando correo de aprobación: {result}")
+                # Falla explícita para que el relay del outbox reintente la entrega
+                raise Exception(f"Error enviando correo de aprobación: {result}")
                 
         except Exception as e:
             logger.error(f"Excepción enviando correo de aprobación: {str(e)}")
             raise
     
+    @handles(SolicitudRechazada)
     def _handle_solicitud_rechazada(self, event: SolicitudRechazada) -> None:
         """
         Envía correo de notificación cuando se rechaza una solicitud.
@@ -190,12 +187,14 @@ class EmailNotificationObserver(Observer):
                 tipo_email = "correcciones" if requiere_correcciones else "rechazo definitivo"
                 logger.info(f"Correo de {tipo_email} enviado exitosamente para solicitud #{event.solicitud_id}")
             else:
-                logger.error(f"Error enviando correo de rechazo: {result}")
+                # Falla explícita para que el relay del outbox reintente la entrega
+                raise Exception(f"Error enviando correo de rechazo: {result}")
                 
         except Exception as e:
             logger.error(f"Excepción enviando correo de rechazo: {str(e)}")
             raise
     
+    @handles(SolicitudCorreccionesRealizadas)
     def _handle_solicitud_correcciones_realizadas(self, event: SolicitudCorreccionesRealizadas) -> None:
         """
         Envía correo de notificación cuando se realizan las correcciones solicitadas.
@@ -224,7 +223,8 @@ class EmailNotificationObserver(Observer):
             if result.get("status") == "success":
                 logger.info(f"Correo de correcciones realizadas enviado exitosamente para solicitud #{event.solicitud_id}")
             else:
-                logger.error(f"Error enviando correo de correcciones realizadas: {result}")
+                # Falla explícita para que el relay del outbox reintente la entrega
+                raise Exception(f"Error enviando correo de correcciones realizadas: {result}")
                 
         except Exception as e:
             logger.error(f"Excepción enviando correo de correcciones realizadas: {str(e)}")
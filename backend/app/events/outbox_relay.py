@@ -0,0 +1,205 @@
+"""
+Relay del outbox transaccional.
+Reclama en lotes los eventos guardados en TBL_CAF_Outbox y los entrega a los
+observers, con reintentos y backoff exponencial si la entrega falla. Cada fila
+guarda qué observers ya procesaron el evento: un reintento solo vuelve a llamar
+a los que fallaron (un correo ya enviado no se repite).
+"""
+import logging
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, get_engine
+from app.events.domain_events import deserialize_event
+from app.events.event_dispatcher import EventDispatcher, get_event_dispatcher
+from app.models.outbox import TBL_CAF_Outbox
+from app.repositories.outbox_repository import OutboxRepository
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    """
+    Worker en segundo plano que entrega los eventos del outbox.
+    Los servicios llaman wake() después del commit para que la entrega sea inmediata;
+    el sondeo periódico recupera reintentos y eventos de reinicios anteriores.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        dispatcher: Optional[EventDispatcher] = None,
+        batch_size: int = 20,
+        poll_interval: float = 5.0,
+        lease_seconds: int = 120,
+        max_attempts: int = 8,
+        backoff_base_seconds: float = 30.0,
+        backoff_max_seconds: float = 3600.0
+    ):
+        """
+        Args:
+            session_factory: Crea sesiones de base de datos (ej. SessionLocal)
+            dispatcher: Despachador que entrega a los observers
+            batch_size: Eventos reclamados por lote
+            poll_interval: Segundos entre sondeos cuando no hay trabajo
+            lease_seconds: Tiempo que un evento reclamado queda bloqueado para otros relays
+            max_attempts: Intentos antes de marcar el evento como fallido
+            backoff_base_seconds: Espera tras el primer fallo (se duplica en cada intento)
+            backoff_max_seconds: Espera máxima entre intentos
+        """
+        self._session_factory = session_factory
+        self._dispatcher = dispatcher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def dispatcher(self) -> EventDispatcher:
+        return self._dispatcher or get_event_dispatcher()
+
+    def backoff_seconds(self, attempts: int) -> float:
+        """Espera antes del siguiente intento tras `attempts` intentos fallidos."""
+        return min(self.backoff_base_seconds * (2 ** (attempts - 1)), self.backoff_max_seconds)
+
+    def process_batch(self) -> int:
+        """
+        Reclama y entrega un lote de eventos.
+        Returns:
+            int: Número de eventos procesados (entregados o fallidos)
+        """
+        db = self._session_factory()
+        try:
+            repo = OutboxRepository(db)
+            # Se copian los datos del lote: tras cada commit las entidades expiran y
+            # recargarlas podría traer el token de otro relay
+            claimed = [
+                (entry.id_evento, entry.Reclamado_Por, entry.Tipo_Evento, entry.Payload, entry.Intentos,
+                 entry.Observers_Entregados)
+                for entry in repo.claim_batch(self.batch_size, self.lease_seconds)
+            ]
+            for entry_id, claim_token, event_type, payload, attempts, delivered_to in claimed:
+                # Renovar el bloqueo de este evento antes de entregarlo; si otro relay
+                # ya lo reclamó (bloqueo vencido) se omite para no duplicar el envío
+                renewed = repo.renew_lease(entry_id, claim_token, self.lease_seconds)
+                db.commit()
+                if not renewed:
+                    logger.warning(f"Evento outbox #{entry_id} reclamado por otro relay; se omite")
+                    continue
+                delivered = set(delivered_to.split(",")) if delivered_to else set()
+                try:
+                    event = deserialize_event(event_type, payload)
+                    errors = self.dispatcher.deliver(event, delivered)
+                    if errors:
+                        raise Exception("; ".join(errors))
+                    marked = repo.mark_delivered(entry_id, claim_token, delivered)
+                    logger.info(f"Evento outbox #{entry_id} ({event_type}) entregado")
+                except Exception as e:
+                    attempts += 1
+                    retry_in = self.backoff_seconds(attempts) if attempts < self.max_attempts else None
+                    marked = repo.mark_failed(entry_id, claim_token, str(e), retry_in, delivered)
+                    if retry_in is None:
+                        logger.error(f"Evento outbox #{entry_id} fallido tras {attempts} intentos: {str(e)}")
+                    else:
+                        logger.warning(f"Evento outbox #{entry_id} falló (intento {attempts}), reintento en {retry_in}s: {str(e)}")
+                if not marked:
+                    logger.warning(f"Evento outbox #{entry_id}: se perdió el bloqueo durante la entrega; el estado lo registra el otro relay")
+                # Confirmar evento por evento para no repetir entregas ya hechas
+                db.commit()
+            return len(claimed)
+        finally:
+            db.close()
+
+    def wake(self) -> None:
+        """Solicita procesar el outbox sin esperar al siguiente sondeo."""
+        self._wake_event.set()
+
+    def start(self) -> None:
+        """Inicia el hilo del relay."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+        logger.info(f"Relay del outbox iniciado (lote {self.batch_size}, sondeo {self.poll_interval}s)")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Detiene el relay después de terminar el lote en curso."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            # Limpiar antes de procesar: un wake() durante el lote provoca otra vuelta
+            self._wake_event.clear()
+            try:
+                processed = self.process_batch()
+            except Exception as e:
+                logger.error(f"Error procesando el outbox: {str(e)}")
+                processed = 0
+            # Lote completo: probablemente quedan más eventos, seguir sin esperar
+            if processed >= self.batch_size:
+                continue
+            self._wake_event.wait(self.poll_interval)
+
+
+def ensure_outbox_available(engine=None) -> bool:
+    """
+    Verifica al arrancar que TBL_CAF_Outbox exista cuando OUTBOX_ENABLED=true.
+    Si falta (no se ejecutó scripts/create_tbl_caf_outbox.sql) se registra el error y
+    se deshabilita el outbox: los eventos se despachan directo en lugar de fallar
+    cada alta, actualización o aprobación al escribir en una tabla inexistente.
+    Returns:
+        bool: True si el outbox queda habilitado
+    """
+    if not settings.OUTBOX_ENABLED:
+        return False
+    try:
+        exists = inspect(engine or get_engine()).has_table(TBL_CAF_Outbox.__tablename__)
+    except Exception as e:
+        # BD no disponible al arrancar: no se puede verificar, se mantiene la configuración
+        logger.warning(f"No se pudo verificar la tabla {TBL_CAF_Outbox.__tablename__}: {str(e)}")
+        return True
+    if not exists:
+        logger.error(
+            f"OUTBOX_ENABLED=true pero la tabla {TBL_CAF_Outbox.__tablename__} no existe. "
+            "Ejecute scripts/create_tbl_caf_outbox.sql; mientras tanto el outbox queda deshabilitado "
+            "y los eventos se despachan sin reintentos."
+        )
+        settings.OUTBOX_ENABLED = False
+    return settings.OUTBOX_ENABLED
+
+
+# Singleton global del relay
+_outbox_relay_instance = None
+
+def get_outbox_relay() -> OutboxRelay:
+    """
+    Obtiene la instancia singleton del relay del outbox.
+    Returns:
+        OutboxRelay: Instancia única del relay
+    """
+    global _outbox_relay_instance
+    if _outbox_relay_instance is None:
+        _outbox_relay_instance = OutboxRelay(
+            session_factory=SessionLocal,
+            batch_size=settings.OUTBOX_BATCH_SIZE,
+            poll_interval=settings.OUTBOX_POLL_INTERVAL,
+            max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+            backoff_base_seconds=settings.OUTBOX_BACKOFF_BASE_SECONDS
+        )
+        logger.info("OutboxRelay singleton inicializado")
+    return _outbox_relay_instance
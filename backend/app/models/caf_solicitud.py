@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Enum as SqlEnum
+from sqlalchemy import Column, Integer, String, Date, Index, Enum as SqlEnum
 from app.core.database import Base
 import enum
 
@@ -15,8 +15,28 @@ class SolicitudStatus(enum.Enum):
     rechazado_definitivo = 2
 
 
+# Columnas del listado (GET /caf-solicitud); los índices del listado las incluyen
+# para responder sin buscar cada fila en el índice clustered
+LIST_COLUMNS = (
+    "id_solicitud", "Tipo_Contratacion", "Responsable", "Usuario", "Fecha",
+    "Cliente", "Building", "Proveedor", "CveSol", "approve",
+)
+
+
+def _list_index(name: str, *keys: str) -> Index:
+    """Índice del listado: filtros + id_solicitud (orden) e INCLUDE del resto de LIST_COLUMNS (SQL Server)."""
+    keys = keys + ("id_solicitud",)
+    return Index(name, *keys, mssql_include=[column for column in LIST_COLUMNS if column not in keys])
+
+
 class TBL_CAF_Solicitud(Base):
     __tablename__ = "TBL_CAF_Solicitud"
+    # Mismas definiciones que scripts/create_ix_caf_solicitud_listado.sql
+    __table_args__ = (
+        _list_index("IX_CAF_Solicitud_Responsable_Approve", "Responsable", "approve"),
+        _list_index("IX_CAF_Solicitud_Usuario_Approve", "Usuario", "approve"),
+        _list_index("IX_CAF_Solicitud_Approve", "approve"),
+    )
 
     id_solicitud = Column(Integer, primary_key=True, autoincrement=True, nullable=False)
     Tipo_Contratacion = Column(String(100), nullable=True)
@@ -72,4 +92,6 @@ class TBL_CAF_Solicitud(Base):
     NuevaOcupacionBenefica = Column(String(100), nullable=True)
     NuevaTerminacionSust = Column(String(100), nullable=True)
     NuevaTerminacionFinal = Column(String(100), nullable=True)
-    TiempoDias = Column(String(100), nullable=True)
\ No newline at end of file
+    TiempoDias = Column(String(100), nullable=True)
+    # Control de concurrencia optimista: cada UPDATE lo incrementa y puede exigir el valor leído
+    RowVersion = Column(Integer, nullable=False, default=1, server_default="1")
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from app.core.database import Base
+import enum
+
+
+class OutboxStatus(enum.Enum):
+    """
+    Estados de un evento en el outbox:
+    - pendiente: Esperando entrega (o reintento cuando llegue Proximo_Intento)
+    - procesando: Reclamado por un relay hasta Bloqueado_Hasta
+    - entregado: Todos los observers lo procesaron correctamente
+    - fallido: Se agotaron los reintentos
+    """
+    pendiente = "pendiente"
+    procesando = "procesando"
+    entregado = "entregado"
+    fallido = "fallido"
+
+
+class TBL_CAF_Outbox(Base):
+    """
+    Outbox transaccional de eventos de dominio.
+    Cada fila se escribe en la misma transacción que el cambio en TBL_CAF_Solicitud
+    y la entrega un relay en segundo plano con reintentos.
+    """
+    __tablename__ = "TBL_CAF_Outbox"
+    __table_args__ = (
+        Index("IX_CAF_Outbox_Estado_ProximoIntento", "Estado", "Proximo_Intento"),
+    )
+
+    id_evento = Column(Integer, primary_key=True, autoincrement=True, nullable=False)
+    Tipo_Evento = Column(String(100), nullable=False)
+    id_solicitud = Column(Integer, nullable=True)
+    Payload = Column(Text, nullable=False)
+    Estado = Column(String(20), nullable=False, default=OutboxStatus.pendiente.value)
+    Intentos = Column(Integer, nullable=False, default=0)
+    Proximo_Intento = Column(DateTime, nullable=False)
+    Reclamado_Por = Column(String(64), nullable=True)
+    Bloqueado_Hasta = Column(DateTime, nullable=True)
+    Ultimo_Error = Column(String(1000), nullable=True)
+    # Observers que ya procesaron el evento (separados por coma); se omiten al reintentar
+    Observers_Entregados = Column(String(1000), nullable=True)
+    Fecha_Creacion = Column(DateTime, nullable=False)
+    Fecha_Entrega = Column(DateTime, nullable=True)
@@ -0,0 +1,39 @@
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+from app.models.building import CAT_BUILDINGS
+
+
+class BuildingRepository:
+    """Acceso a datos del catálogo de edificios (BD_MPA_VCAP.dbo.CAT_BUILDINGS)."""
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    @staticmethod
+    def _active():
+        # Activos: INACTIVE = NULL o 'N'
+        return or_(CAT_BUILDINGS.INACTIVE == 'N', CAT_BUILDINGS.INACTIVE == None)
+
+    def get_select_options(self) -> list[dict]:
+        """
+        Edificios activos ordenados por nombre en formato {value, label} para React Select.
+        Proyecta solo BLDGID: no se crean entidades ni se registran en el identity map,
+        y cada fila se convierte directo al formato de respuesta.
+        """
+        rows = self._db.execute(
+            select(CAT_BUILDINGS.BLDGID)
+            .where(self._active())
+            .order_by(CAT_BUILDINGS.BLDGNAME)
+        ).scalars()
+        return [{"value": bldg_id, "label": bldg_id} for bldg_id in rows]
+
+    def get_fingerprint(self) -> tuple:
+        """
+        Huella barata del catálogo activo (conteo, mínimo y máximo BLDGID).
+        Cambia al agregar, eliminar, activar o desactivar edificios.
+        """
+        row = self._db.execute(
+            select(func.count(), func.min(CAT_BUILDINGS.BLDGID), func.max(CAT_BUILDINGS.BLDGID))
+            .where(self._active())
+        ).one()
+        return tuple(row)
@@ -0,0 +1,81 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.caf_solicitud import TBL_CAF_Solicitud, SolicitudStatus, LIST_COLUMNS
+
+# Estado 'pendiente' = approve NULL
+APPROVE_FILTERS = ["pendiente"] + [status.name for status in SolicitudStatus]
+
+_table = TBL_CAF_Solicitud.__table__
+
+
+def approve_condition(approve: str):
+    """
+    Condición sobre approve para un estado por nombre.
+    Raises:
+        ValueError: Si el estado no es válido
+    """
+    if approve not in APPROVE_FILTERS:
+        raise ValueError(f"El estado debe ser uno de: {', '.join(APPROVE_FILTERS)}")
+    if approve == "pendiente":
+        return _table.c.approve.is_(None)
+    return _table.c.approve == SolicitudStatus[approve].value
+
+
+class CafSolicitudRepository:
+    """Acceso a datos de las solicitudes CAF (TBL_CAF_Solicitud)."""
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    @staticmethod
+    def list_query(
+        limit: int,
+        after_id: Optional[int] = None,
+        approve: Optional[str] = None,
+        responsable: Optional[str] = None,
+        usuario: Optional[str] = None,
+        building: Optional[str] = None,
+        tipo: Optional[str] = None,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None
+    ):
+        """
+        Página del listado: solo LIST_COLUMNS, más recientes primero.
+        Keyset sobre id_solicitud (id_solicitud < after_id) en lugar de OFFSET:
+        cada página cuesta lo mismo sin importar qué tan atrás esté.
+        Los filtros por Responsable/Usuario/approve coinciden con los índices
+        IX_CAF_Solicitud_* (scripts/create_ix_caf_solicitud_listado.sql).
+        Raises:
+            ValueError: Si el estado no es válido
+        """
+        stmt = select(*(_table.c[name] for name in LIST_COLUMNS))
+        if approve is not None:
+            stmt = stmt.where(approve_condition(approve))
+        if responsable:
+            stmt = stmt.where(_table.c.Responsable == responsable)
+        if usuario:
+            stmt = stmt.where(_table.c.Usuario == usuario)
+        if building:
+            stmt = stmt.where(_table.c.Building == building)
+        if tipo:
+            stmt = stmt.where(_table.c.Tipo_Contratacion == tipo)
+        if fecha_desde:
+            stmt = stmt.where(_table.c.Fecha >= fecha_desde)
+        if fecha_hasta:
+            stmt = stmt.where(_table.c.Fecha <= fecha_hasta)
+        if after_id is not None:
+            stmt = stmt.where(_table.c.id_solicitud < after_id)
+        return stmt.order_by(_table.c.id_solicitud.desc()).limit(limit)
+
+    def list_page(self, limit: int, after_id: Optional[int] = None, **filters) -> list[dict]:
+        """
+        Filas del listado como diccionarios (sin crear entidades ORM).
+        Args:
+            limit: Máximo de filas
+            after_id: id_solicitud de la última fila de la página anterior
+            **filters: Filtros de list_query
+        """
+        rows = self._db.execute(self.list_query(limit, after_id, **filters)).mappings()
+        return [dict(row) for row in rows]
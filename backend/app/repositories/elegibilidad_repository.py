@@ -1,31 +1,34 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.models.elegibilidad_usuario import CAT_Elegibilidad_Usuario
 
 
+TIPOS_REGLA = ("dominio", "departamento", "puesto")
+
+
 class ElegibilidadRepository:
     """Acceso a datos para reglas de elegibilidad de usuarios en Azure AD."""
 
     def __init__(self, db: Session):
         self._db = db
 
-    def _get_valores(self, tipo_regla: str) -> list[str]:
-        rows = (
-            self._db.query(CAT_Elegibilidad_Usuario.Valor)
-            .filter(
-                CAT_Elegibilidad_Usuario.Tipo_Regla == tipo_regla,
+    def get_reglas(self) -> dict[str, list[str]]:
+        """
+        Todas las reglas activas en una sola consulta, agrupadas por tipo.
+        Cada lista conserva el orden por Prioridad.
+        Returns:
+            dict: {"dominio": [...], "departamento": [...], "puesto": [...]}
+        """
+        reglas: dict[str, list[str]] = {tipo: [] for tipo in TIPOS_REGLA}
+        rows = self._db.execute(
+            select(CAT_Elegibilidad_Usuario.Tipo_Regla, CAT_Elegibilidad_Usuario.Valor)
+            .where(
+                CAT_Elegibilidad_Usuario.Tipo_Regla.in_(TIPOS_REGLA),
                 CAT_Elegibilidad_Usuario.Activo == 1,
             )
             .order_by(CAT_Elegibilidad_Usuario.Prioridad)
-            .all()
-        )
-        return [row.Valor for row in rows]
-
-    def get_dominios(self) -> list[str]:
-        return self._get_valores("dominio")
-
-    def get_departamentos(self) -> list[str]:
-        """Retorna departamentos ordenados por Prioridad (define orden en el select del frontend)."""
-        return self._get_valores("departamento")
+        ).tuples()
+        for tipo_regla, valor in rows:
+            reglas[tipo_regla].append(valor)
+        return reglas
 
-    def get_puestos(self) -> list[str]:
-        return self._get_valores("puesto")
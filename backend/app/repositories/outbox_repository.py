@@ -0,0 +1,151 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+from app.events.domain_events import DomainEvent, serialize_event
+from app.models.outbox import TBL_CAF_Outbox, OutboxStatus
+
+
+class OutboxRepository:
+    """Acceso a datos del outbox transaccional de eventos (TBL_CAF_Outbox)."""
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    def add(self, event: DomainEvent) -> TBL_CAF_Outbox:
+        """
+        Registra el evento en la transacción actual (no hace commit).
+        La fila se confirma junto con el cambio de la solicitud.
+        """
+        now = datetime.now()
+        entry = TBL_CAF_Outbox(
+            Tipo_Evento=event.__class__.__name__,
+            id_solicitud=getattr(event, "solicitud_id", None),
+            Payload=serialize_event(event),
+            Estado=OutboxStatus.pendiente.value,
+            Intentos=0,
+            Proximo_Intento=now,
+            Fecha_Creacion=now,
+        )
+        self._db.add(entry)
+        return entry
+
+    def claim_batch(self, limit: int, lease_seconds: int) -> list[TBL_CAF_Outbox]:
+        """
+        Reclama hasta `limit` eventos listos para entrega.
+        Se reclaman los pendientes cuyo Proximo_Intento ya llegó y los que quedaron
+        en 'procesando' con el bloqueo vencido (relay caído a mitad de la entrega).
+        El UPDATE condicional evita que dos relays reclamen la misma fila.
+        """
+        now = datetime.now()
+        claimable = or_(
+            and_(TBL_CAF_Outbox.Estado == OutboxStatus.pendiente.value, TBL_CAF_Outbox.Proximo_Intento <= now),
+            and_(TBL_CAF_Outbox.Estado == OutboxStatus.procesando.value, TBL_CAF_Outbox.Bloqueado_Hasta < now),
+        )
+        candidate_ids = self._db.execute(
+            select(TBL_CAF_Outbox.id_evento)
+            .where(claimable)
+            .order_by(TBL_CAF_Outbox.id_evento)
+            .limit(limit)
+        ).scalars().all()
+        if not candidate_ids:
+            return []
+
+        claim_token = uuid.uuid4().hex
+        self._db.execute(
+            update(TBL_CAF_Outbox)
+            .where(TBL_CAF_Outbox.id_evento.in_(candidate_ids), claimable)
+            .values(
+                Estado=OutboxStatus.procesando.value,
+                Reclamado_Por=claim_token,
+                Bloqueado_Hasta=now + timedelta(seconds=lease_seconds),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self._db.commit()
+
+        return self._db.execute(
+            select(TBL_CAF_Outbox)
+            .where(TBL_CAF_Outbox.Reclamado_Por == claim_token)
+            .order_by(TBL_CAF_Outbox.id_evento)
+        ).scalars().all()
+
+    def _update_claimed(self, entry_id: int, claim_token: str, **values) -> bool:
+        """
+        UPDATE del evento solo si sigue reclamado con claim_token.
+        Returns:
+            bool: False si otro relay lo reclamó (el bloqueo venció) y no se modificó
+        """
+        result = self._db.execute(
+            update(TBL_CAF_Outbox)
+            .where(TBL_CAF_Outbox.id_evento == entry_id, TBL_CAF_Outbox.Reclamado_Por == claim_token)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def renew_lease(self, entry_id: int, claim_token: str, lease_seconds: int) -> bool:
+        """
+        Extiende el bloqueo de un evento reclamado justo antes de entregarlo, para
+        que un lote lento no deje vencer el bloqueo de los eventos que faltan.
+        Returns:
+            bool: False si el evento ya fue reclamado por otro relay
+        """
+        return self._update_claimed(
+            entry_id, claim_token,
+            Estado=OutboxStatus.procesando.value,
+            Bloqueado_Hasta=datetime.now() + timedelta(seconds=lease_seconds),
+        )
+
+    @staticmethod
+    def _observers_column(delivered: Iterable[str]) -> Optional[str]:
+        return ",".join(sorted(delivered)) or None
+
+    def mark_delivered(self, entry_id: int, claim_token: str, delivered: Iterable[str] = ()) -> bool:
+        """Marca el evento como entregado. False si se perdió el bloqueo."""
+        return self._update_claimed(
+            entry_id, claim_token,
+            Estado=OutboxStatus.entregado.value,
+            Observers_Entregados=self._observers_column(delivered),
+            Intentos=TBL_CAF_Outbox.Intentos + 1,
+            Fecha_Entrega=datetime.now(),
+            Bloqueado_Hasta=None,
+            Ultimo_Error=None,
+        )
+
+    def mark_failed(
+        self,
+        entry_id: int,
+        claim_token: str,
+        error: str,
+        retry_in_seconds: float | None,
+        delivered: Iterable[str] = ()
+    ) -> bool:
+        """
+        Registra un intento fallido.
+        Args:
+            retry_in_seconds: Segundos hasta el siguiente intento, o None si ya no se reintenta
+            delivered: Observers que sí procesaron el evento (se omiten en el reintento)
+        Returns:
+            bool: False si se perdió el bloqueo
+        """
+        values = {
+            "Intentos": TBL_CAF_Outbox.Intentos + 1,
+            "Ultimo_Error": error[:1000],
+            "Observers_Entregados": self._observers_column(delivered),
+            "Bloqueado_Hasta": None,
+        }
+        if retry_in_seconds is None:
+            values["Estado"] = OutboxStatus.fallido.value
+        else:
+            values["Estado"] = OutboxStatus.pendiente.value
+            values["Proximo_Intento"] = datetime.now() + timedelta(seconds=retry_in_seconds)
+        return self._update_claimed(entry_id, claim_token, **values)
+
+    def count_by_status(self) -> dict:
+        """Conteo de eventos por estado para monitoreo."""
+        rows = self._db.execute(
+            select(TBL_CAF_Outbox.Estado, func.count()).group_by(TBL_CAF_Outbox.Estado)
+        ).all()
+        return {estado: total for estado, total in rows}
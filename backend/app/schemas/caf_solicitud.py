@@ -1,5 +1,6 @@
+from datetime import date
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 
 class ApprovalRequest(BaseModel):
     """
@@ -19,6 +20,10 @@ class ApprovalRequest(BaseModel):
         max_length=500,
         description="Comentarios (obligatorios para 'requiere_correcciones', opcionales para otros estados)"
     )
+    row_version: Optional[int] = Field(
+        None,
+        description="RowVersion leído con la solicitud (obligatorio, 428 si falta); si otro usuario la modificó después se responde 409"
+    )
     
     @validator('comentarios')
     def validate_comentarios_required(cls, v, values):
@@ -32,7 +37,8 @@ class ApprovalRequest(BaseModel):
         schema_extra = {
             "example": {
                 "approve": "requiere_correcciones",
-                "comentarios": "Falta información del proveedor y montos actualizados"
+                "comentarios": "Falta información del proveedor y montos actualizados",
+                "row_version": 2
             }
         }
 
@@ -44,6 +50,7 @@ class ApprovalResponse(BaseModel):
     approve: Optional[int] = Field(None, description="Valor numérico del estado (0, 1, o 2)")
     status: str = Field(..., description="Estado en string: 'requiere_correcciones', 'aprobado', o 'rechazado_definitivo'")
     comentarios: Optional[str]
+    row_version: Optional[int] = Field(None, description="Nueva versión de la fila")
     message: str
     
     class Config:
@@ -54,11 +61,116 @@ class ApprovalResponse(BaseModel):
                 "approve": 1,
                 "status": "aprobado",
                 "comentarios": None,
+                "row_version": 3,
                 "message": "Solicitud #123 aprobada exitosamente"
             }
         }
 
 
+class CafSolicitudBulkRequest(BaseModel):
+    """Request del alta masiva: cada elemento tiene el mismo formato que POST /caf-solicitud"""
+    solicitudes: List[Dict[str, Any]] = Field(..., min_length=1)
+
+
+class CafSolicitudBulkResponse(BaseModel):
+    """Response del alta masiva"""
+    created: int
+    ids: List[int] = Field(..., description="IDs generados, en el mismo orden que las solicitudes enviadas")
+
+
+class CafSolicitudDetail(BaseModel):
+    """
+    Detalle de una solicitud CAF (GET /caf-solicitud/{id}).
+    Con `fields` solo se cargan y serializan las columnas pedidas.
+    """
+    id_solicitud: int
+    Tipo_Contratacion: Optional[str] = None
+    Responsable: Optional[str] = None
+    Fecha: Optional[date] = None
+    Cliente: Optional[str] = None
+    Building: Optional[str] = None
+    Direccion: Optional[str] = None
+    Proveedor: Optional[str] = None
+    Descripcion_trabajo_servicio: Optional[str] = None
+    Fecha_inicio: Optional[date] = None
+    FechaTerminacionFinalServ: Optional[date] = None
+    MontoMXNsubtotal: Optional[str] = None
+    MontoUSDsubtotal: Optional[str] = None
+    TDC: Optional[str] = None
+    Anticipo: Optional[str] = None
+    Fuerza_trabajo: Optional[str] = None
+    Presupuesto_existente: Optional[str] = None
+    Tipo_trabajo: Optional[str] = None
+    Recuperable: Optional[str] = None
+    Justificacion_trabajo: Optional[str] = None
+    Enlace_sharepoint: Optional[str] = None
+    approve: Optional[int] = Field(None, description="NULL=Pendiente, 0=Requiere correcciones, 1=Aprobado, 2=Rechazado definitivo")
+    Cotizacion_MPA_CP: Optional[int] = None
+    AprobacionCorreoConcurso: Optional[int] = None
+    AnalisisRiesgosWHSE_VOBO: Optional[int] = None
+    DibujosEspecificaciones: Optional[int] = None
+    ProgramaObra: Optional[int] = None
+    DocumentoFirmar: Optional[int] = None
+    Acta_Constitutiva: Optional[int] = None
+    Poder_Notarial: Optional[int] = None
+    INE_Rep_Legal: Optional[int] = None
+    AltaIMSS_REPSE: Optional[int] = None
+    InfoBancariaContrato: Optional[int] = None
+    FichaPago: Optional[int] = None
+    InfoBancariaPagoDep: Optional[int] = None
+    Fecha_Ocupacion_Benefica: Optional[date] = None
+    Fecha_Terminacion_Sustancial: Optional[date] = None
+    Fianza_Anticipo: Optional[str] = None
+    FianzaCumplimiento_BuenaCalidad: Optional[str] = None
+    Fianza_Pasivos_Contingentes: Optional[str] = None
+    CveSol: Optional[str] = None
+    VOBO_LegalFirma: Optional[int] = None
+    VOBO_LegalPagoDep: Optional[int] = None
+    FechaTerminacionFinalCont: Optional[date] = None
+    MontoOriginalMXN: Optional[str] = None
+    Comentarios: Optional[str] = None
+    Mode: Optional[str] = None
+    Usuario: Optional[str] = None
+    MontoOriginalUSD: Optional[str] = None
+    MontoActualizadoMXN: Optional[str] = None
+    MontoActualizadoUSD: Optional[str] = None
+    NuevaOcupacionBenefica: Optional[str] = None
+    NuevaTerminacionSust: Optional[str] = None
+    NuevaTerminacionFinal: Optional[str] = None
+    TiempoDias: Optional[str] = None
+    RowVersion: Optional[int] = Field(None, description="Versión de la fila; enviarla al actualizar o aprobar")
+
+    @classmethod
+    def dump_json(cls, solicitud, fields: Optional[List[str]] = None) -> str:
+        """
+        JSON del detalle con el serializador de pydantic-core, sin jsonable_encoder.
+        Solo se leen los atributos de `fields` (los cargados con load_only).
+        """
+        names = fields or list(cls.model_fields)
+        detail = cls.model_validate({name: getattr(solicitud, name) for name in names})
+        return detail.model_dump_json(include=set(names))
+
+
+class CafSolicitudListItem(BaseModel):
+    """Fila del listado de solicitudes (solo las columnas de LIST_COLUMNS)"""
+    id_solicitud: int
+    Tipo_Contratacion: Optional[str] = None
+    Responsable: Optional[str] = None
+    Usuario: Optional[str] = None
+    Fecha: Optional[date] = None
+    Cliente: Optional[str] = None
+    Building: Optional[str] = None
+    Proveedor: Optional[str] = None
+    CveSol: Optional[str] = None
+    approve: Optional[int] = Field(None, description="NULL=Pendiente, 0=Requiere correcciones, 1=Aprobado, 2=Rechazado definitivo")
+
+
+class CafSolicitudListResponse(BaseModel):
+    """Página del listado de solicitudes"""
+    items: List[CafSolicitudListItem]
+    next_cursor: Optional[int] = Field(None, description="Enviar como cursor para pedir la siguiente página; NULL si no hay más")
+
+
 class SolicitudStatusInfo(BaseModel):
     """Información del estado de una solicitud"""
     approve: Optional[int] = Field(None, description="NULL=Pendiente, 0=Requiere correcciones, 1=Aprobado, 2=Rechazado definitivo")
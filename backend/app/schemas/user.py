@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 
 
 class User(BaseModel):
@@ -14,4 +14,16 @@ class User(BaseModel):
 class UserListResponse(BaseModel):
     """Respuesta al listar usuarios"""
     total: int
-    users: List[User]
\ No newline at end of file
+    users: List[User]
+    # Solo en búsquedas paginadas: cursor para pedir la siguiente página
+    next_cursor: Optional[str] = None
+
+
+class UserLookupRequest(BaseModel):
+    """Emails a resolver en una sola llamada"""
+    emails: List[str] = Field(..., min_length=1, max_length=100)
+
+
+class UserLookupResponse(BaseModel):
+    """Usuarios por email (en minúsculas); null si no existe o el dominio no está permitido"""
+    users: Dict[str, Optional[User]]
@@ -0,0 +1,117 @@
+"""
+Caché en memoria del catálogo de edificios para el select del frontend.
+
+El catálogo cambia pocas veces al mes: se guarda la lista ya formateada con su
+ETag y se revalida con una consulta de huella (conteo/min/max) cada pocos
+segundos en lugar de volver a leer la tabla completa. Pasado el TTL se recarga
+aunque la huella no haya cambiado (ej. renombres).
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.responses import dumps
+from app.repositories.building_repository import BuildingRepository
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogEntry:
+    """Versión cacheada del catálogo."""
+    __slots__ = ("options", "body", "etag", "fingerprint", "loaded_at")
+
+    def __init__(self, options: List[Dict[str, str]], fingerprint: tuple):
+        self.options = options
+        self.fingerprint = fingerprint
+        self.loaded_at = time.monotonic()
+        # JSON serializado una sola vez por versión: se envía tal cual y de él sale el ETag.
+        # ETag débil: identifica el contenido, no los bytes enviados (el middleware puede comprimirlos)
+        self.body = dumps(options)
+        self.etag = f'W/"{hashlib.sha1(self.body).hexdigest()}"'
+
+
+class BuildingCatalog:
+    """Catálogo de edificios con TTL y revalidación por huella."""
+
+    def __init__(self, ttl_seconds: float = 3600, probe_interval_seconds: float = 60):
+        """
+        Args:
+            ttl_seconds: Antigüedad máxima antes de recargar la lista completa
+            probe_interval_seconds: Intervalo mínimo entre consultas de huella
+        """
+        self.ttl_seconds = ttl_seconds
+        self.probe_interval_seconds = probe_interval_seconds
+        self._entry: Optional[CatalogEntry] = None
+        self._last_probe = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> CatalogEntry:
+        """Retorna el catálogo vigente, recargándolo solo si expiró o cambió la huella."""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entry
+            if entry is None or now - entry.loaded_at >= self.ttl_seconds:
+                return self._load(db)
+
+            if now - self._last_probe >= self.probe_interval_seconds:
+                # También tras un fallo: no reintentar en cada request mientras la BD no responde
+                self._last_probe = now
+                try:
+                    fingerprint = BuildingRepository(db).get_fingerprint()
+                except Exception as e:
+                    # La BD no responde: se sirve la versión cacheada
+                    logger.warning(f"No se pudo revalidar el catálogo de edificios: {str(e)}")
+                    return entry
+                if fingerprint != entry.fingerprint:
+                    logger.info("Catálogo de edificios modificado, recargando")
+                    return self._load(db)
+            return entry
+
+    def _load(self, db: Session) -> CatalogEntry:
+        repo = BuildingRepository(db)
+        fingerprint = repo.get_fingerprint()
+        options = repo.get_select_options()
+        self._entry = CatalogEntry(options, fingerprint)
+        self._last_probe = self._entry.loaded_at
+        logger.info(f"Catálogo de edificios cargado: {len(options)} edificios activos")
+        return self._entry
+
+    def invalidate(self) -> None:
+        """Descarta la versión cacheada; la siguiente lectura recarga desde la BD."""
+        with self._lock:
+            self._entry = None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evalúa el header If-None-Match (lista de ETags o '*') contra el ETag actual.
+    Comparación débil (RFC 9110): se ignora el prefijo W/ de ambos lados.
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    etag = etag.removeprefix("W/")
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+# Singleton global del catálogo
+_building_catalog_instance = None
+
+def get_building_catalog() -> BuildingCatalog:
+    """
+    Obtiene la instancia singleton del catálogo de edificios.
+    Returns:
+        BuildingCatalog: Instancia única del catálogo
+    """
+    global _building_catalog_instance
+    if _building_catalog_instance is None:
+        _building_catalog_instance = BuildingCatalog(
+            ttl_seconds=settings.BUILDING_CATALOG_TTL_SECONDS,
+            probe_interval_seconds=settings.BUILDING_CATALOG_PROBE_SECONDS
+        )
+    return _building_catalog_instance
@@ -0,0 +1,145 @@
+"""
+Exportación de solicitudes CAF (TBL_CAF_Solicitud) a CSV, NDJSON o XLSX.
+
+Las filas se leen con yield_per/stream_results (el driver entrega bloques con
+fetchmany en lugar de materializar todo el resultado) y se escriben al cliente
+conforme llegan, así que la memoria no depende del tamaño de la tabla.
+Los generadores abren su propia sesión: la respuesta se sigue enviando después
+de que termina la función del endpoint.
+"""
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+from datetime import date
+from typing import Callable, Iterator, Optional
+
+from openpyxl import Workbook
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.caf_solicitud import TBL_CAF_Solicitud
+from app.repositories.caf_solicitud_repository import approve_condition
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+_COLUMNS = list(TBL_CAF_Solicitud.__table__.columns)
+_COLUMN_NAMES = [column.name for column in _COLUMNS]
+
+
+class CafExportService:
+    """Genera exportaciones en streaming de las solicitudes CAF."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, yield_per: Optional[int] = None):
+        """
+        Args:
+            session_factory: Crea la sesión que usa cada exportación
+            yield_per: Filas por bloque leído de la BD (default: CAF_EXPORT_YIELD_PER)
+        """
+        self._session_factory = session_factory
+        self.yield_per = yield_per or settings.CAF_EXPORT_YIELD_PER
+
+    @staticmethod
+    def build_query(
+        approve: Optional[str] = None,
+        building: Optional[str] = None,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+        tipo: Optional[str] = None
+    ):
+        """
+        Consulta de exportación con los filtros indicados, ordenada por id.
+        Raises:
+            ValueError: Si el estado no es válido
+        """
+        table = TBL_CAF_Solicitud.__table__
+        stmt = select(*_COLUMNS).order_by(table.c.id_solicitud)
+        if approve is not None:
+            stmt = stmt.where(approve_condition(approve))
+        if building:
+            stmt = stmt.where(table.c.Building == building)
+        if fecha_desde:
+            stmt = stmt.where(table.c.Fecha >= fecha_desde)
+        if fecha_hasta:
+            stmt = stmt.where(table.c.Fecha <= fecha_hasta)
+        if tipo:
+            stmt = stmt.where(table.c.Tipo_Contratacion == tipo)
+        return stmt
+
+    def _iter_partitions(self, stmt) -> Iterator[list]:
+        """Bloques de filas (tuplas) leídos con un cursor en streaming."""
+        db = self._session_factory()
+        try:
+            result = db.execute(stmt.execution_options(stream_results=True, yield_per=self.yield_per))
+            for partition in result.partitions():
+                yield partition
+        finally:
+            db.close()
+
+    def stream(self, stmt, export_format: str) -> Iterator[bytes]:
+        """
+        Generador con el contenido de la exportación en el formato pedido.
+        Args:
+            stmt: Consulta de build_query
+            export_format: csv, ndjson o xlsx
+        """
+        if export_format == "csv":
+            return self._stream_csv(stmt)
+        if export_format == "ndjson":
+            return self._stream_ndjson(stmt)
+        if export_format == "xlsx":
+            return self._stream_xlsx(stmt)
+        raise ValueError(f"Formato no soportado: {export_format}")
+
+    def _stream_csv(self, stmt) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM para que Excel abra el CSV como UTF-8
+        buffer.write("\ufeff")
+        writer.writerow(_COLUMN_NAMES)
+        yield buffer.getvalue().encode("utf-8")
+        for partition in self._iter_partitions(stmt):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(partition)
+            yield buffer.getvalue().encode("utf-8")
+
+    def _stream_ndjson(self, stmt) -> Iterator[bytes]:
+        for partition in self._iter_partitions(stmt):
+            yield "".join(
+                json.dumps(dict(zip(_COLUMN_NAMES, row)), default=str, ensure_ascii=False) + "\n"
+                for row in partition
+            ).encode("utf-8")
+
+    def _stream_xlsx(self, stmt, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        # XLSX es un ZIP que solo queda completo al guardarse: se escribe en modo
+        # write_only (memoria constante) a un archivo temporal y luego se envía
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Solicitudes CAF")
+        sheet.append(_COLUMN_NAMES)
+        for partition in self._iter_partitions(stmt):
+            for row in partition:
+                sheet.append(list(row))
+
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            workbook.save(path)
+            with open(path, "rb") as file:
+                while True:
+                    data = file.read(chunk_size)
+                    if not data:
+                        break
+                    yield data
+        finally:
+            os.unlink(path)
@@ -0,0 +1,181 @@
+"""
+Importación de solicitudes CAF desde libros de Excel (.xlsx).
+
+El libro se lee con openpyxl en modo read_only: las filas se recorren en
+streaming sin cargar la hoja completa, se validan por bloques con las mismas
+reglas del alta masiva y cada bloque válido se inserta con insert_rows (un
+INSERT ... OUTPUT por lote) y su propio commit. La memoria queda acotada por el
+tamaño del bloque, no por el del archivo. Las filas con errores se omiten y se
+reportan con su número de fila de Excel.
+"""
+import logging
+import re
+import unicodedata
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.caf_solicitud_service import CafSolicitudService, CAPTURE_COLUMNS, prepare_solicitud_row
+
+logger = logging.getLogger(__name__)
+
+# Errores que se conservan en el reporte (el resto solo se cuenta)
+MAX_REPORTED_ERRORS = 1000
+
+
+def _normalize_header(value) -> str:
+    """'Tipo Contratación' / 'tipo_contratacion' -> 'tipocontratacion'."""
+    text = unicodedata.normalize("NFKD", str(value or "")).lower()
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r"[^0-9a-z]", "", text)
+
+
+_COLUMNS_BY_HEADER = {_normalize_header(name): name for name in CAPTURE_COLUMNS}
+
+
+class ImportReport:
+    """Resultado de una importación."""
+
+    def __init__(self, dry_run: bool = False, max_reported_errors: int = MAX_REPORTED_ERRORS):
+        self.dry_run = dry_run
+        self.max_reported_errors = max_reported_errors
+        self.rows_read = 0
+        self.inserted = 0
+        self.failed = 0
+        self.chunks = 0
+        self.errors: List[Dict] = []
+        self.ignored_columns: List[str] = []
+
+    def add_error(self, row_number: int, errors: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_reported_errors:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def to_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "rows_read": self.rows_read,
+            "inserted": self.inserted,
+            "valid": self.rows_read - self.failed,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "ignored_columns": self.ignored_columns,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def iter_sheet_rows(source, sheet: Optional[str] = None) -> Tuple[List[str], Iterator[Tuple[int, dict]]]:
+    """
+    Abre el libro en modo read_only y recorre la hoja en streaming.
+    Args:
+        source: Ruta o archivo binario (.xlsx)
+        sheet: Nombre de la hoja (default: la hoja activa)
+    Returns:
+        tuple: (encabezados ignorados, iterador de (número de fila, {columna: valor}))
+    """
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+    except Exception:
+        workbook.close()
+        raise
+
+    mapping: Dict[int, str] = {}
+    ignored: List[str] = []
+    for position, title in enumerate(header):
+        column = _COLUMNS_BY_HEADER.get(_normalize_header(title))
+        if column and column not in mapping.values():
+            mapping[position] = column
+        elif title is not None:
+            ignored.append(str(title))
+    if not mapping:
+        workbook.close()
+        raise ValueError("La hoja no tiene encabezados que correspondan a columnas de TBL_CAF_Solicitud")
+
+    def generate():
+        try:
+            for row_number, values in enumerate(rows, start=2):
+                data = {
+                    column: values[position]
+                    for position, column in mapping.items()
+                    if position < len(values) and values[position] not in (None, "")
+                }
+                if data:
+                    yield row_number, data
+        finally:
+            # read_only mantiene el archivo abierto hasta cerrar el libro
+            workbook.close()
+
+    return ignored, generate()
+
+
+class CafImportService:
+    """Importa solicitudes CAF desde hojas de cálculo por bloques."""
+
+    def __init__(self, solicitud_service: Optional[CafSolicitudService] = None):
+        self.solicitud_service = solicitud_service or CafSolicitudService()
+
+    def import_workbook(
+        self,
+        db: Session,
+        source,
+        sheet: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        dry_run: bool = False,
+        notify: bool = False,
+        on_error: Optional[Callable[[int, List[str]], None]] = None,
+        max_reported_errors: int = MAX_REPORTED_ERRORS
+    ) -> ImportReport:
+        """
+        Importa las filas de la hoja. Cada bloque válido se confirma por separado,
+        de modo que un fallo a mitad del archivo conserva los bloques anteriores.
+
+        Args:
+            db: Sesión de base de datos
+            source: Ruta o archivo binario (.xlsx)
+            sheet: Nombre de la hoja (default: la hoja activa)
+            chunk_size: Filas por bloque (default: CAF_IMPORT_CHUNK_SIZE)
+            dry_run: Solo validar, sin insertar
+            notify: Notificar a los responsables (por defecto no: suelen ser CAFs históricos)
+            on_error: Callback por fila con errores (ej. escribir un CSV con todos los errores)
+            max_reported_errors: Errores que se conservan en el reporte
+        Returns:
+            ImportReport: Conteos y errores por fila
+        """
+        chunk_size = chunk_size or settings.CAF_IMPORT_CHUNK_SIZE
+        report = ImportReport(dry_run=dry_run, max_reported_errors=max_reported_errors)
+        report.ignored_columns, rows = iter_sheet_rows(source, sheet)
+
+        chunk: List[dict] = []
+        for row_number, data in rows:
+            report.rows_read += 1
+            row, errors = prepare_solicitud_row(data)
+            if errors:
+                report.add_error(row_number, errors)
+                if on_error:
+                    on_error(row_number, errors)
+            else:
+                chunk.append(row)
+            if len(chunk) >= chunk_size:
+                self._flush(db, chunk, report, notify)
+                chunk = []
+        if chunk:
+            self._flush(db, chunk, report, notify)
+
+        logger.info(
+            f"Importación CAF: {report.rows_read} filas, {report.inserted} insertadas, "
+            f"{report.failed} con errores{' (dry run)' if dry_run else ''}"
+        )
+        return report
+
+    def _flush(self, db: Session, chunk: List[dict], report: ImportReport, notify: bool) -> None:
+        report.chunks += 1
+        if report.dry_run:
+            return
+        ids = self.solicitud_service.insert_rows(db, chunk, notify=notify)
+        report.inserted += len(ids)
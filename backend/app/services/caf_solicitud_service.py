@@ -1,29 +1,197 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from datetime import date, datetime
+from sqlalchemy import Date, Integer, String, case, insert, literal_column, or_, select, update
+from sqlalchemy.orm import Session, load_only
 from app.models.caf_solicitud import TBL_CAF_Solicitud, SolicitudStatus
-from app.models.building import CAT_BUILDINGS
-from app.events.domain_events import SolicitudCreada, SolicitudAprobada, SolicitudRechazada, SolicitudCorreccionesRealizadas
+from app.events.domain_events import (
+    DomainEvent, SolicitudCreada, SolicitudAprobada, SolicitudRechazada, SolicitudCorreccionesRealizadas,
+    SolicitudesCreadasLote, SOLICITUD_SNAPSHOT_FIELDS
+)
 from app.events.event_dispatcher import get_event_dispatcher
+from app.events.outbox_relay import get_outbox_relay
+from app.services.building_catalog import CatalogEntry, get_building_catalog
+from app.repositories.caf_solicitud_repository import CafSolicitudRepository
+from app.repositories.outbox_repository import OutboxRepository
+from app.core.config import settings
 from typing import List, Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# approve antes del UPDATE (solo SQL Server: OUTPUT deleted.*)
+PREVIOUS_APPROVE_OUTPUT = literal_column("deleted.approve", Integer)
+
+# Columnas que se pueden capturar en el alta (id autoincremental, approve y RowVersion quedan fuera)
+CAPTURE_COLUMNS = {
+    column.name: column
+    for column in TBL_CAF_Solicitud.__table__.columns
+    if column.name not in ("id_solicitud", "approve", "RowVersion")
+}
+
+
+def parse_detail_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Columnas pedidas en `fields` (separadas por coma) para el detalle.
+    id_solicitud siempre se incluye. None = todas las columnas.
+    Raises:
+        ValueError: Si alguna columna no existe
+    """
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in TBL_CAF_Solicitud.__table__.columns]
+    if unknown:
+        raise ValueError(f"Campos no válidos: {', '.join(unknown)}")
+    if "id_solicitud" not in names:
+        names.insert(0, "id_solicitud")
+    return names
+
+
+class SolicitudConflictError(Exception):
+    """La solicitud cambió desde que el cliente la leyó (RowVersion distinto)."""
+
+    def __init__(self, solicitud_id: int, current_version: int):
+        self.solicitud_id = solicitud_id
+        self.current_version = current_version
+        super().__init__(
+            f"La solicitud #{solicitud_id} fue modificada por otro usuario (versión actual {current_version}). "
+            "Recargue la solicitud e intente de nuevo."
+        )
+
+
+class RowVersionRequiredError(ValueError):
+    """La actualización no trae el RowVersion leído con la solicitud."""
+
+    def __init__(self):
+        super().__init__("RowVersion es obligatorio: envíe la versión recibida en el detalle de la solicitud")
+
+
+class BulkValidationError(ValueError):
+    """Errores de validación del alta masiva, por índice de la solicitud."""
+    
+    def __init__(self, errors: List[Dict]):
+        super().__init__(f"{len(errors)} solicitudes con errores")
+        self.errors = errors
+
+
+def _coerce_value(column, value):
+    """Convierte el valor recibido al tipo de la columna (JSON y hojas de cálculo)."""
+    if value is None:
+        return None
+    column_type = column.type
+    if isinstance(column_type, Date):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if isinstance(value, str):
+            return date.fromisoformat(value.strip()[:10]) if value.strip() else None
+        raise ValueError("fecha inválida")
+    if isinstance(column_type, Integer):
+        if isinstance(value, str):
+            return int(value.strip()) if value.strip() else None
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError("se esperaba un entero")
+        return int(value)
+    if isinstance(column_type, String):
+        value = value if isinstance(value, str) else str(value)
+        if column_type.length and len(value) > column_type.length:
+            raise ValueError(f"excede {column_type.length} caracteres")
+        return value
+    return value
+
+
+def prepare_solicitud_row(data: dict) -> tuple:
+    """
+    Valida y convierte una solicitud para el alta masiva.
+    Returns:
+        tuple: (fila con todas las columnas capturables, lista de errores)
+    """
+    row = dict.fromkeys(CAPTURE_COLUMNS)
+    errors = []
+    for field, value in data.items():
+        if field in ("id_solicitud", "approve"):
+            # Igual que en create(): autoincremental y estado inicial NULL (pendiente)
+            continue
+        column = CAPTURE_COLUMNS.get(field)
+        if column is None:
+            errors.append(f"{field}: campo desconocido")
+            continue
+        try:
+            row[field] = _coerce_value(column, value)
+        except (TypeError, ValueError) as e:
+            errors.append(f"{field}: {str(e)}")
+    return row, errors
+
+
 class CafSolicitudService:
     def __init__(self):
         print("🏗️ Inicializando CafSolicitudService...")
         self.event_dispatcher = get_event_dispatcher()
         print(f"📡 Event dispatcher obtenido con {self.event_dispatcher.get_observers_count()} observers")
     
-    def get_detail(self, db: Session, solicitud_id: int):
-        solicitud = db.query(TBL_CAF_Solicitud).filter_by(id_solicitud=solicitud_id).first()
+    def _stage_event(self, db: Session, event: DomainEvent) -> None:
+        """
+        Registra el evento en el outbox dentro de la transacción actual,
+        de modo que se confirma (o se descarta) junto con el cambio de la solicitud.
+        """
+        if settings.OUTBOX_ENABLED:
+            OutboxRepository(db).add(event)
+    
+    def _publish_event(self, event: DomainEvent) -> None:
+        """
+        Se llama después del commit: despierta al relay del outbox para entregar
+        el evento de inmediato, o lo despacha directamente si el outbox está deshabilitado.
+        """
+        try:
+            if settings.OUTBOX_ENABLED:
+                get_outbox_relay().wake()
+            else:
+                self.event_dispatcher.dispatch(event)
+            logger.info(f"Evento {event.__class__.__name__} publicado para solicitud #{event.solicitud_id}")
+        except Exception as e:
+            logger.error(f"Error publicando evento {event.__class__.__name__}: {str(e)}")
+    
+    def get_detail(self, db: Session, solicitud_id: int, fields: Optional[List[str]] = None):
+        """
+        Solicitud por ID. Con `fields` (ver parse_detail_fields) el SELECT solo
+        trae esas columnas (load_only); el resto de atributos no se carga.
+        """
+        query = db.query(TBL_CAF_Solicitud).filter_by(id_solicitud=solicitud_id)
+        if fields:
+            query = query.options(load_only(*(getattr(TBL_CAF_Solicitud, name) for name in fields)))
+        solicitud = query.first()
         if not solicitud:
             return None
         return solicitud
     
+    def list_solicitudes(self, db: Session, limit: int = None, cursor: int = None, **filters) -> Dict:
+        """
+        Página del listado de solicitudes (más recientes primero).
+        
+        Args:
+            db: Sesión de base de datos
+            limit: Solicitudes por página (default: CAF_LIST_PAGE_SIZE, máximo CAF_LIST_MAX_PAGE_SIZE)
+            cursor: next_cursor de la página anterior (id_solicitud de su última fila)
+            **filters: approve, responsable, usuario, building, tipo, fecha_desde, fecha_hasta
+            
+        Returns:
+            {"items": [...], "next_cursor": int | None}
+            
+        Raises:
+            ValueError: Si el estado no es válido
+        """
+        limit = min(limit or settings.CAF_LIST_PAGE_SIZE, settings.CAF_LIST_MAX_PAGE_SIZE)
+        # Se pide una fila de más para saber si hay otra página sin hacer COUNT
+        items = CafSolicitudRepository(db).list_page(limit + 1, after_id=cursor, **filters)
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = items[-1]["id_solicitud"]
+        return {"items": items, "next_cursor": next_cursor}
+    
     def create(self, db: Session, data: dict) -> TBL_CAF_Solicitud:
-        # Remover id_solicitud si viene en los datos (es autoincrement)
-        data_clean = {k: v for k, v in data.items() if k != 'id_solicitud'}
+        # Remover id_solicitud si viene en los datos (es autoincrement); RowVersion inicia en 1
+        data_clean = {k: v for k, v in data.items() if k not in ('id_solicitud', 'RowVersion')}
         print(f"🧹 Datos limpiados: removido id_solicitud, campos restantes: {len(data_clean)}")
         print(f"📝 CAF payload keys: {sorted(data_clean.keys())}")
         print(f"🧾 CAF payload values: {data_clean}")
@@ -40,84 +208,225 @@ class CafSolicitudService:
         
         solicitud = TBL_CAF_Solicitud(**data_clean)
         db.add(solicitud)
+        db.flush()  # Obtener id_solicitud para el evento antes del commit
+        
+        # Evento de solicitud creada en la misma transacción (outbox)
+        event = SolicitudCreada(solicitud=solicitud)
+        self._stage_event(db, event)
+        
         db.commit()
         db.refresh(solicitud)
         
-        # Disparar evento de solicitud creada
-        try:
-            print(f"🔥 Creando evento SolicitudCreada para solicitud #{solicitud.id_solicitud}")
-            event = SolicitudCreada(solicitud=solicitud)
-            print(f"🚀 Despachando evento SolicitudCreada para solicitud #{solicitud.id_solicitud}")
-            self.event_dispatcher.dispatch(event)
-            print(f"✅ Evento SolicitudCreada disparado para solicitud #{solicitud.id_solicitud}")
-            logger.info(f"Evento SolicitudCreada disparado para solicitud #{solicitud.id_solicitud}")
-        except Exception as e:
-            print(f"❌ Error disparando evento SolicitudCreada: {str(e)}")
-            logger.error(f"Error disparando evento SolicitudCreada: {str(e)}")
+        self._publish_event(event)
         
         return solicitud
 
+    def create_bulk(self, db: Session, items: List[dict], batch_size: int = None) -> List[int]:
+        """
+        Alta masiva de solicitudes (migración de CAFs históricos o importación de hojas de cálculo).
+        
+        Valida todas las solicitudes antes de insertar (todo o nada). Las filas se
+        insertan en lotes con INSERT ... OUTPUT (insertmanyvalues), que devuelve los
+        ids generados en el mismo viaje a la BD, sin flush/refresh por fila. Se
+        genera un evento SolicitudesCreadasLote por responsable en la misma transacción.
+        
+        Args:
+            db: Sesión de base de datos
+            items: Solicitudes (mismo formato que create)
+            batch_size: Filas por INSERT (default: CAF_BULK_BATCH_SIZE)
+        Returns:
+            List[int]: IDs generados, en el mismo orden que items
+        Raises:
+            BulkValidationError: Si alguna solicitud no es válida (no se inserta ninguna)
+        """
+        rows, errors = [], []
+        for index, data in enumerate(items):
+            row, row_errors = prepare_solicitud_row(data)
+            if row_errors:
+                errors.append({"index": index, "errors": row_errors})
+            rows.append(row)
+        if errors:
+            raise BulkValidationError(errors)
+        
+        return self.insert_rows(db, rows, batch_size=batch_size)
+
+    def insert_rows(self, db: Session, rows: List[dict], batch_size: int = None, notify: bool = True) -> List[int]:
+        """
+        Inserta filas ya validadas con prepare_solicitud_row y hace commit.
+        Args:
+            db: Sesión de base de datos
+            rows: Filas con todas las columnas capturables
+            batch_size: Filas por INSERT (default: CAF_BULK_BATCH_SIZE)
+            notify: Generar un evento SolicitudesCreadasLote por responsable
+        Returns:
+            List[int]: IDs generados, en el mismo orden que rows
+        """
+        batch_size = batch_size or settings.CAF_BULK_BATCH_SIZE
+        # INSERT de Core (todas las filas con las mismas columnas, NULL explícito) para
+        # que se agrupen en un solo statement por lote; sort_by_parameter_order
+        # garantiza que los ids regresan en el orden de las filas enviadas
+        table = TBL_CAF_Solicitud.__table__
+        stmt = insert(table).returning(table.c.id_solicitud, sort_by_parameter_order=True)
+        ids: List[int] = []
+        events: List[SolicitudesCreadasLote] = []
+        try:
+            for start in range(0, len(rows), batch_size):
+                ids.extend(db.execute(stmt, rows[start:start + batch_size]).scalars().all())
+            
+            if notify:
+                # Una notificación por responsable en lugar de un correo por solicitud
+                por_responsable: Dict[Optional[str], list] = {}
+                for solicitud_id, row in zip(ids, rows):
+                    snapshot = {name: row.get(name) for name in SOLICITUD_SNAPSHOT_FIELDS}
+                    snapshot["id_solicitud"] = solicitud_id
+                    por_responsable.setdefault(row.get("Responsable"), []).append(snapshot)
+                events = [
+                    SolicitudesCreadasLote(responsable=responsable, solicitudes=solicitudes)
+                    for responsable, solicitudes in por_responsable.items()
+                ]
+                for event in events:
+                    self._stage_event(db, event)
+            
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        logger.info(f"Alta masiva: {len(ids)} solicitudes, {len(events)} notificaciones")
+        for event in events:
+            self._publish_event(event)
+        
+        return ids
+
+    @staticmethod
+    def _compare_and_set(
+        db: Session,
+        solicitud_id: int,
+        values: dict,
+        expected_version: int,
+        *conditions,
+        with_previous_approve: bool = False
+    ):
+        """
+        UPDATE ... OUTPUT inserted.* (RETURNING) que solo se aplica si RowVersion
+        coincide con expected_version (y las condiciones extra); la verificación y
+        el cambio son una sola sentencia. RowVersion siempre avanza en 1.
+        
+        Args:
+            with_previous_approve: Agregar deleted.approve al OUTPUT (solo SQL Server)
+        Returns:
+            La solicitud con los valores nuevos (sin refresh), o (solicitud, approve anterior)
+            con with_previous_approve; None si ninguna fila cumplió el WHERE
+        """
+        stmt = (
+            update(TBL_CAF_Solicitud)
+            .where(TBL_CAF_Solicitud.id_solicitud == solicitud_id, TBL_CAF_Solicitud.RowVersion == expected_version, *conditions)
+            .values(**values, RowVersion=TBL_CAF_Solicitud.RowVersion + 1)
+        )
+        if with_previous_approve:
+            stmt = stmt.returning(TBL_CAF_Solicitud, PREVIOUS_APPROVE_OUTPUT)
+        else:
+            stmt = stmt.returning(TBL_CAF_Solicitud)
+        # populate_existing: si la solicitud ya está en la sesión, se sobrescribe con el OUTPUT
+        result = db.execute(stmt, execution_options={"synchronize_session": False, "populate_existing": True})
+        return result.first() if with_previous_approve else result.scalars().first()
+    
+    @staticmethod
+    def _exists(db: Session, solicitud_id: int) -> bool:
+        return db.execute(
+            select(TBL_CAF_Solicitud.id_solicitud).where(TBL_CAF_Solicitud.id_solicitud == solicitud_id)
+        ).first() is not None
+    
+    @staticmethod
+    def _missing_or_conflict(db: Session, solicitud_id: int) -> None:
+        """
+        Tras un UPDATE condicional sin filas: None si la solicitud no existe.
+        Raises:
+            SolicitudConflictError: Si existe pero con otra versión
+        """
+        current_version = db.execute(
+            select(TBL_CAF_Solicitud.RowVersion).where(TBL_CAF_Solicitud.id_solicitud == solicitud_id)
+        ).scalar()
+        db.rollback()
+        if current_version is None:
+            return None
+        raise SolicitudConflictError(solicitud_id, current_version)
+    
+    @staticmethod
+    def _commit_returning(db: Session, solicitud: TBL_CAF_Solicitud) -> None:
+        """Commit conservando los valores del OUTPUT: la solicitud se separa de la sesión para que el commit no la expire."""
+        db.expunge(solicitud)
+        db.commit()
+
     def update(self, db: Session, solicitud_id: int, data: dict) -> TBL_CAF_Solicitud:
         """
         Actualiza una solicitud CAF existente.
         
         IMPORTANTE: Si la solicitud estaba en estado 'requiere_correcciones' (0),
         al actualizarse se resetea a NULL (pendiente) y se notifica al responsable.
-        """
-        # Buscar la solicitud existente
-        solicitud = db.query(TBL_CAF_Solicitud).filter_by(id_solicitud=solicitud_id).first()
-        if not solicitud:
-            return None
         
-        # Guardar estado anterior para detectar si estaba en correcciones
-        was_in_corrections = solicitud.approve == 0
+        data debe traer RowVersion (el leído con la solicitud); si otro usuario la
+        modificó después, no se actualiza y se lanza SolicitudConflictError.
         
-        # Actualizar campos que lleguen en data
-        for field, value in data.items():
-            if hasattr(solicitud, field):
-                setattr(solicitud, field, value)
+        En SQL Server es un solo UPDATE: CASE sobre approve resetea el estado y
+        OUTPUT deleted.approve indica si venía de correcciones. Los demás motores
+        no exponen el valor anterior, así que approve va en el WHERE (primero
+        approve = 0, luego el resto); RowVersion en ambos WHERE impide que otro
+        usuario cambie la fila entre las dos sentencias.
+        Raises:
+            RowVersionRequiredError: Si data no trae RowVersion (y la solicitud existe)
+        """
+        expected_version = data.get("RowVersion")
+        if expected_version is None:
+            if not self._exists(db, solicitud_id):
+                return None
+            raise RowVersionRequiredError()
+        # Solo columnas capturables (y approve); id_solicitud y RowVersion no se escriben
+        values = {field: value for field, value in data.items() if field in CAPTURE_COLUMNS or field == "approve"}
+        
+        # FLUJO CÍCLICO: si estaba en correcciones, resetear a pendiente
+        in_corrections = TBL_CAF_Solicitud.approve == SolicitudStatus.requiere_correcciones.value
+        if db.get_bind().dialect.name == "mssql":
+            row = self._compare_and_set(db, solicitud_id, {
+                **values,
+                "approve": case((in_corrections, None), else_=values.get("approve", TBL_CAF_Solicitud.approve)),
+                "Mode": case((in_corrections, "Normal"), else_=values.get("Mode", TBL_CAF_Solicitud.Mode)),
+            }, expected_version, with_previous_approve=True)
+            solicitud, previous_approve = row if row is not None else (None, None)
+        else:
+            previous_approve = SolicitudStatus.requiere_correcciones.value
+            solicitud = self._compare_and_set(
+                db, solicitud_id, {**values, "approve": None, "Mode": "Normal"}, expected_version, in_corrections
+            )
+            if solicitud is None:
+                previous_approve = None
+                solicitud = self._compare_and_set(
+                    db, solicitud_id, values, expected_version,
+                    or_(TBL_CAF_Solicitud.approve.is_(None), ~in_corrections)
+                )
+        if solicitud is None:
+            return self._missing_or_conflict(db, solicitud_id)
         
-        # FLUJO CÍCLICO: Si estaba en correcciones, resetear a pendiente
-        if was_in_corrections:
-            solicitud.approve = None  # Volver a estado pendiente
-            solicitud.Mode = 'Normal'  # Cambiar a modo normal
+        event = None
+        if previous_approve == SolicitudStatus.requiere_correcciones.value:
             logger.info(f"Solicitud #{solicitud_id} actualizada desde correcciones. Reseteando a pendiente.")
+            # EVENTO: notificar al responsable sobre las correcciones realizadas
+            event = SolicitudCorreccionesRealizadas(solicitud=solicitud)
+            self._stage_event(db, event)
         
-        db.commit()
-        db.refresh(solicitud)
+        self._commit_returning(db, solicitud)
         
-        # DISPARAR EVENTO: Si estaba en correcciones, notificar al responsable
-        if was_in_corrections:
-            try:
-                print(f"🔄 Solicitud #{solicitud.id_solicitud} actualizada desde correcciones")
-                event = SolicitudCorreccionesRealizadas(solicitud=solicitud)  # Evento específico para correcciones
-                print(f"🚀 Notificando al responsable sobre las correcciones realizadas")
-                self.event_dispatcher.dispatch(event)
-                print(f"✅ Responsable notificado sobre correcciones en solicitud #{solicitud.id_solicitud}")
-                logger.info(f"Responsable notificado sobre correcciones en solicitud #{solicitud.id_solicitud}")
-            except Exception as e:
-                print(f"❌ Error notificando al responsable: {str(e)}")
-                logger.error(f"Error notificando al responsable: {str(e)}")
+        if event:
+            self._publish_event(event)
         
         return solicitud
 
-    def approve_or_reject(self, db: Session, solicitud_id: int, approve_status: str, comentarios: str = None) -> TBL_CAF_Solicitud:
+    @staticmethod
+    def _approval_values(approve_status: str, comentarios: Optional[str]) -> dict:
         """
-        Aprueba, rechaza o marca para correcciones una solicitud CAF.
-        
-        Flujo de estados:
-        - NULL (pendiente) -> Estado inicial cuando se crea la solicitud
-        - 'requiere_correcciones' (0) -> Rechazado temporalmente, necesita correcciones (comentarios obligatorios)
-        - 'aprobado' (1) -> Aprobado definitivamente
-        - 'rechazado_definitivo' (2) -> Rechazado definitivamente (comentarios opcionales)
-        
-        Args:
-            db: Sesión de base de datos
-            solicitud_id: ID de la solicitud
-            approve_status: Estado ('requiere_correcciones', 'aprobado', 'rechazado_definitivo')
-            comentarios: Comentarios (obligatorios para requiere_correcciones, opcionales para rechazado_definitivo)
-        Returns:
-            TBL_CAF_Solicitud: Solicitud actualizada
+        Columnas a actualizar para el estado de aprobación.
+        Raises:
+            ValueError: Estado inválido o faltan comentarios obligatorios
         """
         # Convertir string a valor del enum
         try:
@@ -127,62 +436,98 @@ class CafSolicitudService:
             valid_statuses = [status.name for status in SolicitudStatus]
             raise ValueError(f"El estado debe ser uno de: {', '.join(valid_statuses)}")
         
-        # Buscar la solicitud existente
-        solicitud = db.query(TBL_CAF_Solicitud).filter_by(id_solicitud=solicitud_id).first()
-        if not solicitud:
-            return None
-        
         # Actualizar el estado de aprobación
-        solicitud.approve = approve_value
+        values = {"approve": approve_value}
         
         # Actualizar Mode según el estado de aprobación
         if approve_status == 'requiere_correcciones':
-            solicitud.Mode = 'Edit'  # Formulario editable para correcciones
+            values["Mode"] = 'Edit'  # Formulario editable para correcciones
         elif approve_status in ['aprobado', 'rechazado_definitivo']:
-            solicitud.Mode = 'View'  # Formulario bloqueado (solo vista)
+            values["Mode"] = 'View'  # Formulario bloqueado (solo vista)
         
         # Validación de comentarios según el estado
         if approve_status == 'requiere_correcciones':
             # Comentarios OBLIGATORIOS para correcciones
             if not comentarios or not comentarios.strip():
                 raise ValueError("Los comentarios son OBLIGATORIOS cuando se requieren correcciones")
-            solicitud.Comentarios = comentarios.strip()
+            values["Comentarios"] = comentarios.strip()
             
         elif approve_status == 'aprobado':
             # Limpiar comentarios previos si se aprueba
-            solicitud.Comentarios = None
+            values["Comentarios"] = None
             
         elif approve_status == 'rechazado_definitivo':
             # Comentarios OPCIONALES para rechazo definitivo
             if comentarios and comentarios.strip():
-                solicitud.Comentarios = comentarios.strip()
-            # Si no hay comentarios, dejar el campo como está o limpiarlo
+                values["Comentarios"] = comentarios.strip()
+            # Si no hay comentarios, dejar el campo como está
             # No forzamos comentarios en rechazo definitivo
+        return values
+
+    def approve_or_reject(
+        self,
+        db: Session,
+        solicitud_id: int,
+        approve_status: str,
+        comentarios: str = None,
+        row_version: Optional[int] = None
+    ) -> TBL_CAF_Solicitud:
+        """
+        Aprueba, rechaza o marca para correcciones una solicitud CAF.
         
-        db.commit()
-        db.refresh(solicitud)
+        Flujo de estados:
+        - NULL (pendiente) -> Estado inicial cuando se crea la solicitud
+        - 'requiere_correcciones' (0) -> Rechazado temporalmente, necesita correcciones (comentarios obligatorios)
+        - 'aprobado' (1) -> Aprobado definitivamente
+        - 'rechazado_definitivo' (2) -> Rechazado definitivamente (comentarios opcionales)
+        
+        El cambio de estado es un solo UPDATE ... OUTPUT inserted.* condicionado a
+        row_version: si otro aprobador modificó la solicitud después de leerla se
+        lanza SolicitudConflictError en lugar de sobrescribir su decisión.
         
-        # Disparar evento según el estado de aprobación
+        Args:
+            db: Sesión de base de datos
+            solicitud_id: ID de la solicitud
+            approve_status: Estado ('requiere_correcciones', 'aprobado', 'rechazado_definitivo')
+            comentarios: Comentarios (obligatorios para requiere_correcciones, opcionales para rechazado_definitivo)
+            row_version: RowVersion leído con la solicitud (obligatorio)
+        Returns:
+            TBL_CAF_Solicitud: Solicitud actualizada
+        Raises:
+            ValueError: Estado o comentarios inválidos (solo si la solicitud existe)
+            RowVersionRequiredError: Si no se envía row_version (solo si la solicitud existe)
+        """
         try:
-            if approve_status == 'aprobado':
-                event = SolicitudAprobada(
-                    solicitud=solicitud,
-                    aprobado_por="responsable@empresa.com"  # TODO: Obtener del contexto de usuario
-                )
-                self.event_dispatcher.dispatch(event)
-                logger.info(f"Evento SolicitudAprobada disparado para solicitud #{solicitud.id_solicitud}")
-                
-            elif approve_status in ['requiere_correcciones', 'rechazado_definitivo']:
-                event = SolicitudRechazada(
-                    solicitud=solicitud,
-                    rechazado_por="responsable@empresa.com",  # TODO: Obtener del contexto de usuario
-                    comentarios=comentarios or ""
-                )
-                self.event_dispatcher.dispatch(event)
-                logger.info(f"Evento SolicitudRechazada disparado para solicitud #{solicitud.id_solicitud}")
-                
-        except Exception as e:
-            logger.error(f"Error disparando evento de aprobación/rechazo: {str(e)}")
+            values = self._approval_values(approve_status, comentarios)
+            if row_version is None:
+                raise RowVersionRequiredError()
+        except ValueError:
+            # Solicitud inexistente: 404 antes que el error de validación
+            if not self._exists(db, solicitud_id):
+                return None
+            raise
+        
+        solicitud = self._compare_and_set(db, solicitud_id, values, row_version)
+        if solicitud is None:
+            return self._missing_or_conflict(db, solicitud_id)
+        
+        # Evento según el estado de aprobación, en la misma transacción (outbox)
+        if approve_status == 'aprobado':
+            event = SolicitudAprobada(
+                solicitud=solicitud,
+                aprobado_por="responsable@empresa.com"  # TODO: Obtener del contexto de usuario
+            )
+        else:
+            event = SolicitudRechazada(
+                solicitud=solicitud,
+                rechazado_por="responsable@empresa.com",  # TODO: Obtener del contexto de usuario
+                comentarios=comentarios or ""
+            )
+        self._stage_event(db, event)
+        
+        self._commit_returning(db, solicitud)
+        
+        self._publish_event(event)
         
         return solicitud
     
@@ -197,21 +542,17 @@ class CafSolicitudService:
         Returns:
             Lista de diccionarios con formato {value, label} para React Select
         """
+        entry = self.get_buildings_catalog(db)
+        return entry.options if entry else []
+    
+    def get_buildings_catalog(self, db: Session) -> Optional[CatalogEntry]:
+        """
+        Catálogo de edificios activos desde la caché en memoria (con su ETag).
+        Returns:
+            CatalogEntry, o None si no se pudo leer el catálogo
+        """
         try:
-            # Query: solo edificios activos (INACTIVE = NULL o 'N'), ordenados por nombre
-            buildings = db.query(CAT_BUILDINGS).filter(
-                or_(
-                    CAT_BUILDINGS.INACTIVE == 'N',
-                    CAT_BUILDINGS.INACTIVE == None
-                )
-            ).order_by(CAT_BUILDINGS.BLDGNAME).all()
-            
-            # Formatear para select usando el método del modelo
-            result = [building.to_select_option() for building in buildings]
-            
-            logger.info(f"Se obtuvieron {len(result)} edificios activos para select")
-            return result
-            
+            return get_building_catalog().get(db)
         except Exception as e:
             logger.error(f"Error al obtener edificios: {str(e)}")
-            return []
\ No newline at end of file
+            return None
@@ -0,0 +1,437 @@
+"""
+Snapshot en memoria del directorio de Azure AD.
+
+Mantiene la lista de usuarios del tenant en memoria y la sincroniza en segundo
+plano con Graph delta queries (/users/delta + deltaLink), de modo que /users
+se sirve desde memoria en lugar de recorrer todo el directorio en cada llamada.
+
+Con un alcance (DirectoryScope) la sincronización completa pide a Graph solo los
+usuarios que cumplen el $filter del servidor y el snapshot guarda únicamente
+los usuarios dentro del alcance.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.graph_client import get_graph_client
+
+logger = logging.getLogger(__name__)
+
+GRAPH_USERS_URL = "https://graph.microsoft.com/v1.0/users"
+GRAPH_USERS_DELTA_URL = "https://graph.microsoft.com/v1.0/users/delta"
+USER_SELECT_FIELDS = "id,displayName,mail,userPrincipalName,jobTitle,department"
+# Propiedades necesarias para evaluar el alcance de un usuario
+SCOPE_FIELDS = ("mail", "userPrincipalName", "jobTitle", "department")
+# Espera máxima antes de reintentar cuando no se pudo obtener el alcance
+SCOPE_RETRY_SECONDS = 30
+
+
+class DeltaLinkExpiredError(Exception):
+    """El deltaLink ya no es válido (HTTP 410) y se requiere una sincronización completa."""
+
+
+class DirectoryScope:
+    """
+    Subconjunto del directorio que se mantiene en memoria.
+    - server_filter: $filter de Graph (consulta avanzada) o None si Graph no puede expresarlo
+    - matches: evalúa un usuario completo del lado del cliente
+    - may_match: descarta cambios parciales de delta sin descargar el usuario completo
+    """
+    __slots__ = ("server_filter", "matches", "may_match", "key")
+
+    def __init__(
+        self,
+        server_filter: Optional[str],
+        matches: Callable[[dict], bool],
+        may_match: Optional[Callable[[dict], bool]] = None,
+        key: Hashable = None
+    ):
+        self.server_filter = server_filter
+        self.matches = matches
+        self.may_match = may_match or (lambda partial: True)
+        self.key = key if key is not None else server_filter
+
+
+class DirectorySnapshot:
+    """
+    Copia en memoria de los usuarios del directorio, indexada por id.
+
+    - La primera sincronización recorre /users/delta completo y guarda el deltaLink.
+    - Las siguientes solo descargan los cambios (altas, modificaciones y bajas).
+    - Las vistas derivadas (ej. lista filtrada por elegibilidad) se cachean por
+      versión del snapshot y se recalculan solo cuando el directorio cambia.
+    """
+
+    def __init__(self, max_staleness_seconds: int, refresh_interval_seconds: int):
+        """
+        Args:
+            max_staleness_seconds: Antigüedad máxima permitida antes de forzar una
+                                   sincronización en la propia petición
+            refresh_interval_seconds: Intervalo de sincronización en segundo plano
+        """
+        self.max_staleness_seconds = max_staleness_seconds
+        self.refresh_interval_seconds = refresh_interval_seconds
+
+        self._users: Dict[str, dict] = {}
+        self._delta_link: Optional[str] = None
+        self._version = 0
+        self._last_sync: Optional[float] = None
+        self._last_sync_utc: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+        self._views: Dict[Hashable, Tuple[int, list]] = {}
+        # Índice email (mail/UPN en minúsculas) -> usuario, por versión del snapshot
+        self._email_index: Optional[Tuple[int, Dict[str, dict]]] = None
+        self._scope: Optional[DirectoryScope] = None
+        # Se incrementa en cada cambio de alcance; una sincronización iniciada con
+        # otro alcance descarta su resultado
+        self._scope_generation = 0
+        self._scope_provider: Optional[Callable[[], DirectoryScope]] = None
+        self._last_sync_stats: Dict[str, int] = {}
+
+        self._state_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Acceso a Graph
+    # ------------------------------------------------------------------
+    def _get_page(self, url: str, params: Optional[dict], headers: Optional[dict] = None) -> dict:
+        """Descarga una página de Graph, renovando el token si expiró."""
+        response = get_graph_client().get(url, params=params, headers=headers)
+
+        if response.status_code == 410:
+            raise DeltaLinkExpiredError(response.text)
+        if response.status_code != 200:
+            raise Exception(f"Error al sincronizar directorio: {response.status_code} - {response.text}")
+        self._last_sync_stats["pages"] = self._last_sync_stats.get("pages", 0) + 1
+        self._last_sync_stats["bytes"] = self._last_sync_stats.get("bytes", 0) + len(response.content)
+        return response.json()
+
+    def _iter_pages(self, url: str, params: Optional[dict], headers: Optional[dict] = None) -> List[dict]:
+        """Recorre todas las páginas (@odata.nextLink) de una consulta de /users."""
+        users: List[dict] = []
+        while url:
+            data = self._get_page(url, params, headers)
+            users.extend(data.get("value", []))
+            params = None
+            url = data.get("@odata.nextLink")
+        return users
+
+    def _fetch_user(self, user_id: str) -> Optional[dict]:
+        """Descarga un usuario completo (cuando delta solo trae propiedades parciales)."""
+        try:
+            return self._get_page(f"{GRAPH_USERS_URL}/{user_id}", {"$select": USER_SELECT_FIELDS})
+        except DeltaLinkExpiredError:
+            raise
+        except Exception as e:
+            logger.warning(f"No se pudo obtener el usuario {user_id}: {str(e)}")
+            return None
+
+    def _iter_delta(self, url: str, params: Optional[dict]) -> Tuple[List[dict], str]:
+        """
+        Recorre todas las páginas de una ronda delta.
+        Returns:
+            (cambios, deltaLink para la siguiente ronda)
+        """
+        changes: List[dict] = []
+        while True:
+            data = self._get_page(url, params)
+            changes.extend(data.get("value", []))
+            params = None
+            if data.get("@odata.nextLink"):
+                url = data["@odata.nextLink"]
+            elif data.get("@odata.deltaLink"):
+                return changes, data["@odata.deltaLink"]
+            else:
+                raise Exception("Respuesta delta sin nextLink ni deltaLink")
+
+    # ------------------------------------------------------------------
+    # Sincronización
+    # ------------------------------------------------------------------
+    def refresh(self, full: bool = False) -> dict:
+        """
+        Sincroniza el snapshot con Graph.
+        Args:
+            full: True para descartar el deltaLink y descargar el directorio completo
+        Returns:
+            dict: Estado del snapshot después de sincronizar
+        """
+        with self._sync_lock:
+            self._last_sync_stats = {}
+            try:
+                if full or self._delta_link is None:
+                    self._full_sync()
+                else:
+                    try:
+                        self._incremental_sync()
+                    except DeltaLinkExpiredError:
+                        logger.warning("deltaLink expirado, se realiza sincronización completa del directorio")
+                        self._full_sync()
+                self._last_error = None
+            except Exception as e:
+                self._last_error = str(e)
+                raise
+        return self.status()
+
+    def _current_scope(self) -> Tuple[Optional[DirectoryScope], int]:
+        with self._state_lock:
+            return self._scope, self._scope_generation
+
+    def _full_sync(self) -> None:
+        scope, generation = self._current_scope()
+        if scope is not None and scope.server_filter:
+            # Token delta del estado actual (sin datos) antes de leer, para no perder
+            # cambios que ocurran durante la descarga filtrada
+            _, delta_link = self._iter_delta(
+                GRAPH_USERS_DELTA_URL,
+                {"$select": USER_SELECT_FIELDS, "$deltatoken": "latest"}
+            )
+            # $filter con "in" sobre department/jobTitle requiere consulta avanzada
+            changes = self._iter_pages(
+                GRAPH_USERS_URL,
+                {"$select": USER_SELECT_FIELDS, "$filter": scope.server_filter, "$count": "true", "$top": "999"},
+                headers={"ConsistencyLevel": "eventual"}
+            )
+        else:
+            changes, delta_link = self._iter_delta(GRAPH_USERS_DELTA_URL, {"$select": USER_SELECT_FIELDS})
+        users = {
+            user["id"]: self._clean(user)
+            for user in changes
+            if "@removed" not in user and (scope is None or scope.matches(user))
+        }
+        with self._state_lock:
+            if not self._commit(generation, users, delta_link):
+                return
+        logger.info(
+            f"Directorio sincronizado completo: {len(users)} usuarios "
+            f"({self._last_sync_stats.get('pages', 0)} páginas, {self._last_sync_stats.get('bytes', 0)} bytes)"
+        )
+
+    def _incremental_sync(self) -> None:
+        scope, generation = self._current_scope()
+        changes, delta_link = self._iter_delta(self._delta_link, None)
+        with self._state_lock:
+            users = dict(self._users)
+        changed = False
+        for change in changes:
+            user_id = change.get("id")
+            if not user_id:
+                continue
+            if "@removed" in change:
+                changed |= users.pop(user_id, None) is not None
+                continue
+            # Graph puede devolver solo las propiedades modificadas
+            merged = dict(users.get(user_id, {}))
+            merged.update(self._clean(change))
+            if scope is not None and user_id not in users:
+                # Usuario fuera del snapshot: descartar sin más si lo ya conocido lo excluye
+                if not scope.may_match(merged):
+                    continue
+                if any(field not in merged for field in SCOPE_FIELDS):
+                    fetched = self._fetch_user(user_id)
+                    if fetched is None:
+                        continue
+                    merged = self._clean(fetched)
+            if scope is None or scope.matches(merged):
+                users[user_id] = merged
+                changed = True
+            else:
+                # Salió del alcance (ej. cambio de departamento)
+                changed |= users.pop(user_id, None) is not None
+        with self._state_lock:
+            if not self._commit(generation, users, delta_link, changed=changed):
+                return
+        logger.info(f"Directorio sincronizado por delta: {len(changes)} cambios")
+
+    def set_scope(self, scope: Optional[DirectoryScope]) -> None:
+        """
+        Define el alcance del snapshot. Si cambia, la siguiente lectura hace una
+        sincronización completa con el nuevo filtro.
+        """
+        with self._state_lock:
+            if self._scope is None and scope is None:
+                return
+            if self._scope is not None and scope is not None and self._scope.key == scope.key:
+                return
+            self._scope = scope
+            self._scope_generation += 1
+            self._delta_link = None
+            self._last_sync = None
+        logger.info(f"Alcance del directorio actualizado: {scope.server_filter if scope else 'tenant completo'}")
+
+    def _commit(self, generation: int, users: Dict[str, dict], delta_link: str, changed: bool = True) -> bool:
+        """
+        Registra una sincronización exitosa. Debe llamarse con _state_lock tomado.
+        Returns:
+            bool: False si el alcance cambió durante la sincronización (el resultado se descarta)
+        """
+        if generation != self._scope_generation:
+            logger.info("El alcance del directorio cambió durante la sincronización, se descarta el resultado")
+            return False
+        self._users = users
+        self._delta_link = delta_link
+        self._last_sync = time.monotonic()
+        self._last_sync_utc = datetime.now(timezone.utc)
+        if changed:
+            self._version += 1
+            self._views.clear()
+            self._email_index = None
+        return True
+
+    @staticmethod
+    def _clean(user: dict) -> dict:
+        """Elimina anotaciones @odata del objeto devuelto por Graph."""
+        return {k: v for k, v in user.items() if not k.startswith("@")}
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+    def _ensure_fresh(self) -> None:
+        """Sincroniza en la petición solo si no hay datos o exceden la antigüedad máxima."""
+        if self._last_sync is None:
+            self.refresh()
+        elif self.age_seconds() > self.max_staleness_seconds:
+            try:
+                self.refresh()
+            except Exception as e:
+                # Se sirven los datos existentes aunque estén desactualizados
+                logger.error(f"No se pudo refrescar el directorio, se sirve snapshot anterior: {str(e)}")
+
+    def age_seconds(self) -> Optional[float]:
+        """Segundos desde la última sincronización exitosa."""
+        if self._last_sync is None:
+            return None
+        return time.monotonic() - self._last_sync
+
+    def get_users(self) -> List[dict]:
+        """Retorna todos los usuarios del snapshot (formato Graph)."""
+        self._ensure_fresh()
+        with self._state_lock:
+            return list(self._users.values())
+
+    def find_by_emails(self, emails: Iterable[str]) -> Dict[str, dict]:
+        """
+        Busca usuarios por email (mail o UPN, en minúsculas) sin sincronizar con Graph.
+        Solo encuentra usuarios dentro del alcance del snapshot; un email ausente
+        no significa que el usuario no exista.
+        Returns:
+            dict: email -> usuario (formato Graph) de los emails encontrados
+        """
+        with self._state_lock:
+            version = self._version
+            cached = self._email_index
+            if cached and cached[0] == version:
+                index = cached[1]
+            else:
+                index = {}
+                for user in self._users.values():
+                    for field in ("userPrincipalName", "mail"):
+                        if user.get(field):
+                            index[user[field].lower()] = user
+                self._email_index = (version, index)
+        return {email: index[email] for email in emails if email in index}
+
+    def get_view(self, key: Hashable, build: Callable[[Iterable[dict]], list]) -> list:
+        """
+        Retorna una vista derivada del snapshot, cacheada hasta que el directorio cambie.
+        Args:
+            key: Identificador de la vista (ej. reglas de elegibilidad aplicadas)
+            build: Función que recibe los usuarios y construye la vista
+        Returns:
+            list: Vista cacheada (no debe modificarse)
+        """
+        self._ensure_fresh()
+        with self._state_lock:
+            version = self._version
+            cached = self._views.get(key)
+            if cached and cached[0] == version:
+                return cached[1]
+            users = list(self._users.values())
+
+        view = build(users)
+        with self._state_lock:
+            if self._version == version:
+                self._views[key] = (version, view)
+        return view
+
+    def status(self) -> dict:
+        """Estado del snapshot para monitoreo."""
+        age = self.age_seconds()
+        return {
+            "users": len(self._users),
+            "version": self._version,
+            "last_sync_utc": self._last_sync_utc.isoformat() if self._last_sync_utc else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "max_staleness_seconds": self.max_staleness_seconds,
+            "has_delta_link": self._delta_link is not None,
+            "scope_filter": self._scope.server_filter if self._scope else None,
+            "last_sync_pages": self._last_sync_stats.get("pages", 0),
+            "last_sync_bytes": self._last_sync_stats.get("bytes", 0),
+            "background_sync": bool(self._thread and self._thread.is_alive()),
+            "last_error": self._last_error,
+        }
+
+    # ------------------------------------------------------------------
+    # Sincronización en segundo plano
+    # ------------------------------------------------------------------
+    def start(self, scope_provider: Optional[Callable[[], DirectoryScope]] = None) -> None:
+        """
+        Inicia el hilo de sincronización en segundo plano.
+        Args:
+            scope_provider: Función que retorna el alcance vigente; se consulta antes de cada sincronización
+        """
+        self._scope_provider = scope_provider
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="directory-snapshot", daemon=True)
+        self._thread.start()
+        logger.info(f"Sincronización de directorio iniciada cada {self.refresh_interval_seconds}s")
+
+    def stop(self) -> None:
+        """Detiene el hilo de sincronización en segundo plano."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            if self._scope_provider is not None:
+                try:
+                    self.set_scope(self._scope_provider())
+                except Exception as e:
+                    # Sin reglas disponibles se conserva el alcance anterior; si aún no hay
+                    # alcance no se sincroniza (se descargaría el tenant completo)
+                    logger.error(f"No se pudo obtener el alcance del directorio: {str(e)}")
+                    if self._scope is None:
+                        self._stop_event.wait(min(self.refresh_interval_seconds, SCOPE_RETRY_SECONDS))
+                        continue
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error sincronizando directorio en segundo plano: {str(e)}")
+            self._stop_event.wait(self.refresh_interval_seconds)
+
+
+# Singleton global del snapshot de directorio
+_directory_snapshot_instance = None
+
+def get_directory_snapshot() -> DirectorySnapshot:
+    """
+    Obtiene la instancia singleton del snapshot de directorio.
+    Returns:
+        DirectorySnapshot: Instancia única del snapshot
+    """
+    global _directory_snapshot_instance
+    if _directory_snapshot_instance is None:
+        _directory_snapshot_instance = DirectorySnapshot(
+            max_staleness_seconds=settings.DIRECTORY_SNAPSHOT_MAX_STALENESS_SECONDS,
+            refresh_interval_seconds=settings.DIRECTORY_SNAPSHOT_REFRESH_SECONDS
+        )
+        logger.info("DirectorySnapshot singleton inicializado")
+    return _directory_snapshot_instance
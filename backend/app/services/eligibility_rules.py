@@ -0,0 +1,217 @@
+"""
+Reglas de elegibilidad de usuarios (CAT_Elegibilidad_Usuario) cacheadas a nivel proceso.
+
+La tabla casi nunca cambia: se carga en una sola consulta, se guarda con TTL y
+se precalculan las estructuras que usan los filtros de usuarios (tupla de
+dominios para endswith, sets de departamentos/puestos y prioridad por departamento).
+Tras editar la tabla se puede forzar la recarga con invalidate_eligibility_rules().
+"""
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.repositories.elegibilidad_repository import ElegibilidadRepository
+from app.services.directory_snapshot import DirectoryScope
+
+logger = logging.getLogger(__name__)
+
+# Prioridad de los usuarios cuyo departamento no está en las reglas
+SIN_PRIORIDAD = 999
+# Graph limita el número de valores por operador "in"; con más valores la regla se evalúa en el cliente
+GRAPH_FILTER_MAX_IN_VALUES = 15
+
+
+def _odata_in(field: str, values) -> str:
+    # Literales OData: la comilla simple se escapa duplicándola
+    quoted = ",".join("'" + value.replace("'", "''") + "'" for value in values)
+    return f"{field} in ({quoted})"
+
+
+class EligibilityRules:
+    """Conjunto inmutable de reglas activas con sus estructuras de búsqueda."""
+    __slots__ = (
+        "dominios", "departamentos", "puestos", "departamentos_set", "puestos_set",
+        "_priority", "key", "matcher", "directory_scope"
+    )
+
+    def __init__(self, dominios, departamentos, puestos):
+        # Los dominios de correo no distinguen mayúsculas: se comparan en minúsculas
+        self.dominios = tuple(dominio.lower() for dominio in dominios)
+        self.departamentos = tuple(departamentos)
+        self.puestos = tuple(puestos)
+        self.departamentos_set = frozenset(self.departamentos)
+        self.puestos_set = frozenset(self.puestos)
+        # Primera aparición = mayor prioridad (las reglas vienen ordenadas por Prioridad)
+        self._priority: Dict[str, int] = {}
+        for index, departamento in enumerate(self.departamentos):
+            self._priority.setdefault(departamento, index)
+        # Identifica esta versión de las reglas (llave de vistas cacheadas)
+        self.key = (self.dominios, self.departamentos, self.puestos)
+        self.matcher = EligibilityMatcher(self)
+        self.directory_scope = DirectoryScope(
+            server_filter=self.graph_filter(),
+            matches=self.matcher.matches,
+            may_match=self.matcher.may_match,
+            key=self.key
+        )
+
+    @classmethod
+    def from_repository(cls, repo: ElegibilidadRepository) -> "EligibilityRules":
+        reglas = repo.get_reglas()
+        return cls(reglas["dominio"], reglas["departamento"], reglas["puesto"])
+
+    def domain_allowed(self, email: Optional[str]) -> bool:
+        """True si el correo termina en alguno de los dominios permitidos."""
+        return bool(email) and email.lower().endswith(self.dominios)
+
+    def department_priority(self, department: Optional[str]) -> int:
+        """Departamentos al inicio de la lista tienen mayor prioridad (menor número)."""
+        return self._priority.get(department, SIN_PRIORIDAD)
+
+    def graph_filter(self) -> Optional[str]:
+        """
+        $filter de Graph con las reglas que el servidor puede evaluar (department/jobTitle con "in").
+        Los dominios (sufijos de mail/UPN) siempre se filtran en el cliente.
+        Returns:
+            str, o None si ninguna regla puede enviarse a Graph
+        """
+        clauses = [
+            _odata_in(field, values)
+            # dict.fromkeys quita duplicados conservando el orden (filtro estable entre recargas)
+            for field, values in (("department", dict.fromkeys(self.departamentos)), ("jobTitle", dict.fromkeys(self.puestos)))
+            if 0 < len(values) <= GRAPH_FILTER_MAX_IN_VALUES
+        ]
+        return " and ".join(clauses) if clauses else None
+
+
+class EligibilityMatcher:
+    """
+    Filtro de usuarios compilado una vez por conjunto de reglas.
+    Evalúa cada usuario en una sola pasada, empezando por las comprobaciones más
+    baratas y selectivas (departamento -> prioridad en un dict, puesto en un
+    frozenset) y dejando al final el endswith de dominios (una sola llamada con
+    la tupla de sufijos, en minúsculas) sobre mail/UPN.
+    """
+    __slots__ = ("_priority", "_puestos", "_dominios")
+
+    def __init__(self, rules: EligibilityRules):
+        self._priority = rules._priority
+        self._puestos = rules.puestos_set
+        self._dominios = rules.dominios
+
+    def matches(self, user: dict) -> bool:
+        """True si el usuario cumple departamento, puesto y dominio."""
+        get = user.get
+        if get("department") not in self._priority or get("jobTitle") not in self._puestos:
+            return False
+        mail, upn = get("mail"), get("userPrincipalName")
+        return bool((mail and mail.lower().endswith(self._dominios)) or (upn and upn.lower().endswith(self._dominios)))
+
+    def may_match(self, partial: dict) -> bool:
+        """
+        Evalúa un usuario con propiedades parciales (cambio de delta).
+        False solo si alguna propiedad presente ya lo excluye.
+        """
+        if "department" in partial and partial["department"] not in self._priority:
+            return False
+        if "jobTitle" in partial and partial["jobTitle"] not in self._puestos:
+            return False
+        if "mail" in partial and "userPrincipalName" in partial:
+            mail, upn = partial["mail"], partial["userPrincipalName"]
+            return bool((mail and mail.lower().endswith(self._dominios)) or (upn and upn.lower().endswith(self._dominios)))
+        return True
+
+    def rank(self, users: Iterable[dict], max_results: Optional[int] = None) -> List[dict]:
+        """
+        Usuarios elegibles ordenados por prioridad de departamento y luego por nombre.
+        Args:
+            users: Usuarios de Graph
+            max_results: Máximo a retornar (None o 0 = todos)
+        """
+        priority = self._priority
+        puestos = self._puestos
+        dominios = self._dominios
+        ranked = []
+        for index, user in enumerate(users):
+            get = user.get
+            department_priority = priority.get(get("department"))
+            if department_priority is None or get("jobTitle") not in puestos:
+                continue
+            mail = get("mail")
+            if not (mail and mail.lower().endswith(dominios)):
+                upn = get("userPrincipalName")
+                if not (upn and upn.lower().endswith(dominios)):
+                    continue
+            # index desempata igual que el sort estable original (nunca se comparan los dicts)
+            ranked.append((department_priority, (get("displayName") or "").lower(), index, user))
+
+        if max_results and max_results < len(ranked):
+            ranked = heapq.nsmallest(max_results, ranked)
+        else:
+            ranked.sort()
+        return [entry[3] for entry in ranked]
+
+
+class EligibilityRulesCache:
+    """Caché con TTL de las reglas de elegibilidad."""
+
+    def __init__(self, ttl_seconds: float = 600):
+        self.ttl_seconds = ttl_seconds
+        self._rules: Optional[EligibilityRules] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, repo: ElegibilidadRepository) -> EligibilityRules:
+        """
+        Retorna las reglas vigentes; solo consulta la BD si no hay reglas o expiró el TTL.
+        Si la recarga falla se siguen usando las reglas anteriores.
+        """
+        rules = self._rules
+        if rules is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return rules
+
+        with self._lock:
+            # Otro hilo pudo recargar mientras se esperaba el lock
+            if self._rules is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return self._rules
+            try:
+                self._rules = EligibilityRules.from_repository(repo)
+            except Exception as e:
+                if self._rules is None:
+                    raise
+                logger.warning(f"No se pudieron recargar las reglas de elegibilidad, se usan las anteriores: {str(e)}")
+                return self._rules
+            self._loaded_at = time.monotonic()
+            logger.info(
+                f"Reglas de elegibilidad cargadas: {len(self._rules.dominios)} dominios, "
+                f"{len(self._rules.departamentos)} departamentos, {len(self._rules.puestos)} puestos"
+            )
+            return self._rules
+
+    def invalidate(self) -> None:
+        """Descarta las reglas cacheadas; la siguiente lectura las recarga de la BD."""
+        with self._lock:
+            self._rules = None
+
+
+# Singleton global de la caché de reglas
+_eligibility_rules_cache = None
+
+def get_eligibility_rules_cache() -> EligibilityRulesCache:
+    """
+    Obtiene la instancia singleton de la caché de reglas de elegibilidad.
+    Returns:
+        EligibilityRulesCache: Instancia única de la caché
+    """
+    global _eligibility_rules_cache
+    if _eligibility_rules_cache is None:
+        _eligibility_rules_cache = EligibilityRulesCache(ttl_seconds=settings.ELIGIBILITY_RULES_TTL_SECONDS)
+    return _eligibility_rules_cache
+
+
+def invalidate_eligibility_rules() -> None:
+    """Hook para forzar la recarga tras modificar CAT_Elegibilidad_Usuario."""
+    get_eligibility_rules_cache().invalidate()
@@ -1,11 +1,18 @@
 import os
-import json
 import mimetypes
 import base64
-import requests
-from app.core.config import settings
- # ⭐ FIX: Importar settings al inicio del método
 from app.core.config import settings
+from app.core.graph_auth import get_graph_token_provider
+from app.core.graph_client import get_graph_client
+
+# Mapeo de tipos a rutas del frontend (usando nombres completos)
+TIPO_ROUTES = {
+    'Contrato de Obra': 'formato-co',
+    'Orden de Servicio': 'solicitud-caf',
+    'Orden de Cambio': 'formato-oc', 
+    'Pago a Dependencia': 'formato-pd',
+    'Firma de Documento': 'formato-fd'
+}
 
 class EmailService:
     """
@@ -19,25 +26,18 @@ class EmailService:
         self.tenant_id = settings.GRAPH_CONFIG["tenant_id"]
         self.authority = settings.GRAPH_CONFIG["authority"]
         self.scope = settings.GRAPH_CONFIG["scope"]
-        self.token = None
+
+    @property
+    def token_provider(self):
+        """Proveedor de tokens compartido con el resto de servicios de Graph."""
+        return get_graph_token_provider(settings.GRAPH_CONFIG)
 
     def get_access_token(self):
         """
-        Obtiene el token de acceso para Graph API usando MSAL.
-        Reutiliza la configuración de SharePoint.
+        Obtiene el token de acceso para Graph API.
+        El token se comparte a nivel proceso y se renueva antes de expirar.
         """
-        import msal
-        app = msal.ConfidentialClientApplication(
-            self.client_id,
-            authority=self.authority,
-            client_credential=self.client_secret
-        )
-        result = app.acquire_token_for_client(scopes=self.scope)
-        if "access_token" in result:
-            self.token = result["access_token"]
-            return self.token
-        else:
-            raise Exception(f"Error al obtener token de Graph: {result.get('error_description')}")
+        return self.token_provider.get_token()
 
     def send_mail(self, sender, to, subject, body_html, attachment_path=None, extra_cc=None):
         """
@@ -60,14 +60,8 @@ class EmailService:
             for email in extra_cc:
                 if email and email not in cc_emails and email != to:
                     cc_emails.append(email)
-        if not self.token:
-            self.get_access_token()
 
         url = f"https://graph.microsoft.com/v1.0/users/{sender}/sendMail"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
 
         message = {
             "message": {
@@ -103,14 +97,8 @@ class EmailService:
             }
             message["message"]["attachments"] = [attachment]
 
-        resp = requests.post(url, headers=headers, data=json.dumps(message))
-        
-        # Si el token expiró (401), renovarlo y reintentar UNA vez
-        if resp.status_code == 401:
-            print("⚠️ Token expirado, renovando y reintentando...")
-            self.get_access_token()
-            headers["Authorization"] = f"Bearer {self.token}"
-            resp = requests.post(url, headers=headers, data=json.dumps(message))
+        # Conexión reutilizada del pool; si el token expiró (401) se renueva y reintenta UNA vez
+        resp = get_graph_client().post(url, json=message)
         
         if resp.status_code == 202:
             return {"status": "success", "message": "Correo enviado correctamente"}
@@ -131,16 +119,7 @@ class EmailService:
         Returns:
             dict: Resultado del envío
         """
-        # Mapeo de tipos a rutas del frontend (usando nombres completos)
-        tipo_routes = {
-            'Contrato de Obra': 'formato-co',
-            'Orden de Servicio': 'solicitud-caf',
-            'Orden de Cambio': 'formato-oc', 
-            'Pago a Dependencia': 'formato-pd',
-            'Firma de Documento': 'formato-fd'
-        }
-        
-        route = tipo_routes.get(tipo_contratacion, 'solicitud-caf')
+        route = TIPO_ROUTES.get(tipo_contratacion, 'solicitud-caf')
         approval_url = f"{frontend_base_url}/#/{route}/{solicitud_id}"
         
         # Personalizar mensaje según el contexto
@@ -198,6 +177,56 @@ class EmailService:
         
         return self.send_mail(sender_email, to_email, subject, body_html, extra_cc=extra_cc)
 
+    def send_caf_batch_notification(self, to_email, solicitudes, frontend_base_url):
+        """
+        Envía un solo correo al responsable con todas las solicitudes CAF creadas en un alta masiva.
+        Args:
+            to_email: Email del responsable
+            solicitudes: Lista de dicts con id_solicitud, Tipo_Contratacion, Building, Cliente, Proveedor y Usuario
+            frontend_base_url: URL base del frontend
+        Returns:
+            dict: Resultado del envío
+        """
+        subject = f"{len(solicitudes)} Nuevas Solicitudes CAF - Requieren Aprobación"
+        
+        rows_html = ""
+        for solicitud in solicitudes:
+            route = TIPO_ROUTES.get(solicitud.get("Tipo_Contratacion"), 'solicitud-caf')
+            approval_url = f"{frontend_base_url}/#/{route}/{solicitud['id_solicitud']}"
+            rows_html += f"""
+                <tr>
+                    <td style=\"padding: 6px; border-bottom: 1px solid #dee2e6;\"><a href=\"{approval_url}\">#{solicitud['id_solicitud']}</a></td>
+                    <td style=\"padding: 6px; border-bottom: 1px solid #dee2e6;\">{solicitud.get('Tipo_Contratacion') or '-'}</td>
+                    <td style=\"padding: 6px; border-bottom: 1px solid #dee2e6;\">{solicitud.get('Building') or '-'}</td>
+                    <td style=\"padding: 6px; border-bottom: 1px solid #dee2e6;\">{solicitud.get('Cliente') or '-'}</td>
+                    <td style=\"padding: 6px; border-bottom: 1px solid #dee2e6;\">{solicitud.get('Proveedor') or '-'}</td>
+                </tr>"""
+        
+        body_html = f"""
+        <div style=\"font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto;\">
+            <h2 style=\"color: #2c5aa0;\">📝 Nuevas Solicitudes CAF - Requieren Aprobación</h2>
+            <div style=\"background-color: #f8f9fa; padding: 20px; border-radius: 5px; margin: 20px 0;\">
+                <p style=\"margin-bottom: 15px;\">Se crearon {len(solicitudes)} solicitudes CAF que requieren su revisión y aprobación.</p>
+                <table style=\"width: 100%; border-collapse: collapse; font-size: 14px;\">
+                    <tr style=\"text-align: left;\">
+                        <th style=\"padding: 6px;\">ID</th>
+                        <th style=\"padding: 6px;\">Tipo</th>
+                        <th style=\"padding: 6px;\">Building</th>
+                        <th style=\"padding: 6px;\">Cliente</th>
+                        <th style=\"padding: 6px;\">Proveedor</th>
+                    </tr>{rows_html}
+                </table>
+            </div>
+            <div style=\"border-top: 1px solid #dee2e6; padding-top: 20px; margin-top: 30px; 
+                        color: #6c757d; font-size: 12px;\">
+                <p>Este correo fue generado automáticamente por el Sistema CAF.</p>
+            </div>
+        </div>
+        """
+        
+        sender_email = settings.GRAPH_CONFIG["sender_email"]
+        return self.send_mail(sender_email, to_email, subject, body_html)
+
     def send_caf_approval_result(self, to_email, solicitud_id, tipo_contratacion, approved, responsable, comentarios=None, edit_url=None, building=None, cliente=None, proveedor=None, usuario_solicitante=None):
         """
         Envía correo con el resultado de la aprobación/rechazo.
@@ -0,0 +1,132 @@
+"""
+Índice de búsqueda en memoria sobre los usuarios elegibles del directorio.
+
+Se construye una vez por versión del snapshot (vista cacheada) y atiende las
+búsquedas type-ahead de /users sin recorrer la lista completa:
+- tokens de display_name y email (minúsculas y sin acentos) en una lista
+  ordenada, de modo que un prefijo se resuelve con bisect;
+- índice por departamento;
+- cursores opacos con la llave de orden del último usuario entregado
+  (prioridad de departamento, nombre, id), válidos aunque el índice se reconstruya.
+"""
+import base64
+import bisect
+import json
+import re
+import unicodedata
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+class InvalidCursorError(ValueError):
+    """El cursor de paginación no es válido."""
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Minúsculas y sin acentos (José -> jose)."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Separa un texto en tokens alfanuméricos normalizados ("ana.lopez@mpa.mx" -> ana, lopez, mpa, mx)."""
+    return [token for token in _TOKEN_SPLIT.split(normalize_text(value)) if token]
+
+
+def encode_cursor(sort_key: Tuple[int, str, str]) -> str:
+    raw = json.dumps(list(sort_key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        priority, name, user_id = json.loads(raw)
+        return int(priority), str(name), str(user_id)
+    except Exception:
+        raise InvalidCursorError("Cursor de paginación inválido")
+
+
+class UserSearchIndex:
+    """Índice inmutable de usuarios normalizados (formato de UserService)."""
+
+    def __init__(self, users: List[dict], priority: Callable[[Optional[str]], int]):
+        """
+        Args:
+            users: Usuarios normalizados (id, display_name, email, job_title, department)
+            priority: Prioridad del departamento (menor = primero)
+        """
+        entries = sorted(
+            ((priority(user.get("department")), (user.get("display_name") or "").lower(), user["id"]), user)
+            for user in users
+        )
+        self._keys: List[Tuple[int, str, str]] = [entry[0] for entry in entries]
+        self._users: List[dict] = [entry[1] for entry in entries]
+
+        token_pairs = set()
+        self._by_department: Dict[str, List[int]] = {}
+        for position, user in enumerate(self._users):
+            for token in tokenize(user.get("display_name")) + tokenize(user.get("email")):
+                token_pairs.add((token, position))
+            department = normalize_text(user.get("department"))
+            if department:
+                self._by_department.setdefault(department, []).append(position)
+        ordered_pairs = sorted(token_pairs)
+        self._tokens: List[str] = [pair[0] for pair in ordered_pairs]
+        self._token_positions: List[int] = [pair[1] for pair in ordered_pairs]
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def _prefix_positions(self, prefix: str) -> Set[int]:
+        """Posiciones de los usuarios con algún token que empieza con prefix."""
+        start = bisect.bisect_left(self._tokens, prefix)
+        # "\uffff" ordena después de cualquier continuación del prefijo
+        end = bisect.bisect_right(self._tokens, prefix + "\uffff", lo=start)
+        return set(self._token_positions[start:end])
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        department: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> dict:
+        """
+        Busca usuarios cuyo nombre o email contiene tokens que empiezan con cada término de q.
+        Args:
+            q: Texto de búsqueda (cada término debe coincidir como prefijo)
+            department: Departamento exacto (sin distinguir mayúsculas/acentos)
+            limit: Máximo de usuarios por página
+            cursor: Cursor retornado por la página anterior
+        Returns:
+            dict: {"total": int, "users": List[dict], "next_cursor": str | None}
+        """
+        candidates: Optional[Set[int]] = None
+        for term in sorted(set(tokenize(q)), key=len, reverse=True):
+            # Los términos más largos son los más selectivos: se intersectan primero
+            matches = self._prefix_positions(term)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                break
+        if department is not None:
+            in_department = self._by_department.get(normalize_text(department), [])
+            candidates = set(in_department) if candidates is None else candidates.intersection(in_department)
+
+        positions = range(len(self._users)) if candidates is None else sorted(candidates)
+        start = 0
+        if cursor:
+            # Primer resultado posterior al último entregado (por llave de orden)
+            after = bisect.bisect_right(self._keys, decode_cursor(cursor))
+            start = bisect.bisect_left(positions, after)
+
+        page = positions[start:start + limit]
+        has_more = start + limit < len(positions)
+        return {
+            "total": len(positions),
+            "users": [self._users[position] for position in page],
+            "next_cursor": encode_cursor(self._keys[page[-1]]) if page and has_more else None,
+        }
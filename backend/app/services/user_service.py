@@ -1,8 +1,23 @@
-import msal
-import requests
+import logging
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote
+
 from sqlalchemy.orm import Session
+from app.core.cache import MISSING, TTLCache
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.graph_auth import get_graph_token_provider
+from app.core.graph_client import get_graph_client
 from app.repositories.elegibilidad_repository import ElegibilidadRepository
+from app.services.directory_snapshot import USER_SELECT_FIELDS, get_directory_snapshot
+from app.services.eligibility_rules import EligibilityRules, get_eligibility_rules_cache
+from app.services.user_search import UserSearchIndex
+
+logger = logging.getLogger(__name__)
+
+GRAPH_BATCH_URL = "https://graph.microsoft.com/v1.0/$batch"
+# Graph acepta como máximo 20 peticiones por $batch
+GRAPH_BATCH_MAX_REQUESTS = 20
 
 
 class UserService:
@@ -14,38 +29,15 @@ class UserService:
 
     def __init__(self, db: Session):
         self._repo = ElegibilidadRepository(db)
-        self.client_id = settings.GRAPH_CONFIG["client_id"]
-        self.client_secret = settings.GRAPH_CONFIG["client_secret"]
-        self.authority = settings.GRAPH_CONFIG["authority"]
-        self.scope = settings.GRAPH_CONFIG["scope"]
-        self.token = None
+        self._token_provider = get_graph_token_provider(settings.GRAPH_CONFIG)
 
     def get_access_token(self):
-        """Obtiene token de acceso para Graph API."""
-        app = msal.ConfidentialClientApplication(
-            self.client_id,
-            authority=self.authority,
-            client_credential=self.client_secret
-        )
-        result = app.acquire_token_for_client(scopes=self.scope)
-
-        if "access_token" in result:
-            self.token = result["access_token"]
-            return self.token
-        else:
-            raise Exception(f"Error al obtener token: {result.get('error_description')}")
+        """Obtiene token de acceso para Graph API (compartido a nivel proceso)."""
+        return self._token_provider.get_token()
 
-    def _get_department_priority(self, department: str | None, departamentos: list[str]) -> int:
-        """
-        Obtiene la prioridad de un departamento para ordenamiento.
-        Departamentos al inicio de la lista tienen mayor prioridad (menor número).
-        """
-        if not department:
-            return 999
-        try:
-            return departamentos.index(department)
-        except ValueError:
-            return 999
+    def get_rules(self) -> EligibilityRules:
+        """Reglas de elegibilidad activas (caché a nivel proceso con TTL)."""
+        return get_eligibility_rules_cache().get(self._repo)
 
     def list_users(self, max_results: int = 999):
         """
@@ -53,97 +45,91 @@ class UserService:
         departamentos y puestos definidos en CAT_Elegibilidad_Usuario.
         Ordenados por departamento (según Prioridad en BD) y luego por nombre.
 
+        Los usuarios se leen del snapshot en memoria del directorio
+        (sincronizado con Graph delta queries); la lista filtrada se cachea
+        hasta que cambian el directorio o las reglas de elegibilidad.
+
         Args:
             max_results: Número máximo de usuarios a retornar (default: 999)
 
         Returns:
             dict: {"total": int, "users": List[dict]}
         """
-        if not self.token:
-            self.get_access_token()
+        rules = self.get_rules()
+        snapshot = get_directory_snapshot()
+        # El snapshot solo descarga de Graph los usuarios dentro del alcance de las reglas
+        snapshot.set_scope(rules.directory_scope)
+
+        view_key = ("eligible_users", rules.key, max_results)
+        normalized_users = snapshot.get_view(
+            view_key,
+            lambda all_users: self._filter_users(all_users, rules, max_results)
+        )
 
-        dominios      = self._repo.get_dominios()
-        departamentos = self._repo.get_departamentos()
-        puestos       = self._repo.get_puestos()
+        return {
+            "total": len(normalized_users),
+            "users": normalized_users
+        }
 
-        url = "https://graph.microsoft.com/v1.0/users"
-        headers = {"Authorization": f"Bearer {self.token}"}
+    def search_users(
+        self,
+        q: str | None = None,
+        department: str | None = None,
+        limit: int = 50,
+        cursor: str | None = None
+    ) -> dict:
+        """
+        Búsqueda paginada de usuarios elegibles (type-ahead) sobre un índice en memoria.
+        El índice se construye una vez por versión del snapshot y de las reglas.
 
-        params = {
-            "$select": "id,displayName,mail,userPrincipalName,jobTitle,department",
-            "$orderby": "displayName",
-            "$top": 999
-        }
+        Args:
+            q: Prefijos a buscar en nombre y email
+            department: Filtrar por departamento
+            limit: Máximo de usuarios por página
+            cursor: Cursor de la página anterior (next_cursor)
 
-        all_users = []
-
-        # Paginación: iterar todas las páginas
-        while url:
-            response = requests.get(
-                url,
-                headers=headers,
-                params=params if url.startswith("https://graph.microsoft.com/v1.0/users") else None
-            )
-
-            # Renovar token si expiró
-            if response.status_code == 401:
-                self.get_access_token()
-                headers["Authorization"] = f"Bearer {self.token}"
-                response = requests.get(
-                    url,
-                    headers=headers,
-                    params=params if url.startswith("https://graph.microsoft.com/v1.0/users") else None
-                )
+        Returns:
+            dict: {"total": int, "users": List[dict], "next_cursor": str | None}
+        """
+        rules = self.get_rules()
+        snapshot = get_directory_snapshot()
+        snapshot.set_scope(rules.directory_scope)
 
-            if response.status_code == 200:
-                data = response.json()
-                all_users.extend(data.get("value", []))
-                url = data.get("@odata.nextLink")
-                params = None
-            else:
-                raise Exception(f"Error al listar usuarios: {response.status_code} - {response.text}")
-
-        # FILTRO 1: Por dominios permitidos
-        filtered_by_domain = [
-            user for user in all_users
-            if (user.get("mail") and any(user["mail"].endswith(d) for d in dominios)) or
-               (user.get("userPrincipalName") and any(user["userPrincipalName"].endswith(d) for d in dominios))
-        ]
-
-        # FILTRO 2: Por departamento Y puesto permitidos
-        filtered_users = [
-            user for user in filtered_by_domain
-            if user.get("department") in departamentos
-            and user.get("jobTitle") in puestos
-        ]
-
-        # ORDENAMIENTO: Por prioridad de departamento (según BD), luego por nombre
-        filtered_users.sort(
-            key=lambda user: (
-                self._get_department_priority(user.get("department"), departamentos),
-                user.get("displayName", "").lower()
-            )
+        index = snapshot.get_view(
+            ("user_search_index", rules.key),
+            lambda all_users: UserSearchIndex(self._filter_users(all_users, rules, 0), rules.department_priority)
         )
+        return index.search(q=q, department=department, limit=limit, cursor=cursor)
 
-        if max_results:
-            filtered_users = filtered_users[:max_results]
+    def _filter_users(self, all_users, rules: EligibilityRules, max_results: int) -> list[dict]:
+        """Aplica las reglas de elegibilidad, ordena y normaliza usuarios de Graph."""
+        # Filtro por dominio, departamento y puesto, ordenado por prioridad de
+        # departamento (según BD) y luego por nombre, con el matcher compilado de las reglas
+        filtered_users = rules.matcher.rank(all_users, max_results)
 
-        normalized_users = [
-            {
-                "id": user["id"],
-                "display_name": user.get("displayName", ""),
-                "email": user.get("mail") or user.get("userPrincipalName"),
-                "job_title": user.get("jobTitle"),
-                "department": user.get("department")
-            }
-            for user in filtered_users
-        ]
+        return [self._normalize_user(user) for user in filtered_users]
 
+    @staticmethod
+    def _normalize_user(user: dict) -> dict:
+        """Convierte un usuario de Graph al formato de la API."""
         return {
-            "total": len(normalized_users),
-            "users": normalized_users
+            "id": user["id"],
+            "display_name": user.get("displayName") or "",
+            "email": user.get("mail") or user.get("userPrincipalName"),
+            "job_title": user.get("jobTitle"),
+            "department": user.get("department")
         }
 
+    def refresh_directory(self, full: bool = False) -> dict:
+        """
+        Fuerza la sincronización del snapshot del directorio.
+        Args:
+            full: True para descargar el directorio completo en lugar del delta
+        Returns:
+            dict: Estado del snapshot
+        """
+        return get_directory_snapshot().refresh(full=full)
+
     def get_user_by_email(self, email: str):
         """
         Obtiene información de un usuario específico por email.
@@ -155,42 +141,117 @@ class UserService:
         Returns:
             dict: Información del usuario o None si no se encuentra
         """
-        if not self.token:
-            self.get_access_token()
+        return self.get_users_by_email([email]).get(email.strip().lower())
 
-        dominios = self._repo.get_dominios()
+    def get_users_by_email(self, emails: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """
+        Resuelve varios emails en una sola llamada.
+        Orden de búsqueda: caché (positiva y negativa), snapshot del directorio y,
+        para los restantes, una petición $batch a Graph (hasta 20 por lote).
+        No aplica filtros de puesto - solo verifica dominio permitido.
 
-        if not any(email.endswith(d) for d in dominios):
-            return None
+        Args:
+            emails: Emails a buscar (se comparan en minúsculas)
 
-        url = "https://graph.microsoft.com/v1.0/users"
-        headers = {"Authorization": f"Bearer {self.token}"}
+        Returns:
+            dict: email en minúsculas -> usuario, o None si no existe o el dominio no está permitido
+        """
+        rules = self.get_rules()
+        cache = get_user_lookup_cache()
+        results: Dict[str, Optional[dict]] = {}
+        pending: List[str] = []
+
+        for email in dict.fromkeys(e.strip().lower() for e in emails if e and e.strip()):
+            if not rules.domain_allowed(email):
+                results[email] = None
+                continue
+            cached = cache.get(email)
+            if cached is MISSING:
+                pending.append(email)
+            else:
+                results[email] = cached
+
+        if pending:
+            # El snapshot solo contiene usuarios elegibles: sirve para aciertos, no para descartar
+            for email, user in get_directory_snapshot().find_by_emails(pending).items():
+                results[email] = self._normalize_user(user)
+                cache.set(email, results[email])
+            pending = [email for email in pending if email not in results]
+
+        for start in range(0, len(pending), GRAPH_BATCH_MAX_REQUESTS):
+            chunk = pending[start:start + GRAPH_BATCH_MAX_REQUESTS]
+            found = self._batch_lookup(chunk)
+            for email in chunk:
+                if email not in found:
+                    # Error de Graph para este email: no se cachea
+                    results[email] = None
+                    continue
+                results[email] = found[email]
+                cache.set(
+                    email,
+                    found[email],
+                    ttl_seconds=None if found[email] else settings.USER_LOOKUP_NEGATIVE_TTL_SECONDS
+                )
 
-        params = {
-            "$filter": f"mail eq '{email}' or userPrincipalName eq '{email}'",
-            "$select": "id,displayName,mail,userPrincipalName,jobTitle,department"
-        }
+        return results
 
-        response = requests.get(url, headers=headers, params=params)
-
-        # Renovar token si expiró
-        if response.status_code == 401:
-            self.get_access_token()
-            headers["Authorization"] = f"Bearer {self.token}"
-            response = requests.get(url, headers=headers, params=params)
-
-        if response.status_code == 200:
-            data = response.json()
-            users = data.get("value", [])
-
-            if users:
-                user = users[0]
-                return {
-                    "id": user["id"],
-                    "display_name": user.get("displayName", ""),
-                    "email": user.get("mail") or user.get("userPrincipalName"),
-                    "job_title": user.get("jobTitle"),
-                    "department": user.get("department")
-                }
-
-        return None
+    def _batch_lookup(self, emails: List[str]) -> Dict[str, Optional[dict]]:
+        """
+        Busca hasta 20 emails con una sola petición $batch a Graph.
+        Returns:
+            dict: email -> usuario o None (no existe); se omiten los emails cuya petición falló
+        """
+        requests_payload = []
+        for index, email in enumerate(emails):
+            literal = email.replace("'", "''")
+            query_filter = quote(f"mail eq '{literal}' or userPrincipalName eq '{literal}'")
+            requests_payload.append({
+                "id": str(index),
+                "method": "GET",
+                "url": f"/users?$filter={query_filter}&$select={USER_SELECT_FIELDS}"
+            })
+
+        response = get_graph_client().post(GRAPH_BATCH_URL, json={"requests": requests_payload})
+        if response.status_code != 200:
+            raise Exception(f"Error al consultar usuarios en Graph: {response.status_code} - {response.text}")
+
+        found: Dict[str, Optional[dict]] = {}
+        for item in response.json().get("responses", []):
+            email = emails[int(item["id"])]
+            if item.get("status") != 200:
+                logger.warning(f"Graph respondió {item.get('status')} al buscar {email}")
+                continue
+            users = (item.get("body") or {}).get("value", [])
+            found[email] = self._normalize_user(users[0]) if users else None
+        return found
+
+
+def current_directory_scope():
+    """
+    Alcance del snapshot del directorio según las reglas de elegibilidad vigentes.
+    Se usa como scope_provider del snapshot para que la primera sincronización
+    ya descargue solo los usuarios candidatos.
+    """
+    db = SessionLocal()
+    try:
+        return get_eligibility_rules_cache().get(ElegibilidadRepository(db)).directory_scope
+    finally:
+        db.close()
+
+
+# Singleton global de la caché de búsquedas por email
+_user_lookup_cache = None
+
+def get_user_lookup_cache() -> TTLCache:
+    """
+    Obtiene la instancia singleton de la caché de usuarios por email.
+    Returns:
+        TTLCache: Caché LRU compartida (llave: email en minúsculas)
+    """
+    global _user_lookup_cache
+    if _user_lookup_cache is None:
+        _user_lookup_cache = TTLCache(
+            maxsize=settings.USER_LOOKUP_CACHE_SIZE,
+            ttl_seconds=settings.USER_LOOKUP_TTL_SECONDS
+        )
+    return _user_lookup_cache
@@ -0,0 +1,105 @@
+"""
+Benchmark de lecturas de catálogo: entidades ORM completas vs columnas proyectadas.
+
+Usa SQLite en memoria (sin red), así que mide el costo de hidratación en Python;
+contra SQL Server la diferencia crece por las columnas que dejan de transferirse.
+
+    python benchmarks/bench_catalog_queries.py --rows 10000 --repeat 20
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, or_
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.building import CAT_BUILDINGS
+from app.models.elegibilidad_usuario import CAT_Elegibilidad_Usuario
+from app.repositories.building_repository import BuildingRepository
+from app.repositories.elegibilidad_repository import ElegibilidadRepository
+
+
+def build_session(rows: int):
+    engine = create_engine("sqlite://", poolclass=StaticPool).execution_options(
+        schema_translate_map={"BD_MPA_VCAP.dbo": None, "BD_AppsHub.dbo": None}
+    )
+    Base.metadata.create_all(engine, tables=[CAT_BUILDINGS.__table__, CAT_Elegibilidad_Usuario.__table__])
+    db = sessionmaker(bind=engine)()
+    db.bulk_insert_mappings(CAT_BUILDINGS, [
+        {
+            "BLDGID": f"B{i:05d}",
+            "BLDGNAME": f"Edificio {i:05d}",
+            "CITY": "Ciudad de México",
+            "STATE": "CDMX",
+            "ADDRESS1": f"Av. Reforma {i}",
+            "ZIPCODE": "06600",
+            "INACTIVE": "Y" if i % 10 == 0 else "N",
+        }
+        for i in range(rows)
+    ])
+    db.bulk_insert_mappings(CAT_Elegibilidad_Usuario, [
+        {"Tipo_Regla": tipo, "Valor": f"{tipo}-{i}", "Activo": 1, "Prioridad": i}
+        for tipo in ("dominio", "departamento", "puesto")
+        for i in range(50)
+    ])
+    db.commit()
+    return db
+
+
+def buildings_orm(db):
+    """Ruta anterior: entidades completas + to_select_option."""
+    buildings = db.query(CAT_BUILDINGS).filter(
+        or_(CAT_BUILDINGS.INACTIVE == 'N', CAT_BUILDINGS.INACTIVE == None)
+    ).order_by(CAT_BUILDINGS.BLDGNAME).all()
+    result = [building.to_select_option() for building in buildings]
+    db.expunge_all()
+    return result
+
+
+def buildings_projected(db):
+    return BuildingRepository(db).get_select_options()
+
+
+def reglas_tres_consultas(db):
+    repo = ElegibilidadRepository(db)
+    return {"dominio": repo.get_dominios(), "departamento": repo.get_departamentos(), "puesto": repo.get_puestos()}
+
+
+def reglas_una_consulta(db):
+    return ElegibilidadRepository(db).get_reglas()
+
+
+def bench(label: str, fn, db, repeat: int) -> float:
+    best = min(timeit.repeat(lambda: fn(db), number=1, repeat=repeat)) * 1000
+    print(f"  {label:<32} {best:8.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = build_session(args.rows)
+    assert buildings_orm(db) == buildings_projected(db)
+    assert reglas_tres_consultas(db) == reglas_una_consulta(db)
+
+    print(f"Catálogo de edificios ({args.rows} filas, mejor de {args.repeat}):")
+    orm = bench("entidades ORM", buildings_orm, db, args.repeat)
+    projected = bench("columnas proyectadas", buildings_projected, db, args.repeat)
+    print(f"  -> {orm / projected:.1f}x más rápido")
+
+    print("Reglas de elegibilidad (150 filas):")
+    tres = bench("3 consultas", reglas_tres_consultas, db, args.repeat)
+    una = bench("1 consulta agrupada", reglas_una_consulta, db, args.repeat)
+    print(f"  -> {tres / una:.1f}x más rápido (sin contar la latencia de red ahorrada)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark de compresión de respuestas: bytes enviados vs tiempo de CPU.
+
+Payloads con el mismo JSON que envían los endpoints (FastJSONResponse):
+- GET /users sin filtros (directorio completo, hasta 999 usuarios)
+- GET /buildings/select (catálogo de edificios)
+- GET /caf-solicitud (una página del listado)
+
+Para cada nivel se reporta el tamaño, el tiempo de compresión y el tiempo
+total estimado (compresión + transferencia) al ancho de banda indicado.
+Brotli solo se mide si el paquete está instalado.
+
+    python benchmarks/bench_compression.py --mbps 20 --repeat 20
+"""
+import argparse
+import gzip
+import os
+import sys
+import timeit
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.responses import dumps
+from app.models.caf_solicitud import LIST_COLUMNS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def users_payload(count: int = 999) -> bytes:
+    departments = ["Operaciones", "Finanzas", "Legal", "Construcción", "Mantenimiento"]
+    return dumps({"total": count, "users": [
+        {
+            "id": f"{i:08x}-4f1c-4a7e-9d3b-{i * 7919:012x}",
+            "display_name": f"Usuario Apellido{i} Núñez",
+            "email": f"usuario.apellido{i}@mpagroup.mx",
+            "job_title": ("Gerente de Proyecto", "Analista", "Coordinador de Obra", None)[i % 4],
+            "department": departments[i % len(departments)],
+        }
+        for i in range(count)
+    ]})
+
+
+def buildings_payload(count: int = 1500) -> bytes:
+    return dumps([{"value": f"B{i:05d}", "label": f"B{i:05d}"} for i in range(count)])
+
+
+def caf_list_payload(count: int = 200) -> bytes:
+    items = []
+    for i in range(count):
+        item = dict.fromkeys(LIST_COLUMNS)
+        item.update(
+            id_solicitud=100000 - i,
+            Tipo_Contratacion=("Contrato de Obra", "Orden de Servicio", "Orden de Compra")[i % 3],
+            Responsable=f"aprobador{i % 7}@mpagroup.mx",
+            Usuario=f"usuario{i % 31}@mpagroup.mx",
+            Fecha=date(2024, 1 + i % 12, 1 + i % 28),
+            Cliente=f"Cliente {i % 40}, S.A. de C.V.",
+            Building=f"B{i % 300:05d}",
+            Proveedor=f"Proveedor {i % 90}",
+            CveSol=f"CAF-{100000 - i}",
+            approve=(None, 1, 0, 2)[i % 4],
+        )
+        items.append(item)
+    return dumps({"items": items, "next_cursor": 100000 - count + 1})
+
+
+def compressors():
+    for level in (1, 6, 9):
+        yield f"gzip {level}", lambda body, level=level: gzip.compress(body, compresslevel=level)
+    if brotli is not None:
+        for quality in (4, 11):
+            yield f"br {quality}", lambda body, quality=quality: brotli.compress(body, quality=quality)
+
+
+def bench_payload(label: str, body: bytes, mbps: float, repeat: int) -> None:
+    bytes_per_ms = mbps * 1_000_000 / 8 / 1000
+    print(f"{label} ({len(body) / 1024:.1f} KB sin comprimir, {mbps:g} Mbps):")
+    print(f"  {'codificación':<14} {'bytes':>9} {'ratio':>6} {'CPU ms':>8} {'total ms':>9}")
+    print(f"  {'identity':<14} {len(body):>9} {1:>6.1f} {0:>8.2f} {len(body) / bytes_per_ms:>9.2f}")
+    for name, compress in compressors():
+        size = len(compress(body))
+        cpu = min(timeit.repeat(lambda: compress(body), number=1, repeat=repeat)) * 1000
+        print(f"  {name:<14} {size:>9} {len(body) / size:>6.1f} {cpu:>8.2f} {cpu + size / bytes_per_ms:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mbps", type=float, default=20, help="Ancho de banda al navegador")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("(brotli no está instalado: solo gzip)\n")
+    bench_payload("GET /users", users_payload(), args.mbps, args.repeat)
+    bench_payload("GET /buildings/select", buildings_payload(), args.mbps, args.repeat)
+    bench_payload("GET /caf-solicitud (200 por página)", caf_list_payload(), args.mbps, args.repeat)
+    # Debajo de COMPRESSION_MINIMUM_SIZE la respuesta cabe en un paquete: comprimir no ahorra tiempo
+    bench_payload("Respuesta pequeña", dumps({"message": "Reglas de elegibilidad invalidadas"}), args.mbps, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark del filtro de elegibilidad de usuarios (GET /users).
+
+Mide EligibilityMatcher.rank sobre un directorio sintético con la forma de
+la respuesta de Graph, y reporta usuarios por segundo. El objetivo es
+sostener más de 200k usuarios/s con un directorio de 10k usuarios.
+
+    python benchmarks/bench_eligibility_rules.py --users 10000 --repeat 10
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.eligibility_rules import EligibilityRules
+
+
+def build_directory(size: int) -> list:
+    users = []
+    for i in range(size):
+        user = {
+            "id": str(i),
+            "displayName": f"Usuario {(i * 7919) % size:05d}",
+            "department": f"Depto {i % 40}",
+            "jobTitle": f"Puesto {i % 60}",
+        }
+        address = f"u{i}@dominio{i % 12}.mx"
+        user["mail" if i % 3 else "userPrincipalName"] = address
+        users.append(user)
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--max-results", type=int, default=999)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    users = build_directory(args.users)
+    rules = EligibilityRules(
+        [f"@dominio{i}.mx" for i in range(0, 12, 2)],
+        [f"Depto {i}" for i in range(30, 0, -1)],
+        [f"Puesto {i}" for i in range(0, 60, 3)],
+    )
+    seconds = min(timeit.repeat(lambda: rules.matcher.rank(users, args.max_results), number=1, repeat=args.repeat))
+    print(f"{args.users} usuarios: {seconds * 1000:.2f} ms ({args.users / seconds:,.0f} usuarios/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark de serialización JSON de respuestas: JSONResponse (json.dumps) vs FastJSONResponse (orjson).
+
+Payloads:
+- UserListResponse con la lista completa de /users (hasta 999 usuarios)
+- Solicitudes TBL_CAF_Solicitud (entidades ORM con todas sus columnas)
+
+Para cada uno se mide la ruta anterior (jsonable_encoder + json.dumps) y las
+rutas con orjson; solo se mide CPU de serialización, sin red ni BD.
+
+    python benchmarks/bench_json_serialization.py --users 999 --solicitudes 200 --repeat 20
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.responses import FastJSONResponse
+from app.models.caf_solicitud import TBL_CAF_Solicitud
+from app.schemas.caf_solicitud import CafSolicitudDetail
+from app.schemas.user import UserListResponse
+
+
+def build_users(count: int) -> UserListResponse:
+    return UserListResponse(total=count, users=[
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "display_name": f"Usuario Núñez {i}",
+            "email": f"usuario{i}@mpagroup.mx",
+            "job_title": "Gerente de Proyecto" if i % 3 else None,
+            "department": "Operaciones",
+        }
+        for i in range(count)
+    ])
+
+
+def build_solicitudes(count: int) -> list:
+    solicitudes = []
+    for i in range(count):
+        data = {}
+        for column in TBL_CAF_Solicitud.__table__.columns:
+            python_type = column.type.python_type
+            if python_type is date:
+                data[column.name] = date(2024, 1, 1 + i % 28)
+            elif python_type is int:
+                data[column.name] = i if column.name == "id_solicitud" else i % 2
+            else:
+                data[column.name] = f"{column.name} {i}"[:column.type.length]
+        solicitudes.append(TBL_CAF_Solicitud(**data))
+    return solicitudes
+
+
+def bench(label: str, fn, repeat: int) -> float:
+    best = min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+    print(f"  {label:<40} {best:8.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=999)
+    parser.add_argument("--solicitudes", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    users = build_users(args.users)
+    # Lo que FastAPI entrega a la clase de respuesta cuando hay response_model
+    users_content = users.model_dump(mode="json")
+    assert JSONResponse(users_content).body == FastJSONResponse(users).body
+
+    print(f"UserListResponse ({args.users} usuarios, mejor de {args.repeat}):")
+    legacy = bench("jsonable_encoder + json.dumps", lambda: JSONResponse(jsonable_encoder(users)).body, args.repeat)
+    bench("response_model + json.dumps", lambda: JSONResponse(users.model_dump(mode="json")).body, args.repeat)
+    fast = bench("modelo Pydantic directo a orjson", lambda: FastJSONResponse(users).body, args.repeat)
+    print(f"  -> {legacy / fast:.1f}x más rápido")
+
+    solicitudes = build_solicitudes(args.solicitudes)
+    print(f"TBL_CAF_Solicitud ({args.solicitudes} solicitudes, mejor de {args.repeat}):")
+    legacy = bench("jsonable_encoder + json.dumps", lambda: JSONResponse(jsonable_encoder(solicitudes)).body, args.repeat)
+    bench("jsonable_encoder + orjson", lambda: FastJSONResponse(jsonable_encoder(solicitudes)).body, args.repeat)
+    fast = bench(
+        "CafSolicitudDetail + orjson",
+        lambda: FastJSONResponse([CafSolicitudDetail.model_validate(vars(s)) for s in solicitudes]).body,
+        args.repeat
+    )
+    print(f"  -> {legacy / fast:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
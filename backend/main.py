@@ -2,10 +2,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.main import api_router
-from app.events.observer_initializer import initialize_observers
+from app.core.config import settings
+from app.core.async_db import shutdown_async_db_executor
+from app.core.compression import CompressionMiddleware
+from app.core.database import dispose_engine
+from app.core.responses import FastJSONResponse
+from app.core.graph_client import close_graph_client
+from app.events.observer_initializer import initialize_observers, start_event_dispatch, stop_event_dispatch
+from app.events.outbox_relay import ensure_outbox_available, get_outbox_relay
+from app.services.directory_snapshot import get_directory_snapshot
+from app.services.user_service import current_directory_scope
 
 
-app = FastAPI(title="NINTEX MRI CONNECTOR")
+# Todas las respuestas JSON se serializan con orjson (app/core/responses.py)
+app = FastAPI(title="NINTEX MRI CONNECTOR", default_response_class=FastJSONResponse)
 
 # Configurar CORS
 app.add_middleware(
@@ -16,6 +26,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Comprimir respuestas grandes (/users, catálogo de edificios, listados)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli=settings.COMPRESSION_BROTLI,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
 # Inicializar observers al arrancar la aplicación
 @app.on_event("startup")
 async def startup_event():
@@ -23,6 +43,28 @@ async def startup_event():
     print("🚀 Inicializando observers del sistema...")
     initialize_observers()  # Ahora usa FRONTEND_BASE_URL del .env automáticamente
     print("✅ Observers inicializados correctamente")
+    # Workers que entregan los eventos fuera de la petición (EVENT_DISPATCH_MODE=async)
+    start_event_dispatch()
+    # Relay que entrega los eventos guardados en el outbox (TBL_CAF_Outbox);
+    # si la tabla no existe se deshabilita el outbox con un error en el log
+    if ensure_outbox_available():
+        get_outbox_relay().start()
+    # Sincronización del directorio de Azure AD en segundo plano (GET /users),
+    # limitada a los usuarios que pueden cumplir las reglas de elegibilidad
+    get_directory_snapshot().start(scope_provider=current_directory_scope)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Detiene los procesos en segundo plano."""
+    # Entregar los correos pendientes antes de salir
+    if settings.OUTBOX_ENABLED:
+        get_outbox_relay().stop()
+    stop_event_dispatch()
+    get_directory_snapshot().stop()
+    close_graph_client()
+    shutdown_async_db_executor()
+    dispose_engine()
 
 # Registrar todos los routers de la API
 app.include_router(api_router, prefix="/api/v1")
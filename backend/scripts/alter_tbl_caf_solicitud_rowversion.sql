@@ -0,0 +1,36 @@
+-- ============================================================
+-- Script: alter_tbl_caf_solicitud_rowversion.sql
+-- Base de datos: definida en MASTER_DB_NAME del .env
+-- Descripción: Agrega la columna RowVersion a TBL_CAF_Solicitud
+--              (control de concurrencia optimista). El cliente debe
+--              enviar la versión que leyó; el backend solo actualiza
+--              cuando coincide y la incrementa en el mismo UPDATE:
+--                UPDATE ... SET ..., RowVersion = RowVersion + 1
+--                OUTPUT inserted.*
+--                WHERE id_solicitud = @id AND RowVersion = @version
+--              Las filas existentes quedan con RowVersion = 1.
+--              Otros procesos que actualicen la tabla deben
+--              incrementarla también.
+-- Ejecutar como: usuario con permisos DDL en MASTER_DB_NAME
+-- ============================================================
+
+-- ============================================================
+-- 1. COLUMNA
+-- ============================================================
+IF NOT EXISTS (
+    SELECT 1
+    FROM   sys.columns
+    WHERE  name = 'RowVersion'
+      AND  object_id = OBJECT_ID('dbo.TBL_CAF_Solicitud')
+)
+BEGIN
+    ALTER TABLE dbo.TBL_CAF_Solicitud
+        ADD RowVersion INT NOT NULL CONSTRAINT DF_CAF_Solicitud_RowVersion DEFAULT 1;
+
+    PRINT 'Columna RowVersion agregada correctamente.';
+END
+ELSE
+BEGIN
+    PRINT 'La columna RowVersion ya existe. Se omite la creación.';
+END
+GO
@@ -0,0 +1,90 @@
+-- ============================================================
+-- Script: create_ix_caf_solicitud_listado.sql
+-- Base de datos: definida en MASTER_DB_NAME del .env
+-- Descripción: Crea los índices del listado de solicitudes
+--              (GET /caf-solicitud). Las claves cubren los filtros
+--              frecuentes más id_solicitud (orden y keyset) y el
+--              INCLUDE trae el resto de columnas del listado, así la
+--              página se lee solo del índice, sin Key Lookup al
+--              índice clustered ni ordenamiento.
+--              Filtros por Building, Tipo_Contratacion o fechas se
+--              evalúan como predicado residual sobre estos índices.
+--              Deben coincidir con __table_args__ de
+--              app/models/caf_solicitud.py.
+-- Ejecutar como: usuario con permisos DDL en MASTER_DB_NAME
+-- ============================================================
+
+-- ============================================================
+-- 1. IX_CAF_Solicitud_Responsable_Approve
+-- Bandeja del aprobador:
+--   WHERE Responsable = @email AND approve IS NULL
+--   ORDER BY id_solicitud DESC
+-- ============================================================
+IF NOT EXISTS (
+    SELECT 1
+    FROM   sys.indexes
+    WHERE  name   = 'IX_CAF_Solicitud_Responsable_Approve'
+      AND  object_id = OBJECT_ID('dbo.TBL_CAF_Solicitud')
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_CAF_Solicitud_Responsable_Approve
+        ON dbo.TBL_CAF_Solicitud (Responsable, approve, id_solicitud)
+        INCLUDE (Tipo_Contratacion, Usuario, Fecha, Cliente, Building, Proveedor, CveSol);
+
+    PRINT 'Índice IX_CAF_Solicitud_Responsable_Approve creado correctamente.';
+END
+ELSE
+BEGIN
+    PRINT 'El índice IX_CAF_Solicitud_Responsable_Approve ya existe. Se omite la creación.';
+END
+GO
+
+-- ============================================================
+-- 2. IX_CAF_Solicitud_Usuario_Approve
+-- Solicitudes capturadas por un usuario:
+--   WHERE Usuario = @email [AND approve = @estado]
+--   ORDER BY id_solicitud DESC
+-- ============================================================
+IF NOT EXISTS (
+    SELECT 1
+    FROM   sys.indexes
+    WHERE  name   = 'IX_CAF_Solicitud_Usuario_Approve'
+      AND  object_id = OBJECT_ID('dbo.TBL_CAF_Solicitud')
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_CAF_Solicitud_Usuario_Approve
+        ON dbo.TBL_CAF_Solicitud (Usuario, approve, id_solicitud)
+        INCLUDE (Tipo_Contratacion, Responsable, Fecha, Cliente, Building, Proveedor, CveSol);
+
+    PRINT 'Índice IX_CAF_Solicitud_Usuario_Approve creado correctamente.';
+END
+ELSE
+BEGIN
+    PRINT 'El índice IX_CAF_Solicitud_Usuario_Approve ya existe. Se omite la creación.';
+END
+GO
+
+-- ============================================================
+-- 3. IX_CAF_Solicitud_Approve
+-- Tableros por estado:
+--   WHERE approve = @estado (o IS NULL)
+--   ORDER BY id_solicitud DESC
+-- ============================================================
+IF NOT EXISTS (
+    SELECT 1
+    FROM   sys.indexes
+    WHERE  name   = 'IX_CAF_Solicitud_Approve'
+      AND  object_id = OBJECT_ID('dbo.TBL_CAF_Solicitud')
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_CAF_Solicitud_Approve
+        ON dbo.TBL_CAF_Solicitud (approve, id_solicitud)
+        INCLUDE (Tipo_Contratacion, Responsable, Usuario, Fecha, Cliente, Building, Proveedor, CveSol);
+
+    PRINT 'Índice IX_CAF_Solicitud_Approve creado correctamente.';
+END
+ELSE
+BEGIN
+    PRINT 'El índice IX_CAF_Solicitud_Approve ya existe. Se omite la creación.';
+END
+GO
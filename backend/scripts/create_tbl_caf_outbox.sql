@@ -0,0 +1,92 @@
+-- ============================================================
+-- Script: create_tbl_caf_outbox.sql
+-- Base de datos: definida en MASTER_DB_NAME del .env
+-- Descripción: Crea la tabla TBL_CAF_Outbox (outbox transaccional
+--              de eventos de dominio). Cada evento se inserta en la
+--              misma transacción que el cambio en TBL_CAF_Solicitud
+--              y el relay del backend lo entrega con reintentos.
+-- Ejecutar como: usuario con permisos DDL en MASTER_DB_NAME
+-- ============================================================
+
+-- ============================================================
+-- 1. TABLA
+-- ============================================================
+IF NOT EXISTS (
+    SELECT 1
+    FROM   sys.tables
+    WHERE  name = 'TBL_CAF_Outbox'
+      AND  schema_id = SCHEMA_ID('dbo')
+)
+BEGIN
+    CREATE TABLE dbo.TBL_CAF_Outbox (
+        id_evento       INT            NOT NULL IDENTITY(1,1),
+        Tipo_Evento     VARCHAR(100)   NOT NULL,   -- Nombre de la clase del evento (ej. 'SolicitudCreada')
+        id_solicitud    INT            NULL,
+        Payload         VARCHAR(MAX)   NOT NULL,   -- Evento serializado en JSON
+        Estado          VARCHAR(20)    NOT NULL CONSTRAINT DF_CAF_Outbox_Estado   DEFAULT 'pendiente',
+        Intentos        INT            NOT NULL CONSTRAINT DF_CAF_Outbox_Intentos DEFAULT 0,
+        Proximo_Intento DATETIME       NOT NULL,
+        Reclamado_Por   VARCHAR(64)    NULL,       -- Token del lote del relay que lo reclamó
+        Bloqueado_Hasta DATETIME       NULL,
+        Ultimo_Error    VARCHAR(1000)  NULL,
+        Observers_Entregados VARCHAR(1000) NULL,   -- Observers que ya lo procesaron (no se repiten al reintentar)
+        Fecha_Creacion  DATETIME       NOT NULL,
+        Fecha_Entrega   DATETIME       NULL,
+
+        CONSTRAINT PK_TBL_CAF_Outbox       PRIMARY KEY CLUSTERED (id_evento),
+        CONSTRAINT CK_CAF_Outbox_Estado    CHECK (Estado IN ('pendiente', 'procesando', 'entregado', 'fallido'))
+    );
+
+    PRINT 'Tabla TBL_CAF_Outbox creada correctamente.';
+END
+ELSE
+BEGIN
+    PRINT 'La tabla TBL_CAF_Outbox ya existe. Se omite la creación.';
+END
+GO
+
+-- ============================================================
+-- 2. ÍNDICE
+-- Optimiza el sondeo del relay:
+--   WHERE Estado = 'pendiente' AND Proximo_Intento <= GETDATE()
+-- ============================================================
+IF NOT EXISTS (
+    SELECT 1
+    FROM   sys.indexes
+    WHERE  name   = 'IX_CAF_Outbox_Estado_ProximoIntento'
+      AND  object_id = OBJECT_ID('dbo.TBL_CAF_Outbox')
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_CAF_Outbox_Estado_ProximoIntento
+        ON dbo.TBL_CAF_Outbox (Estado, Proximo_Intento);
+
+    PRINT 'Índice IX_CAF_Outbox_Estado_ProximoIntento creado correctamente.';
+END
+ELSE
+BEGIN
+    PRINT 'El índice IX_CAF_Outbox_Estado_ProximoIntento ya existe. Se omite la creación.';
+END
+GO
+
+-- ============================================================
+-- 3. COLUMNA Observers_Entregados (tablas creadas antes)
+-- Al reintentar un evento, el relay omite los observers que ya
+-- lo procesaron (evita correos duplicados).
+-- ============================================================
+IF NOT EXISTS (
+    SELECT 1
+    FROM   sys.columns
+    WHERE  name = 'Observers_Entregados'
+      AND  object_id = OBJECT_ID('dbo.TBL_CAF_Outbox')
+)
+BEGIN
+    ALTER TABLE dbo.TBL_CAF_Outbox
+        ADD Observers_Entregados VARCHAR(1000) NULL;
+
+    PRINT 'Columna Observers_Entregados agregada correctamente.';
+END
+ELSE
+BEGIN
+    PRINT 'La columna Observers_Entregados ya existe. Se omite la creación.';
+END
+GO
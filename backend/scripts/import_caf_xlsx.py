@@ -0,0 +1,66 @@
+"""
+Importa solicitudes CAF desde un libro de Excel (.xlsx).
+
+Uso:
+    python scripts/import_caf_xlsx.py solicitudes.xlsx
+    python scripts/import_caf_xlsx.py solicitudes.xlsx --sheet CAFs --dry-run --errors-csv errores.csv
+
+La primera fila de la hoja debe tener los nombres de las columnas de
+TBL_CAF_Solicitud. Las filas se leen en streaming (openpyxl read_only) y se
+insertan por bloques; las filas con errores se omiten y se escriben en el CSV
+de errores (todas, no solo las del resumen).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.caf_import import CafImportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa solicitudes CAF desde Excel")
+    parser.add_argument("path", help="Archivo .xlsx")
+    parser.add_argument("--sheet", default=None, help="Hoja a importar (default: la hoja activa)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Filas por bloque (default: CAF_IMPORT_CHUNK_SIZE)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo validar, sin insertar")
+    parser.add_argument("--notify", action="store_true", help="Notificar a los responsables por correo")
+    parser.add_argument("--errors-csv", default=None, help="Escribir todas las filas con errores en este CSV")
+    args = parser.parse_args()
+
+    errors_file = open(args.errors_csv, "w", newline="", encoding="utf-8") if args.errors_csv else None
+    writer = csv.writer(errors_file) if errors_file else None
+    if writer:
+        writer.writerow(["fila", "errores"])
+
+    def on_error(row_number, errors):
+        if writer:
+            writer.writerow([row_number, "; ".join(errors)])
+
+    db = SessionLocal()
+    try:
+        report = CafImportService().import_workbook(
+            db,
+            args.path,
+            sheet=args.sheet,
+            chunk_size=args.chunk_size,
+            dry_run=args.dry_run,
+            notify=args.notify,
+            on_error=on_error,
+            max_reported_errors=20
+        )
+    finally:
+        db.close()
+        if errors_file:
+            errors_file.close()
+
+    print(json.dumps(report.to_dict(), indent=2, ensure_ascii=False))
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Prueba de carga de GET /caf-solicitud/{id}: ruta síncrona vs ruta async con el executor de BD.
+
+Modos:
+  Simulación en proceso (SQLite con latencia artificial por consulta, sin servidor):
+      python scripts/load_test_caf.py --simulate --concurrency 100 --requests 2000 --latency-ms 20
+
+  Contra un backend en ejecución:
+      python scripts/load_test_caf.py --url http://localhost:8002/api/v1 --solicitud-id 1
+
+En la simulación se sirven las dos variantes del mismo endpoint desde la misma app:
+  /sync/...  -> def + Depends(get_db) (comportamiento anterior, threadpool compartido de 40 hilos)
+  /async/... -> async def + run_db (hilos dedicados del tamaño del pool de conexiones)
+La ruta síncrona queda limitada por el threadpool compartido aunque el pool de
+conexiones permita más consultas simultáneas.
+
+Requiere httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("Esta prueba requiere httpx: pip install httpx")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_load(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> dict:
+    """Lanza `total` peticiones con `concurrency` clientes simultáneos y mide latencias."""
+    latencies, errors = [], 0
+    pending = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in pending:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+    }
+
+
+def build_simulated_app(latency_ms: float, pool_size: int):
+    """App con las variantes sync/async del detalle sobre SQLite con latencia artificial."""
+    from fastapi import APIRouter, Depends, FastAPI, HTTPException
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import Session
+
+    from app.core import database
+    from app.core.config import settings
+    from app.api.caf_solicitud import router as async_router
+    from app.models.caf_solicitud import TBL_CAF_Solicitud
+    from app.services.caf_solicitud_service import CafSolicitudService
+
+    db_path = os.path.join(tempfile.mkdtemp(), "load_test.db")
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size,
+        max_overflow=0
+    )
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _simulated_round_trip(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(latency_ms / 1000)
+
+    database.Base.metadata.create_all(engine, tables=[TBL_CAF_Solicitud.__table__])
+    database.set_engine_factory(lambda: engine)
+    settings.DB_ASYNC_WORKERS = pool_size
+
+    db = database.SessionLocal()
+    solicitud = TBL_CAF_Solicitud(Tipo_Contratacion="Contrato de Obra", Building="BLDG01")
+    db.add(solicitud)
+    db.commit()
+    solicitud_id = solicitud.id_solicitud
+    db.close()
+
+    sync_router = APIRouter()
+
+    @sync_router.get("/caf-solicitud/{solicitud_id}")
+    def get_caf_solicitud_detail_sync(solicitud_id: int, db: Session = Depends(database.get_db)):
+        result = CafSolicitudService().get_detail(db, solicitud_id)
+        if not result:
+            raise HTTPException(status_code=404, detail="Solicitud no encontrada")
+        return result
+
+    app = FastAPI()
+    app.include_router(sync_router, prefix="/sync")
+    app.include_router(async_router, prefix="/async")
+    return app, solicitud_id
+
+
+async def simulate(args) -> list:
+    app, solicitud_id = build_simulated_app(args.latency_ms, args.pool_size)
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        for variant in ("sync", "async"):
+            path = f"/{variant}/caf-solicitud/{solicitud_id}"
+            await run_load(client, path, args.concurrency, args.concurrency)  # calentamiento
+            results.append((variant, await run_load(client, path, args.requests, args.concurrency)))
+    return results
+
+
+async def live(args) -> list:
+    async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        return [(args.url, await run_load(client, f"/caf-solicitud/{args.solicitud_id}", args.requests, args.concurrency))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del detalle de solicitudes CAF")
+    parser.add_argument("--simulate", action="store_true", help="Comparar sync vs async en proceso con SQLite")
+    parser.add_argument("--url", default="http://localhost:8002/api/v1", help="URL base del API (modo en vivo)")
+    parser.add_argument("--solicitud-id", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latencia simulada por consulta")
+    parser.add_argument("--pool-size", type=int, default=80, help="Conexiones del pool simulado (= hilos async)")
+    args = parser.parse_args()
+
+    # Los servicios imprimen trazas en cada petición; se silencian durante la prueba
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(simulate(args) if args.simulate else live(args))
+    for label, result in results:
+        print(f"{label}: {result}")
+
+
+if __name__ == "__main__":
+    main()
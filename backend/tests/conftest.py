@@ -0,0 +1,39 @@
+import sys
+import os
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core import database
+from app.core.async_db import shutdown_async_db_executor
+from app.models.building import CAT_BUILDINGS
+from app.models.caf_solicitud import TBL_CAF_Solicitud
+from app.models.outbox import TBL_CAF_Outbox
+
+
+@pytest.fixture
+def sqlite_engine():
+    """
+    SQLite en memoria con las tablas de solicitudes, outbox y edificios, registrado
+    como engine de la aplicación durante el test.
+    - StaticPool: una sola conexión compartida por todos los hilos (executor de BD)
+    - El esquema BD_MPA_VCAP.dbo (CAT_BUILDINGS) se traduce al esquema por defecto
+    Cada módulo agrega sus datos con un fixture del mismo nombre que recibe este.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    ).execution_options(schema_translate_map={"BD_MPA_VCAP.dbo": None})
+    database.Base.metadata.create_all(
+        engine, tables=[TBL_CAF_Solicitud.__table__, TBL_CAF_Outbox.__table__, CAT_BUILDINGS.__table__]
+    )
+    database.set_engine_factory(lambda: engine)
+    yield engine
+    shutdown_async_db_executor()
+    database.set_engine_factory(None)
+    engine.dispose()
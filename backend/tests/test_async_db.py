@@ -0,0 +1,74 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.async_db import AsyncDbExecutor
+from app.api.caf_solicitud import router
+
+
+class TestAsyncDb:
+    """
+    Tests del acceso a BD desde endpoints async.
+    """
+
+    def test_ejecuta_en_hilo_de_bd_con_sesion_propia(self, sqlite_engine):
+        executor = AsyncDbExecutor(max_workers=2)
+
+        def consulta(db, valor):
+            return threading.current_thread().name, db.execute(text("SELECT :v"), {"v": valor}).scalar()
+
+        thread_name, valor = asyncio.run(executor.run(consulta, 7))
+        executor.shutdown()
+        assert thread_name.startswith("db-worker")
+        assert valor == 7
+
+    def test_no_bloquea_el_event_loop(self, sqlite_engine):
+        executor = AsyncDbExecutor(max_workers=4)
+
+        def lenta(db):
+            time.sleep(0.2)
+
+        async def cuatro_a_la_vez():
+            inicio = time.monotonic()
+            await asyncio.gather(*(executor.run(lenta) for _ in range(4)))
+            return time.monotonic() - inicio
+
+        duracion = asyncio.run(cuatro_a_la_vez())
+        executor.shutdown()
+        assert duracion < 0.6
+
+    def test_excepciones_se_propagan(self, sqlite_engine):
+        executor = AsyncDbExecutor(max_workers=1)
+
+        def falla(db):
+            raise ValueError("estado inválido")
+
+        with pytest.raises(ValueError, match="estado inválido"):
+            asyncio.run(executor.run(falla))
+        executor.shutdown()
+
+    def test_endpoints_async_de_solicitud(self, sqlite_engine):
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+
+        creada = client.post("/caf-solicitud", json={"Tipo_Contratacion": "Contrato de Obra", "Building": "BLDG01"})
+        assert creada.status_code == 201
+        solicitud_id = creada.json()["id_solicitud"]
+
+        detalle = client.get(f"/caf-solicitud/{solicitud_id}")
+        assert detalle.json()["Building"] == "BLDG01"
+
+        aprobada = client.patch(f"/caf-solicitud/{solicitud_id}/approval", json={"approve": "aprobado", "row_version": detalle.json()["RowVersion"]})
+        assert aprobada.json()["approve"] == 1
+        assert client.get("/caf-solicitud/999").status_code == 404
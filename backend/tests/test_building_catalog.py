@@ -0,0 +1,112 @@
+import sys
+import os
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.building import CAT_BUILDINGS
+from app.services import building_catalog
+from app.services.building_catalog import BuildingCatalog, etag_matches
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    """Catálogo con dos edificios activos y uno inactivo; registra las sentencias ejecutadas."""
+    db = sessionmaker(bind=sqlite_engine)()
+    db.add_all([
+        CAT_BUILDINGS(BLDGID="B002", BLDGNAME="Beta", INACTIVE="N"),
+        CAT_BUILDINGS(BLDGID="B001", BLDGNAME="Alfa", INACTIVE=None),
+        CAT_BUILDINGS(BLDGID="B003", BLDGNAME="Gamma", INACTIVE="Y"),
+    ])
+    db.commit()
+    db.close()
+
+    statements = []
+    event.listen(sqlite_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    sqlite_engine.statements = statements
+    return sqlite_engine
+
+
+class TestBuildingCatalog:
+    """
+    Tests de la caché del catálogo de edificios.
+    """
+
+    def test_cache_y_revalidacion_por_huella(self, engine):
+        db = sessionmaker(bind=engine)()
+        catalog = BuildingCatalog(ttl_seconds=3600, probe_interval_seconds=0)
+
+        first = catalog.get(db)
+        assert first.options == [{"value": "B001", "label": "B001"}, {"value": "B002", "label": "B002"}]
+
+        # Sin cambios: solo la consulta de huella, misma versión
+        engine.statements.clear()
+        assert catalog.get(db) is first
+        assert len(engine.statements) == 1
+
+        db.get(CAT_BUILDINGS, "B003").INACTIVE = None
+        db.commit()
+        second = catalog.get(db)
+        assert [o["value"] for o in second.options] == ["B001", "B002", "B003"]
+        assert second.etag != first.etag
+        db.close()
+
+    def test_sin_consultas_dentro_del_intervalo(self, engine):
+        db = sessionmaker(bind=engine)()
+        catalog = BuildingCatalog(ttl_seconds=3600, probe_interval_seconds=60)
+        catalog.get(db)
+        engine.statements.clear()
+        catalog.get(db)
+        assert engine.statements == []
+        db.close()
+
+    def test_fallo_de_huella_respeta_el_intervalo(self, engine, monkeypatch):
+        db = sessionmaker(bind=engine)()
+        catalog = BuildingCatalog(ttl_seconds=3600, probe_interval_seconds=60)
+        entry = catalog.get(db)
+        catalog._last_probe -= 60
+
+        probes = []
+        def failing_fingerprint(self):
+            probes.append(1)
+            raise RuntimeError("timeout")
+        monkeypatch.setattr(building_catalog.BuildingRepository, "get_fingerprint", failing_fingerprint)
+
+        # Se sirve la versión cacheada y no se vuelve a consultar dentro del intervalo
+        assert catalog.get(db) is entry
+        assert catalog.get(db) is entry
+        assert len(probes) == 1
+        db.close()
+
+    def test_etag_matches(self):
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('W/"abc", "xyz"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches('"xyz"', '"abc"')
+        assert not etag_matches(None, '"abc"')
+        assert etag_matches('"abc"', 'W/"abc"')
+
+    def test_endpoint_responde_304(self, engine, monkeypatch):
+        from app.api.caf_solicitud import router
+        monkeypatch.setattr(building_catalog, "_building_catalog_instance", BuildingCatalog())
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+
+        response = client.get("/buildings/select")
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        assert "max-age" in response.headers["cache-control"]
+
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+        not_modified = client.get("/buildings/select", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["etag"] == etag
@@ -0,0 +1,92 @@
+import sys
+import os
+from datetime import date
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.dialects import mssql
+from sqlalchemy.orm import sessionmaker
+
+from app.events.domain_events import SolicitudesCreadasLote, deserialize_event
+from app.models.caf_solicitud import TBL_CAF_Solicitud
+from app.models.outbox import TBL_CAF_Outbox
+from app.services.caf_solicitud_service import BulkValidationError, CafSolicitudService
+
+
+def _solicitud(i, responsable):
+    return {
+        "Tipo_Contratacion": "Contrato de Obra",
+        "Responsable": responsable,
+        "Building": f"BLDG{i:02d}",
+        "Fecha": "2024-03-15",
+        "Cotizacion_MPA_CP": "1",
+        "MontoMXNsubtotal": 1500.5,
+        "approve": 1,
+    }
+
+
+class TestCafBulkCreate:
+    """
+    Tests del alta masiva de solicitudes CAF.
+    """
+
+    def test_inserta_en_lotes_y_retorna_ids_en_orden(self, sqlite_engine):
+        db = sessionmaker(bind=sqlite_engine)()
+        items = [_solicitud(i, f"resp{i % 3}@mpagroup.mx") for i in range(25)]
+        ids = CafSolicitudService().create_bulk(db, items, batch_size=10)
+        db.close()
+
+        assert len(ids) == 25 and ids == sorted(ids)
+        db = sessionmaker(bind=sqlite_engine)()
+        solicitudes = {s.id_solicitud: s for s in db.query(TBL_CAF_Solicitud).all()}
+        for solicitud_id, item in zip(ids, items):
+            solicitud = solicitudes[solicitud_id]
+            assert solicitud.Building == item["Building"]
+            assert solicitud.Fecha == date(2024, 3, 15)
+            assert solicitud.Cotizacion_MPA_CP == 1
+            assert solicitud.MontoMXNsubtotal == "1500.5"
+            # approve siempre queda pendiente
+            assert solicitud.approve is None
+        db.close()
+
+    def test_sql_server_usa_output_por_lote(self):
+        # En SQL Server las filas del lote viajan en un solo INSERT ... OUTPUT (insertmanyvalues)
+        dialect = mssql.dialect()
+        assert dialect.use_insertmanyvalues
+        assert dialect.insertmanyvalues_implicit_sentinel
+        table = TBL_CAF_Solicitud.__table__
+        stmt = insert(table).returning(table.c.id_solicitud, sort_by_parameter_order=True)
+        assert "OUTPUT inserted.id_solicitud" in str(stmt.compile(dialect=dialect))
+
+    def test_un_evento_por_responsable(self, sqlite_engine):
+        db = sessionmaker(bind=sqlite_engine)()
+        items = [_solicitud(i, f"resp{i % 3}@mpagroup.mx") for i in range(9)]
+        ids = CafSolicitudService().create_bulk(db, items)
+
+        entries = db.query(TBL_CAF_Outbox).all()
+        assert len(entries) == 3
+        events = [deserialize_event(e.Tipo_Evento, e.Payload) for e in entries]
+        assert all(isinstance(e, SolicitudesCreadasLote) for e in events)
+        by_responsable = {e.responsable: e.solicitud_ids for e in events}
+        assert by_responsable["resp0@mpagroup.mx"] == [ids[0], ids[3], ids[6]]
+        assert events[0].solicitudes[0]["Building"] == "BLDG00"
+        db.close()
+
+    def test_errores_de_validacion_no_insertan_nada(self, sqlite_engine):
+        db = sessionmaker(bind=sqlite_engine)()
+        items = [
+            _solicitud(0, "resp@mpagroup.mx"),
+            {"Building": "x" * 101, "Fecha": "no-es-fecha"},
+            {"CampoInexistente": 1},
+        ]
+        with pytest.raises(BulkValidationError) as error:
+            CafSolicitudService().create_bulk(db, items)
+
+        assert [e["index"] for e in error.value.errors] == [1, 2]
+        assert len(error.value.errors[0]["errors"]) == 2
+        assert db.query(TBL_CAF_Solicitud).count() == 0
+        assert db.query(TBL_CAF_Outbox).count() == 0
+        db.close()
@@ -0,0 +1,137 @@
+import sys
+import os
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, update
+from sqlalchemy.dialects import mssql
+from sqlalchemy.orm import sessionmaker
+
+from app.api.caf_solicitud import router
+from app.models.caf_solicitud import TBL_CAF_Solicitud
+from app.models.outbox import TBL_CAF_Outbox
+from app.services.caf_solicitud_service import (
+    CafSolicitudService, PREVIOUS_APPROVE_OUTPUT, RowVersionRequiredError, SolicitudConflictError
+)
+
+
+@pytest.fixture
+def sqlite_engine(sqlite_engine):
+    """Una solicitud pendiente y otra en correcciones."""
+    db = sessionmaker(bind=sqlite_engine)()
+    db.add_all([
+        TBL_CAF_Solicitud(Tipo_Contratacion="Contrato de Obra", Responsable="resp@mpagroup.mx", Mode="Normal"),
+        TBL_CAF_Solicitud(Tipo_Contratacion="Orden de Servicio", Responsable="resp@mpagroup.mx", approve=0, Mode="Edit"),
+    ])
+    db.commit()
+    db.close()
+    return sqlite_engine
+
+
+def _record_statements(engine) -> list:
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement.split()[0]))
+    return statements
+
+
+class TestCafConcurrency:
+    """
+    Tests de la concurrencia optimista (RowVersion) en aprobaciones y actualizaciones.
+    """
+
+    def test_aprobacion_en_una_sentencia(self, sqlite_engine):
+        db = sessionmaker(bind=sqlite_engine)()
+        statements = _record_statements(sqlite_engine)
+
+        solicitud = CafSolicitudService().approve_or_reject(db, 1, "aprobado", row_version=1)
+
+        # UPDATE ... RETURNING + INSERT del outbox; sin SELECT previo ni refresh
+        assert statements == ["UPDATE", "INSERT"]
+        assert (solicitud.approve, solicitud.Mode, solicitud.RowVersion) == (1, "View", 2)
+        # Valores del OUTPUT disponibles sin sesión
+        db.close()
+        assert solicitud.Responsable == "resp@mpagroup.mx"
+
+    def test_dos_aprobadores_con_la_misma_version(self, sqlite_engine):
+        service = CafSolicitudService()
+        session = sessionmaker(bind=sqlite_engine)
+
+        service.approve_or_reject(session(), 1, "rechazado_definitivo", "Sin presupuesto", row_version=1)
+        with pytest.raises(SolicitudConflictError) as conflict:
+            service.approve_or_reject(session(), 1, "aprobado", row_version=1)
+        assert conflict.value.current_version == 2
+
+        db = session()
+        solicitud = db.get(TBL_CAF_Solicitud, 1)
+        assert (solicitud.approve, solicitud.Comentarios) == (2, "Sin presupuesto")
+        # Solo se encoló el evento del primer aprobador
+        assert db.query(TBL_CAF_Outbox).count() == 1
+        assert service.approve_or_reject(db, 99, "aprobado", row_version=1) is None
+        with pytest.raises(RowVersionRequiredError):
+            service.approve_or_reject(db, 1, "aprobado")
+        # Solicitud inexistente: None (404) antes que los errores de validación
+        assert service.approve_or_reject(db, 99, "requiere_correcciones") is None
+        with pytest.raises(ValueError):
+            service.approve_or_reject(db, 1, "requiere_correcciones", row_version=2)
+        db.close()
+
+    def test_update_desde_correcciones(self, sqlite_engine):
+        service = CafSolicitudService()
+        db = sessionmaker(bind=sqlite_engine)()
+        statements = _record_statements(sqlite_engine)
+
+        solicitud = service.update(db, 2, {"Proveedor": "Proveedor Nuevo", "Mode": "Edit", "RowVersion": 1, "id_solicitud": 7})
+        # UPDATE ... WHERE approve = 0 + INSERT del outbox
+        assert statements == ["UPDATE", "INSERT"]
+        assert (solicitud.approve, solicitud.Mode, solicitud.Proveedor, solicitud.RowVersion) == (None, "Normal", "Proveedor Nuevo", 2)
+        assert db.query(TBL_CAF_Outbox.Tipo_Evento).scalar() == "SolicitudCorreccionesRealizadas"
+
+        # Sin correcciones: no se resetea el estado ni se notifica
+        solicitud = service.update(db, 1, {"Cliente": "Cliente S.A.", "Mode": "View", "RowVersion": 1})
+        assert (solicitud.approve, solicitud.Mode, solicitud.RowVersion) == (None, "View", 2)
+        assert db.query(TBL_CAF_Outbox).count() == 1
+
+        with pytest.raises(SolicitudConflictError):
+            service.update(db, 2, {"Proveedor": "Otro", "RowVersion": 1})
+        with pytest.raises(RowVersionRequiredError):
+            service.update(db, 1, {"Cliente": "x"})
+        assert service.update(db, 99, {"Cliente": "x", "RowVersion": 1}) is None
+        assert service.update(db, 99, {"Cliente": "x"}) is None
+        db.close()
+
+    def test_update_compila_a_output_inserted(self):
+        stmt = (
+            update(TBL_CAF_Solicitud)
+            .where(TBL_CAF_Solicitud.id_solicitud == 1, TBL_CAF_Solicitud.RowVersion == 1)
+            .values(approve=1, RowVersion=TBL_CAF_Solicitud.RowVersion + 1)
+        )
+        sql = str(stmt.returning(TBL_CAF_Solicitud).compile(dialect=mssql.dialect()))
+        assert "OUTPUT inserted.id_solicitud" in sql and "inserted.[RowVersion]" in sql
+
+        # En SQL Server el approve anterior sale en el mismo OUTPUT
+        sql = str(stmt.returning(TBL_CAF_Solicitud, PREVIOUS_APPROVE_OUTPUT).compile(dialect=mssql.dialect()))
+        assert "inserted.[RowVersion], deleted.approve WHERE" in sql
+
+    def test_endpoints_responden_409_y_428(self, sqlite_engine):
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+
+        detail = client.get("/caf-solicitud/1").json()
+        body = {"approve": "aprobado", "row_version": detail["RowVersion"]}
+        response = client.patch("/caf-solicitud/1/approval", json=body)
+        assert response.status_code == 200 and response.json()["row_version"] == 2
+
+        assert client.patch("/caf-solicitud/1/approval", json=body).status_code == 409
+        assert client.put("/caf-solicitud/1", json={"Cliente": "x", "RowVersion": 1}).status_code == 409
+        assert client.put("/caf-solicitud/1", json={"Cliente": "x", "RowVersion": 2}).status_code == 200
+        assert client.put("/caf-solicitud/99", json={"Cliente": "x", "RowVersion": 1}).status_code == 404
+        assert client.patch("/caf-solicitud/99/approval", json={"approve": "aprobado", "row_version": 1}).status_code == 404
+
+        # Sin versión: 428 Precondition Required
+        assert client.put("/caf-solicitud/2", json={"Cliente": "x"}).status_code == 428
+        assert client.patch("/caf-solicitud/2/approval", json={"approve": "aprobado"}).status_code == 428
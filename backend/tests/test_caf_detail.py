@@ -0,0 +1,78 @@
+import sys
+import os
+from datetime import date
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.caf_solicitud import router
+from app.models.caf_solicitud import TBL_CAF_Solicitud
+from app.services.caf_solicitud_service import CafSolicitudService, parse_detail_fields
+
+
+@pytest.fixture
+def sqlite_engine(sqlite_engine):
+    """Una solicitud capturada."""
+    db = sessionmaker(bind=sqlite_engine)()
+    db.add(TBL_CAF_Solicitud(
+        Tipo_Contratacion="Contrato de Obra",
+        Responsable="resp@mpagroup.mx",
+        Fecha=date(2024, 3, 1),
+        Descripcion_trabajo_servicio="x" * 2000,
+        Cotizacion_MPA_CP=1,
+        Comentarios="Falta el presupuesto",
+    ))
+    db.commit()
+    db.close()
+    return sqlite_engine
+
+
+class TestCafSolicitudDetail:
+    """
+    Tests del detalle de solicitud con proyección de columnas.
+    """
+
+    def test_parse_fields(self):
+        assert parse_detail_fields(None) is None
+        assert parse_detail_fields("approve, Responsable,approve") == ["id_solicitud", "approve", "Responsable"]
+        with pytest.raises(ValueError):
+            parse_detail_fields("approve,NoExiste")
+
+    def test_load_only_selecciona_solo_los_campos(self, sqlite_engine):
+        statements = []
+        event.listen(sqlite_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+        db = sessionmaker(bind=sqlite_engine)()
+
+        solicitud = CafSolicitudService().get_detail(db, 1, ["id_solicitud", "approve", "Comentarios"])
+
+        select_clause = statements[-1].split(" FROM ")[0]
+        assert "Comentarios" in select_clause
+        assert "Descripcion_trabajo_servicio" not in select_clause
+        assert solicitud.Comentarios == "Falta el presupuesto"
+        db.close()
+
+    def test_endpoint(self, sqlite_engine):
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+
+        # Sin fields: mismo JSON que antes (ORM por jsonable_encoder)
+        db = sessionmaker(bind=sqlite_engine)()
+        legacy = jsonable_encoder(db.get(TBL_CAF_Solicitud, 1))
+        db.close()
+        response = client.get("/caf-solicitud/1")
+        assert response.status_code == 200
+        assert response.json() == legacy
+
+        response = client.get("/caf-solicitud/1", params={"fields": "Responsable,Fecha,approve"})
+        assert response.json() == {"id_solicitud": 1, "Responsable": "resp@mpagroup.mx", "Fecha": "2024-03-01", "approve": None}
+
+        assert client.get("/caf-solicitud/1", params={"fields": "Password"}).status_code == 400
+        assert client.get("/caf-solicitud/99").status_code == 404
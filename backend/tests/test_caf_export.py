@@ -0,0 +1,104 @@
+import sys
+import os
+from datetime import date
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import io
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+from sqlalchemy import insert
+
+from app.core import database
+from app.api.caf_solicitud import router
+from app.models.caf_solicitud import TBL_CAF_Solicitud
+from app.services.caf_export import CafExportService
+
+
+@pytest.fixture
+def sqlite_engine(sqlite_engine):
+    """50 solicitudes: approve alterna NULL/1, dos edificios y fechas de enero."""
+    with sqlite_engine.begin() as conn:
+        conn.execute(insert(TBL_CAF_Solicitud.__table__), [
+            {
+                "Tipo_Contratacion": "Contrato de Obra" if i % 5 else "Orden de Servicio",
+                "Building": f"BLDG0{i % 2}",
+                "Fecha": date(2024, 1, 1 + i % 28),
+                "approve": None if i % 2 else 1,
+                "Cliente": "Cliente, S.A. \"Ñandú\"",
+            }
+            for i in range(50)
+        ])
+    return sqlite_engine
+
+
+class CountingSessions:
+    """session_factory que cuenta sesiones abiertas y cerradas."""
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+
+    def __call__(self):
+        self.opened += 1
+        session = database.SessionLocal()
+        original_close = session.close
+
+        def close():
+            self.closed += 1
+            original_close()
+        session.close = close
+        return session
+
+
+class TestCafExport:
+    """
+    Tests de la exportación en streaming de solicitudes CAF.
+    """
+
+    def test_csv_por_bloques_con_filtros(self, sqlite_engine):
+        sessions = CountingSessions()
+        service = CafExportService(session_factory=sessions, yield_per=7)
+        stmt = service.build_query(approve="pendiente", building="BLDG01", fecha_hasta=date(2024, 1, 20))
+        chunks = service.stream(stmt, "csv")
+
+        # El encabezado sale antes de abrir la sesión / consultar la BD
+        header = next(chunks)
+        assert sessions.opened == 0
+        body = header + b"".join(chunks)
+        assert sessions.closed == 1
+
+        rows = list(csv.DictReader(io.StringIO(body.decode("utf-8-sig"))))
+        assert rows and all(r["Building"] == "BLDG01" and r["approve"] == "" for r in rows)
+        assert all(r["Fecha"] <= "2024-01-20" for r in rows)
+        assert rows[0]["Cliente"] == "Cliente, S.A. \"Ñandú\""
+
+    def test_estado_invalido(self):
+        with pytest.raises(ValueError):
+            CafExportService.build_query(approve="cualquiera")
+
+    def test_endpoint_ndjson_y_xlsx(self, sqlite_engine):
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+
+        response = client.get("/caf-solicitud/export", params={"format": "ndjson", "approve": "aprobado", "tipo": "Orden de Servicio"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 5
+        assert all(line["approve"] == 1 and line["Tipo_Contratacion"] == "Orden de Servicio" for line in lines)
+
+        response = client.get("/caf-solicitud/export", params={"format": "xlsx"})
+        assert "attachment" in response.headers["content-disposition"]
+        sheet = load_workbook(io.BytesIO(response.content), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        assert rows[0][0] == "id_solicitud"
+        assert len(rows) == 51
+
+        assert client.get("/caf-solicitud/export", params={"approve": "x"}).status_code == 400
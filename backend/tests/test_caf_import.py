@@ -0,0 +1,100 @@
+import sys
+import os
+from datetime import date, datetime
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracemalloc
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy.orm import sessionmaker
+
+from app.models.caf_solicitud import TBL_CAF_Solicitud
+from app.models.outbox import TBL_CAF_Outbox
+from app.services.caf_import import CafImportService
+
+
+@pytest.fixture
+def db(sqlite_engine):
+    session = sessionmaker(bind=sqlite_engine)()
+    yield session
+    session.close()
+
+
+def _write_workbook(path, rows, header=("Tipo Contratación", "responsable", "BUILDING", "Fecha", "Cotizacion_MPA_CP", "Notas")):
+    # write_only: el libro de prueba también se genera en streaming
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("CAFs")
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append(list(row))
+    workbook.save(path)
+
+
+def _valid_rows(count):
+    for i in range(count):
+        yield ("Contrato de Obra", f"resp{i % 5}@mpagroup.mx", f"BLDG{i % 100:03d}", datetime(2024, 1, 1 + i % 28), 1, "nota")
+
+
+class TestCafImport:
+    """
+    Tests de la importación de solicitudes CAF desde Excel.
+    """
+
+    def test_importa_por_bloques_y_reporta_errores(self, db, tmp_path):
+        path = tmp_path / "cafs.xlsx"
+        rows = list(_valid_rows(5))
+        rows.insert(2, ("Orden de Servicio", "resp@mpagroup.mx", "x" * 150, "no-es-fecha", 1, None))
+        rows.insert(4, (None, None, None, None, None, None))  # fila vacía: se ignora
+        _write_workbook(path, rows)
+
+        report = CafImportService().import_workbook(db, str(path), chunk_size=2).to_dict()
+
+        assert report["rows_read"] == 6
+        assert report["inserted"] == 5
+        assert report["chunks"] == 3
+        assert report["ignored_columns"] == ["Notas"]
+        # Fila 4 de Excel (encabezado = fila 1)
+        assert report["errors"] == [{"row": 4, "errors": report["errors"][0]["errors"]}]
+        assert len(report["errors"][0]["errors"]) == 2
+
+        solicitud = db.query(TBL_CAF_Solicitud).order_by(TBL_CAF_Solicitud.id_solicitud).first()
+        assert solicitud.Tipo_Contratacion == "Contrato de Obra"
+        assert solicitud.Fecha == date(2024, 1, 1)
+        assert solicitud.Cotizacion_MPA_CP == 1
+        # Sin notificaciones por defecto (CAFs históricos)
+        assert db.query(TBL_CAF_Outbox).count() == 0
+
+    def test_dry_run_no_inserta(self, db, tmp_path):
+        path = tmp_path / "cafs.xlsx"
+        _write_workbook(path, _valid_rows(10))
+
+        report = CafImportService().import_workbook(db, str(path), dry_run=True)
+
+        assert report.rows_read == 10 and report.inserted == 0
+        assert db.query(TBL_CAF_Solicitud).count() == 0
+
+    def test_hoja_sin_encabezados_conocidos(self, db, tmp_path):
+        path = tmp_path / "cafs.xlsx"
+        _write_workbook(path, [("a", "b")], header=("Columna1", "Columna2"))
+        with pytest.raises(ValueError):
+            CafImportService().import_workbook(db, str(path))
+
+    def test_memoria_acotada_por_el_bloque(self, db, tmp_path):
+        def peak_for(count):
+            path = tmp_path / f"cafs_{count}.xlsx"
+            _write_workbook(path, _valid_rows(count))
+            tracemalloc.start()
+            report = CafImportService().import_workbook(db, str(path), chunk_size=500, dry_run=True)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            assert report.rows_read == count
+            return peak
+
+        small, large = peak_for(1000), peak_for(6000)
+        # Solo crece el índice interno de filas del parser de openpyxl (~100 B por fila);
+        # cargar el libro completo cuesta más de 2 KB por fila
+        per_row = (large - small) / 5000
+        assert per_row < 250, f"{per_row:.0f} bytes por fila"
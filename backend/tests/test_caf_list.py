@@ -0,0 +1,116 @@
+import sys
+import os
+import re
+from datetime import date
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, text
+from sqlalchemy.dialects import mssql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
+
+from app.api.caf_solicitud import router
+from app.models.caf_solicitud import TBL_CAF_Solicitud, LIST_COLUMNS
+from app.repositories.caf_solicitud_repository import CafSolicitudRepository
+from app.services.caf_solicitud_service import CafSolicitudService
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "create_ix_caf_solicitud_listado.sql")
+
+
+@pytest.fixture
+def sqlite_engine(sqlite_engine):
+    """60 solicitudes: 3 responsables, 2 usuarios, approve rota NULL/1/2 cada 3 filas."""
+    with sqlite_engine.begin() as conn:
+        conn.execute(insert(TBL_CAF_Solicitud.__table__), [
+            {
+                "Tipo_Contratacion": "Contrato de Obra",
+                "Responsable": f"resp{i % 3}@mpagroup.mx",
+                "Usuario": f"user{i % 2}@mpagroup.mx",
+                "Building": f"BLDG0{i % 4}",
+                "Fecha": date(2024, 1, 1 + i % 28),
+                "approve": (None, 1, 2)[i // 3 % 3],
+                "Descripcion_trabajo_servicio": "x" * 500,
+            }
+            for i in range(60)
+        ])
+    return sqlite_engine
+
+
+def _query_plan(engine, stmt) -> str:
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+class TestCafSolicitudList:
+    """
+    Tests del listado paginado de solicitudes CAF.
+    """
+
+    def test_paginacion_por_cursor(self, sqlite_engine):
+        db = sessionmaker(bind=sqlite_engine)()
+        service = CafSolicitudService()
+
+        seen, cursor = [], None
+        while True:
+            page = service.list_solicitudes(db, limit=7, cursor=cursor, responsable="resp0@mpagroup.mx")
+            seen.extend(item["id_solicitud"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(seen) == 20 and len(set(seen)) == 20
+        assert seen == sorted(seen, reverse=True)
+        # Solo las columnas del listado
+        assert set(page["items"][0]) == set(LIST_COLUMNS)
+        db.close()
+
+    def test_plan_usa_indices_sin_ordenar(self, sqlite_engine):
+        cases = [
+            ({"responsable": "resp1@mpagroup.mx", "approve": "pendiente"}, "IX_CAF_Solicitud_Responsable_Approve"),
+            ({"usuario": "user0@mpagroup.mx", "approve": "aprobado", "building": "BLDG02"}, "IX_CAF_Solicitud_Usuario_Approve"),
+            ({"approve": "rechazado_definitivo"}, "IX_CAF_Solicitud_Approve"),
+        ]
+        for filters, index in cases:
+            plan = _query_plan(sqlite_engine, CafSolicitudRepository.list_query(51, after_id=40, **filters))
+            assert f"USING INDEX {index}" in plan, plan
+            assert "TEMP B-TREE" not in plan, plan
+
+    def test_ddl_coincide_con_el_modelo(self):
+        with open(SCRIPT, encoding="utf-8") as file:
+            script = file.read()
+        created = re.findall(r"CREATE NONCLUSTERED INDEX (\w+)\s+ON dbo\.TBL_CAF_Solicitud \(([^)]*)\)\s+INCLUDE \(([^)]*)\)", script)
+
+        expected = {}
+        for index in TBL_CAF_Solicitud.__table__.indexes:
+            ddl = str(CreateIndex(index).compile(dialect=mssql.dialect()))
+            keys = [column.name for column in index.columns]
+            include = re.search(r"INCLUDE \(([^)]*)\)", ddl).group(1).replace("[", "").replace("]", "").split(", ")
+            # Índice cubriente: claves + INCLUDE = todas las columnas del listado
+            assert set(keys) | set(include) == set(LIST_COLUMNS)
+            expected[index.name] = (keys, include)
+
+        assert {name: (keys.split(", "), include.split(", ")) for name, keys, include in created} == expected
+
+    def test_endpoint(self, sqlite_engine):
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+
+        response = client.get("/caf-solicitud", params={"approve": "pendiente", "limit": 5})
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["items"]) == 5 and body["next_cursor"] == body["items"][-1]["id_solicitud"]
+        assert all(item["approve"] is None for item in body["items"])
+        assert "Descripcion_trabajo_servicio" not in body["items"][0]
+
+        response = client.get("/caf-solicitud", params={"fecha_desde": "2024-01-20", "cursor": body["next_cursor"]})
+        assert all(item["Fecha"] >= "2024-01-20" and item["id_solicitud"] < body["next_cursor"] for item in response.json()["items"])
+
+        assert client.get("/caf-solicitud", params={"approve": "x"}).status_code == 400
+        assert client.get("/caf-solicitud/1").json()["id_solicitud"] == 1
@@ -0,0 +1,112 @@
+import sys
+import os
+import gzip
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, parse_accept_encoding
+
+LARGE = [{"value": f"BLDG{i:04d}", "label": f"BLDG{i:04d}"} for i in range(500)]
+
+
+def build_client(**options) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, **options)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/large")
+    def large():
+        return LARGE
+
+    @app.get("/xlsx")
+    def xlsx():
+        return Response(b"PK" + b"\0" * 5000, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+    @app.get("/precompressed")
+    def precompressed():
+        return Response(gzip.compress(b"x" * 5000), media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse((f"data: {i}\n\n".encode() for i in range(500)), media_type="text/event-stream")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"linea {i}\n".encode() for i in range(2000)), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def _raw(client, path, accept_encoding):
+    # Sin descompresión automática de httpx para ver los bytes enviados
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+class TestCompressionMiddleware:
+    """
+    Tests de la compresión de respuestas.
+    """
+
+    def test_parse_accept_encoding(self):
+        assert parse_accept_encoding("br;q=1.0, gzip;q=0.8, *;q=0") == {"br": 1.0, "gzip": 0.8, "*": 0.0}
+        assert parse_accept_encoding("gzip, deflate") == {"gzip": 1.0, "deflate": 1.0}
+
+    def test_gzip_solo_arriba_del_umbral(self):
+        client = build_client(gzip_level=6)
+
+        response, body = _raw(client, "/large", "gzip, deflate")
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(body) < len(gzip.decompress(body)) / 4
+        assert response.headers["content-length"] == str(len(body))
+
+        response, _ = _raw(client, "/small", "gzip")
+        assert "content-encoding" not in response.headers
+
+    def test_sin_compresion(self):
+        client = build_client()
+        for accept_encoding in ("identity", "gzip;q=0", "deflate"):
+            response, _ = _raw(client, "/large", accept_encoding)
+            assert "content-encoding" not in response.headers, accept_encoding
+
+    def test_formatos_ya_comprimidos(self):
+        response, body = _raw(build_client(), "/xlsx", "gzip")
+        assert "content-encoding" not in response.headers
+        assert body.startswith(b"PK")
+
+    def test_respuestas_que_pasan_sin_cambios(self):
+        client = build_client()
+        # Ya comprimida por el endpoint: no se comprime dos veces
+        response, body = _raw(client, "/precompressed", "gzip")
+        assert gzip.decompress(body) == b"x" * 5000
+        # SSE: cada evento debe llegar en cuanto se emite
+        response, body = _raw(client, "/events", "gzip")
+        assert "content-encoding" not in response.headers
+        assert body.startswith(b"data: 0")
+
+    def test_streaming(self):
+        response, body = _raw(build_client(), "/stream", "gzip")
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(body).decode().splitlines()[-1] == "linea 1999"
+
+    def test_brotli(self):
+        brotli = pytest.importorskip("brotli")
+        client = build_client(brotli=True, brotli_quality=4)
+
+        response, body = _raw(client, "/large", "gzip, deflate, br")
+        assert response.headers["content-encoding"] == "br"
+        assert brotli.decompress(body).startswith(b"[{")
+
+        # El cliente prefiere gzip
+        response, _ = _raw(client, "/large", "br;q=0.5, gzip")
+        assert response.headers["content-encoding"] == "gzip"
@@ -0,0 +1,57 @@
+import sys
+import os
+import subprocess
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core import database
+
+
+@pytest.fixture
+def sqlite_factory():
+    """Fábrica de engine SQLite; restaura la de SQL Server al terminar."""
+    created = []
+
+    def factory():
+        engine = create_engine("sqlite://")
+        created.append(engine)
+        return engine
+
+    database.set_engine_factory(factory)
+    yield created
+    database.set_engine_factory(None)
+
+
+class TestLazyEngine:
+    """
+    Tests de la creación diferida del engine.
+    """
+
+    def test_importar_no_crea_engine(self):
+        # Proceso limpio: importar modelos y la app no requiere driver ODBC ni conexión
+        code = (
+            "import main, app.models.caf_solicitud, app.core.database as database, sys; "
+            "assert database._engine is None; assert 'pyodbc' not in sys.modules"
+        )
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", code], cwd=backend_dir, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+    def test_engine_se_crea_una_vez_con_la_fabrica(self, sqlite_factory):
+        assert sqlite_factory == []
+        db = database.SessionLocal()
+        assert db.execute(text("SELECT 1")).scalar() == 1
+        db.close()
+
+        assert database.get_engine() is database.engine
+        assert len(sqlite_factory) == 1
+        assert database.get_engine().dialect.name == "sqlite"
+
+    def test_cambiar_fabrica_descarta_el_engine(self, sqlite_factory):
+        first = database.get_engine()
+        database.set_engine_factory(lambda: create_engine("sqlite://"))
+        assert database.get_engine() is not first
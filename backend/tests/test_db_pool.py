@@ -0,0 +1,71 @@
+import sys
+import os
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.db_pool import InstrumentedQueuePool, LatencyHistogram, get_pool_status, instrument_engine, pool_metrics
+
+
+@pytest.fixture
+def engine():
+    """Engine SQLite con el pool instrumentado (pool de 1 conexión, sin overflow)."""
+    pool_metrics.reset()
+    engine = create_engine(
+        "sqlite://",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+        pool_pre_ping=True,
+        connect_args={"check_same_thread": False}
+    )
+    instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+class TestDbPool:
+    """
+    Tests de la instrumentación del pool de conexiones.
+    """
+
+    def test_checkout_y_conexion_se_registran(self, engine):
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        status = get_pool_status(engine)
+        assert status["pool_class"] == "InstrumentedQueuePool"
+        assert status["checked_out"] == 0
+        metrics = status["metrics"]
+        assert metrics["checkouts"] == 3
+        assert metrics["connections_opened"] == 1
+        assert metrics["connect_latency"]["count"] == 1
+        assert metrics["checkout_wait"]["count"] == 3
+
+    def test_pool_agotado_cuenta_timeout(self, engine):
+        conn = engine.connect()
+        assert get_pool_status(engine)["checked_out"] == 1
+
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        conn.close()
+
+        metrics = get_pool_status(engine)["metrics"]
+        assert metrics["timeouts"] == 1
+        assert metrics["checkout_wait"]["max_ms"] >= 100
+
+    def test_histograma_por_buckets(self):
+        histogram = LatencyHistogram()
+        for elapsed in (0.5, 3, 3, 40, 20000):
+            histogram.observe(elapsed)
+
+        buckets = histogram.to_dict()["buckets"]
+        assert buckets["<=1ms"] == 1
+        assert buckets["<=5ms"] == 2
+        assert buckets["<=50ms"] == 1
+        assert buckets[">10000ms"] == 1
@@ -0,0 +1,240 @@
+import sys
+import os
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.directory_snapshot import DirectorySnapshot, DeltaLinkExpiredError, GRAPH_USERS_DELTA_URL, GRAPH_USERS_URL
+from app.services.eligibility_rules import EligibilityRules
+
+
+class FakeGraphSnapshot(DirectorySnapshot):
+    """
+    Snapshot que responde desde páginas simuladas en lugar de llamar a Graph.
+    `rounds` es una lista de rondas delta; cada ronda es una lista de páginas.
+    """
+
+    def __init__(self, rounds, max_staleness_seconds=900):
+        super().__init__(max_staleness_seconds=max_staleness_seconds, refresh_interval_seconds=300)
+        self.rounds = list(rounds)
+        self.requested_urls = []
+        self.requests = []
+        self._pending_pages = []
+
+    def _get_page(self, url, params, headers=None):
+        self.requested_urls.append(url)
+        self.requests.append((url, params, headers))
+        if not self._pending_pages:
+            round_pages = self.rounds.pop(0)
+            if round_pages == "expired":
+                raise DeltaLinkExpiredError("410 Gone")
+            self._pending_pages = list(round_pages)
+        return self._pending_pages.pop(0)
+
+
+def _user(user_id, name, department="Engineering"):
+    return {"id": user_id, "displayName": name, "mail": f"{user_id}@mpagroup.mx", "department": department}
+
+
+class TestDirectorySnapshot:
+    """
+    Tests del snapshot en memoria del directorio de Azure AD.
+    """
+
+    def test_full_sync_recorre_paginas_y_guarda_delta_link(self):
+        snapshot = FakeGraphSnapshot([[
+            {"value": [_user("u1", "Ana")], "@odata.nextLink": "https://graph/next"},
+            {"value": [_user("u2", "Beto")], "@odata.deltaLink": "https://graph/delta?token=1"},
+        ]])
+
+        users = snapshot.get_users()
+
+        assert sorted(u["id"] for u in users) == ["u1", "u2"]
+        assert snapshot.requested_urls == [GRAPH_USERS_DELTA_URL, "https://graph/next"]
+        assert snapshot.status()["has_delta_link"] is True
+
+    def test_delta_aplica_altas_cambios_y_bajas(self):
+        snapshot = FakeGraphSnapshot([
+            [{"value": [_user("u1", "Ana"), _user("u2", "Beto")], "@odata.deltaLink": "https://graph/delta?token=1"}],
+            [{"value": [
+                {"id": "u1", "jobTitle": "PSP Analyst"},
+                {"id": "u2", "@removed": {"reason": "deleted"}},
+                _user("u3", "Carla"),
+            ], "@odata.deltaLink": "https://graph/delta?token=2"}],
+        ])
+        snapshot.refresh()
+        snapshot.refresh()
+
+        users = {u["id"]: u for u in snapshot.get_users()}
+
+        assert set(users) == {"u1", "u3"}
+        # El cambio parcial conserva las propiedades previas
+        assert users["u1"]["displayName"] == "Ana"
+        assert users["u1"]["jobTitle"] == "PSP Analyst"
+        assert snapshot.requested_urls[-1] == "https://graph/delta?token=1"
+
+    def test_delta_link_expirado_hace_sincronizacion_completa(self):
+        snapshot = FakeGraphSnapshot([
+            [{"value": [_user("u1", "Ana")], "@odata.deltaLink": "https://graph/delta?token=1"}],
+            "expired",
+            [{"value": [_user("u9", "Zoe")], "@odata.deltaLink": "https://graph/delta?token=9"}],
+        ])
+        snapshot.refresh()
+        snapshot.refresh()
+
+        assert [u["id"] for u in snapshot.get_users()] == ["u9"]
+
+    def test_vista_se_cachea_hasta_que_cambia_el_directorio(self):
+        snapshot = FakeGraphSnapshot([
+            [{"value": [_user("u1", "Ana")], "@odata.deltaLink": "https://graph/delta?token=1"}],
+            [{"value": [], "@odata.deltaLink": "https://graph/delta?token=2"}],
+            [{"value": [_user("u2", "Beto")], "@odata.deltaLink": "https://graph/delta?token=3"}],
+        ])
+        builds = []
+
+        def build(users):
+            builds.append(1)
+            return sorted(u["id"] for u in users)
+
+        assert snapshot.get_view("ids", build) == ["u1"]
+        assert snapshot.get_view("ids", build) == ["u1"]
+        assert len(builds) == 1
+
+        # Una ronda delta sin cambios no invalida la vista
+        snapshot.refresh()
+        assert snapshot.get_view("ids", build) == ["u1"]
+        assert len(builds) == 1
+
+        snapshot.refresh()
+        assert snapshot.get_view("ids", build) == ["u1", "u2"]
+        assert len(builds) == 2
+
+    def test_snapshot_desactualizado_se_refresca_en_la_peticion(self):
+        snapshot = FakeGraphSnapshot([
+            [{"value": [_user("u1", "Ana")], "@odata.deltaLink": "https://graph/delta?token=1"}],
+            [{"value": [_user("u2", "Beto")], "@odata.deltaLink": "https://graph/delta?token=2"}],
+        ], max_staleness_seconds=0)
+
+        snapshot.get_users()
+        users = snapshot.get_users()
+
+        assert sorted(u["id"] for u in users) == ["u1", "u2"]
+
+
+def _scoped_user(user_id, department="Finanzas", job_title="Gerente", domain="@mpagroup.mx"):
+    return {
+        "id": user_id, "displayName": user_id, "mail": f"{user_id}{domain}",
+        "userPrincipalName": f"{user_id}{domain}", "department": department, "jobTitle": job_title
+    }
+
+
+class TestDirectorySnapshotScope:
+    """
+    Tests del snapshot limitado a los usuarios que pueden cumplir las reglas de elegibilidad.
+    """
+    rules = EligibilityRules(["@mpagroup.mx"], ["Operaciones", "Finanzas"], ["Gerente", "O'Brien"])
+
+    def test_filtro_de_graph_desde_las_reglas(self):
+        # La comilla simple se escapa duplicándola
+        assert self.rules.graph_filter() == (
+            "department in ('Operaciones','Finanzas') and jobTitle in ('Gerente','O''Brien')"
+        )
+        # Demasiados valores para un "in": la regla se evalúa solo en el cliente
+        many = EligibilityRules(["@mpagroup.mx"], [f"Depto {i}" for i in range(40)], ["Gerente"])
+        assert many.graph_filter() == "jobTitle in ('Gerente')"
+
+    def test_sync_completa_filtrada_en_el_servidor(self):
+        snapshot = FakeGraphSnapshot([
+            [{"value": [], "@odata.deltaLink": "https://graph/delta?token=latest"}],
+            [{"value": [_scoped_user("u1"), _scoped_user("u2", domain="@gmail.com")]}],
+        ])
+        snapshot.set_scope(self.rules.directory_scope)
+
+        users = snapshot.get_users()
+
+        # El dominio se filtra en el cliente
+        assert [u["id"] for u in users] == ["u1"]
+        (delta_url, delta_params, _), (users_url, users_params, headers) = snapshot.requests
+        assert delta_url == GRAPH_USERS_DELTA_URL and delta_params["$deltatoken"] == "latest"
+        assert users_url == GRAPH_USERS_URL
+        assert users_params["$filter"] == self.rules.graph_filter()
+        assert headers == {"ConsistencyLevel": "eventual"}
+        assert snapshot.status()["scope_filter"] == self.rules.graph_filter()
+
+    def test_delta_respeta_el_alcance(self):
+        snapshot = FakeGraphSnapshot([
+            [{"value": [], "@odata.deltaLink": "https://graph/delta?token=1"}],
+            [{"value": [_scoped_user("u1"), _scoped_user("u2")]}],
+            [{"value": [
+                # Sale del alcance por cambio de departamento
+                {"id": "u1", "department": "Legal"},
+                # Desconocido y excluido por sus propiedades parciales: no se descarga
+                {"id": "u3", "jobTitle": "Becario"},
+                # Desconocido con propiedades incompletas: se descarga completo
+                {"id": "u4", "department": "Operaciones"},
+            ], "@odata.deltaLink": "https://graph/delta?token=2"}],
+            [_scoped_user("u4", department="Operaciones")],
+        ])
+        snapshot.set_scope(self.rules.directory_scope)
+        snapshot.refresh()
+        snapshot.refresh()
+
+        assert sorted(u["id"] for u in snapshot.get_users()) == ["u2", "u4"]
+        assert snapshot.requested_urls[-1] == f"{GRAPH_USERS_URL}/u4"
+
+    def test_cambio_de_alcance_fuerza_sincronizacion_completa(self):
+        snapshot = FakeGraphSnapshot([
+            [{"value": [_user("u1", "Ana")], "@odata.deltaLink": "https://graph/delta?token=1"}],
+        ])
+        snapshot.refresh()
+        assert snapshot.status()["has_delta_link"] is True
+
+        snapshot.set_scope(None)
+        assert snapshot.status()["has_delta_link"] is True
+        snapshot.set_scope(self.rules.directory_scope)
+        assert snapshot.status()["has_delta_link"] is False
+
+    def test_busqueda_por_email_sin_sincronizar(self):
+        snapshot = FakeGraphSnapshot([
+            [{"value": [_scoped_user("u1")], "@odata.deltaLink": "https://graph/delta?token=1"}],
+        ])
+        assert snapshot.find_by_emails(["u1@mpagroup.mx"]) == {}
+        snapshot.refresh()
+
+        found = snapshot.find_by_emails(["u1@mpagroup.mx", "u2@mpagroup.mx"])
+        assert list(found) == ["u1@mpagroup.mx"]
+        assert len(snapshot.requested_urls) == 1
+
+    def test_cambio_de_alcance_durante_la_sincronizacion(self):
+        rules = self.rules
+
+        class ScopeChangingSnapshot(FakeGraphSnapshot):
+            """Otro hilo cambia el alcance mientras se descarga el tenant completo."""
+            def _get_page(self, url, params, headers=None):
+                page = super()._get_page(url, params, headers)
+                self.set_scope(rules.directory_scope)
+                return page
+
+        snapshot = ScopeChangingSnapshot([
+            [{"value": [_user("u1", "Ana")], "@odata.deltaLink": "https://graph/delta?token=1"}],
+        ])
+        snapshot.refresh()
+
+        # El resultado sin alcance no sobrescribe el reinicio de set_scope
+        status = snapshot.status()
+        assert (status["users"], status["has_delta_link"], status["age_seconds"]) == (0, False, None)
+
+    def test_sin_alcance_no_sincroniza_en_segundo_plano(self):
+        snapshot = FakeGraphSnapshot([])
+        attempts = []
+
+        def failing_provider():
+            attempts.append(1)
+            snapshot._stop_event.set()
+            raise Exception("BD no disponible")
+
+        snapshot._scope_provider = failing_provider
+        snapshot._run()
+
+        assert attempts == [1]
+        assert snapshot.requested_urls == []
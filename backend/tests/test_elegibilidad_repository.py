@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.elegibilidad_usuario import CAT_Elegibilidad_Usuario
+from app.repositories.elegibilidad_repository import ElegibilidadRepository
+
+
+def test_get_reglas_en_una_consulta():
+    engine = create_engine("sqlite://").execution_options(schema_translate_map={"BD_AppsHub.dbo": None})
+    Base.metadata.create_all(engine, tables=[CAT_Elegibilidad_Usuario.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        CAT_Elegibilidad_Usuario(Tipo_Regla="departamento", Valor="Finanzas", Activo=1, Prioridad=2),
+        CAT_Elegibilidad_Usuario(Tipo_Regla="departamento", Valor="Operaciones", Activo=1, Prioridad=1),
+        CAT_Elegibilidad_Usuario(Tipo_Regla="departamento", Valor="Legal", Activo=0, Prioridad=0),
+        CAT_Elegibilidad_Usuario(Tipo_Regla="dominio", Valor="@mpagroup.mx", Activo=1, Prioridad=0),
+    ])
+    db.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    reglas = ElegibilidadRepository(db).get_reglas()
+
+    assert reglas == {"dominio": ["@mpagroup.mx"], "departamento": ["Operaciones", "Finanzas"], "puesto": []}
+    assert len(statements) == 1
+    db.close()
@@ -0,0 +1,194 @@
+import sys
+import os
+import threading
+import time
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.events.domain_events import SolicitudCreada, SolicitudRechazada
+from app.events.event_dispatcher import EventDispatcher, Observer, handles
+from app.events.event_history import EventOutcome
+
+
+class MockSolicitud:
+    """Mock de TBL_CAF_Solicitud para testing."""
+    def __init__(self, id_solicitud=1):
+        self.id_solicitud = id_solicitud
+        self.Tipo_Contratacion = "Contrato de Obra"
+        self.Responsable = "responsable@mpagroup.mx"
+
+
+class SlowObserver(Observer):
+    """Observer que simula el envío de un correo lento."""
+    def __init__(self, delay=0.0, release: threading.Event = None):
+        self.delay = delay
+        self.release = release
+        self.handled = []
+        self.threads = set()
+
+    def can_handle(self, event_type):
+        return True
+
+    def handle(self, event):
+        if self.release:
+            self.release.wait(timeout=5)
+        time.sleep(self.delay)
+        self.threads.add(threading.current_thread().name)
+        self.handled.append(event.solicitud_id)
+
+
+class TestEventDispatcherAsync:
+    """
+    Tests del despacho asíncrono de eventos.
+    """
+
+    def test_dispatch_asincrono_no_espera_al_observer(self):
+        dispatcher = EventDispatcher()
+        observer = SlowObserver(delay=0.3)
+        dispatcher.subscribe(observer)
+        dispatcher.start_async(workers=1, max_queue_size=10)
+
+        inicio = time.monotonic()
+        dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(1)))
+        duracion = time.monotonic() - inicio
+
+        assert duracion < 0.1
+        dispatcher.shutdown(timeout=5)
+        assert observer.handled == [1]
+        assert observer.threads == {"event-worker-0"}
+
+    def test_shutdown_vacia_la_cola(self):
+        dispatcher = EventDispatcher()
+        observer = SlowObserver(delay=0.01)
+        dispatcher.subscribe(observer)
+        dispatcher.start_async(workers=2, max_queue_size=100)
+
+        for i in range(20):
+            dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(i)))
+        dispatcher.shutdown(timeout=5)
+
+        assert sorted(observer.handled) == list(range(20))
+        metrics = dispatcher.get_queue_metrics()
+        assert metrics["processed"] == 20
+        assert metrics["queue_depth"] == 0
+        assert metrics["mode"] == "sync"
+
+    def test_cola_llena_entrega_sincrona(self):
+        dispatcher = EventDispatcher()
+        release = threading.Event()
+        observer = SlowObserver(release=release)
+        dispatcher.subscribe(observer)
+        dispatcher.start_async(workers=1, max_queue_size=1, put_timeout=0.01)
+
+        # El worker queda bloqueado con el primer evento y el segundo ocupa la cola
+        dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(1)))
+        time.sleep(0.05)
+        dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(2)))
+        # El tercero no cabe: se entrega en el hilo actual en cuanto se libera el observer
+        threading.Timer(0.1, release.set).start()
+        dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(3)))
+        dispatcher.shutdown(timeout=5)
+
+        assert sorted(observer.handled) == [1, 2, 3]
+        assert "MainThread" in observer.threads
+        metrics = dispatcher.get_queue_metrics()
+        assert metrics["rejected_sync_fallback"] == 1
+        assert metrics["high_watermark"] == 1
+
+
+class TestEventHistory:
+    """
+    Tests del historial acotado de eventos.
+    """
+
+    def test_historial_acotado_desaloja_los_mas_antiguos(self):
+        dispatcher = EventDispatcher(history_capacity=5)
+        for i in range(12):
+            dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(i)))
+
+        records = dispatcher.get_event_history()
+        assert [r.solicitud_id for r in records] == [11, 10, 9, 8, 7]
+        assert dispatcher.get_history_stats() == {"stored": 5, "capacity": 5, "total_recorded": 12}
+        # Los índices también olvidan los registros desalojados
+        assert dispatcher.get_event_history(solicitud_id=3) == []
+        # Solo se guardan datos compactos, nunca la entidad
+        assert not hasattr(records[0], "solicitud")
+
+    def test_filtros_y_paginacion(self):
+        dispatcher = EventDispatcher(history_capacity=100)
+        dispatcher.subscribe(SlowObserver())
+        for i in range(10):
+            dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(i % 3)))
+        dispatcher.dispatch(SolicitudRechazada(solicitud=MockSolicitud(1), rechazado_por="admin", comentarios="Falta firma"))
+
+        por_solicitud = dispatcher.get_event_history(solicitud_id=1)
+        assert [r.seq for r in por_solicitud] == [10, 7, 4, 1]
+        assert dispatcher.get_event_history(solicitud_id=1, event_type="SolicitudRechazada")[0].seq == 10
+
+        pagina_1 = dispatcher.get_event_history(limit=4)
+        pagina_2 = dispatcher.get_event_history(limit=4, before=pagina_1[-1].seq)
+        assert [r.seq for r in pagina_1 + pagina_2] == list(range(10, 2, -1))
+
+    def test_resultado_de_la_entrega(self):
+        dispatcher = EventDispatcher()
+        dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(1)))
+        dispatcher.subscribe(SlowObserver())
+        dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(2)))
+
+        outcomes = {r.solicitud_id: r.outcome for r in dispatcher.get_event_history()}
+        assert outcomes == {1: EventOutcome.SIN_OBSERVERS, 2: EventOutcome.ENTREGADO}
+
+
+class EmailLikeObserver(Observer):
+    """Observer con handlers por evento declarados con @handles."""
+    def __init__(self):
+        self.received = []
+
+    @handles(SolicitudCreada)
+    def on_creada(self, event):
+        self.received.append(("creada", event.solicitud_id))
+
+    @handles(SolicitudRechazada)
+    def on_rechazada(self, event):
+        raise Exception("SMTP caído")
+
+
+class SolicitudCreadaUrgente(SolicitudCreada):
+    """Subclase de evento para probar el enrutamiento por MRO."""
+
+
+class TestObserverRouting:
+    """
+    Tests de la tabla de rutas del dispatcher.
+    """
+
+    def test_rutas_por_tipo_y_mro(self):
+        dispatcher = EventDispatcher()
+        observer = EmailLikeObserver()
+        todos = SlowObserver()
+        dispatcher.subscribe(observer)
+        dispatcher.subscribe(todos)
+
+        routes = dispatcher.get_routing_table()
+        assert routes["SolicitudCreada"] == ["EmailLikeObserver", "SlowObserver"]
+        assert routes["SolicitudAprobada"] == ["SlowObserver"]
+
+        dispatcher.dispatch(SolicitudCreadaUrgente(solicitud=MockSolicitud(7)))
+        assert observer.received == [("creada", 7)]
+        assert todos.handled == [7]
+
+        dispatcher.unsubscribe(todos)
+        assert dispatcher.get_routing_table()["SolicitudCreada"] == ["EmailLikeObserver"]
+
+    def test_estadisticas_por_observer(self):
+        dispatcher = EventDispatcher()
+        dispatcher.subscribe(EmailLikeObserver())
+        dispatcher.dispatch(SolicitudCreada(solicitud=MockSolicitud(1)))
+        errors = dispatcher.deliver(SolicitudRechazada(solicitud=MockSolicitud(1), rechazado_por="admin", comentarios="x"))
+
+        assert errors == ["EmailLikeObserver: SMTP caído"]
+        stats = dispatcher.get_observer_stats()["EmailLikeObserver"]
+        assert stats["calls"] == 2
+        assert stats["errors"] == 1
+        assert stats["last_error"] == "EmailLikeObserver: SMTP caído"
@@ -0,0 +1,107 @@
+import sys
+import os
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import graph_auth
+from app.core.graph_auth import GraphTokenProvider, get_graph_token_provider
+from app.core.graph_client import GraphClient
+
+
+class FakeMsalApp:
+    """Simula msal.ConfidentialClientApplication contando las solicitudes de token."""
+
+    def __init__(self, expires_in=3600):
+        self.calls = 0
+        self.expires_in = expires_in
+
+    def acquire_token_for_client(self, scopes):
+        self.calls += 1
+        return {"access_token": f"token-{self.calls}", "expires_in": self.expires_in}
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def _provider(expires_in=3600):
+    provider = GraphTokenProvider("client", "secret", "https://login/tenant", ["scope"])
+    provider._app = FakeMsalApp(expires_in)
+    return provider
+
+
+class TestGraphTokenProvider:
+    """
+    Tests del proveedor compartido de tokens de Graph.
+    """
+
+    def test_reutiliza_token_vigente(self):
+        provider = _provider()
+
+        assert provider.get_token() == "token-1"
+        assert provider.get_token() == "token-1"
+        assert provider._app.calls == 1
+
+    def test_token_por_expirar_se_renueva(self):
+        provider = _provider(expires_in=graph_auth.MIN_VALIDITY_SECONDS - 1)
+
+        assert provider.get_token() == "token-1"
+        assert provider.get_token() == "token-2"
+
+    def test_reintenta_una_vez_con_token_nuevo_ante_401(self):
+        provider = _provider()
+        tokens_usados = []
+
+        def send(token):
+            tokens_usados.append(token)
+            return FakeResponse(401 if len(tokens_usados) == 1 else 200)
+
+        response = provider.call_with_token(send)
+
+        assert response.status_code == 200
+        assert tokens_usados == ["token-1", "token-2"]
+
+    def test_una_instancia_por_authority_y_client(self):
+        config = {"client_id": "c1", "client_secret": "s", "authority": "https://login/t1", "scope": ["x"]}
+        otro = dict(config, client_id="c2")
+
+        assert get_graph_token_provider(config) is get_graph_token_provider(dict(config))
+        assert get_graph_token_provider(config) is not get_graph_token_provider(otro)
+
+
+class FakeSession:
+    """Simula la sesión HTTP persistente registrando las peticiones."""
+
+    def __init__(self, status_codes):
+        self.status_codes = list(status_codes)
+        self.requests = []
+
+    def request(self, method, url, params=None, json=None, headers=None, timeout=None):
+        self.requests.append({"method": method, "url": url, "headers": headers, "timeout": timeout})
+        return FakeResponse(self.status_codes.pop(0))
+
+
+class TestGraphClient:
+    """
+    Tests del cliente HTTP compartido de Graph.
+    """
+
+    def test_sesion_con_pool_por_host(self):
+        client = GraphClient(_provider(), pool_connections=2, pool_maxsize=7)
+        adapter = client._session.get_adapter("https://graph.microsoft.com/v1.0/users")
+
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 7
+        assert "gzip" in client._session.headers["Accept-Encoding"]
+
+    def test_peticion_autenticada_con_timeout_y_reintento_401(self):
+        client = GraphClient(_provider(), connect_timeout=3, read_timeout=10)
+        client._session = FakeSession([401, 200])
+
+        response = client.get("https://graph.microsoft.com/v1.0/users")
+
+        assert response.status_code == 200
+        assert [r["headers"]["Authorization"] for r in client._session.requests] == ["Bearer token-1", "Bearer token-2"]
+        assert client._session.requests[0]["timeout"] == (3, 10)
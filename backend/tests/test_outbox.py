@@ -0,0 +1,219 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.events.domain_events import SolicitudCreada, SolicitudAprobada, deserialize_event
+from app.events.event_dispatcher import EventDispatcher, Observer
+from app.events.outbox_relay import OutboxRelay, ensure_outbox_available
+from app.models.caf_solicitud import TBL_CAF_Solicitud
+from app.models.outbox import TBL_CAF_Outbox, OutboxStatus
+from app.services.caf_solicitud_service import CafSolicitudService
+
+
+class RecordingObserver(Observer):
+    """Observer que registra los eventos y puede simular fallos de envío."""
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.events = []
+
+    def can_handle(self, event_type):
+        return True
+
+    def handle(self, event):
+        if self.fail:
+            raise Exception("Graph no disponible")
+        self.events.append(event)
+
+
+@pytest.fixture
+def session_factory(sqlite_engine):
+    return sessionmaker(bind=sqlite_engine, autocommit=False, autoflush=False)
+
+
+def _relay(session_factory, observer, **kwargs):
+    dispatcher = EventDispatcher()
+    dispatcher.subscribe(observer)
+    return OutboxRelay(session_factory=session_factory, dispatcher=dispatcher, **kwargs)
+
+
+class TestOutbox:
+    """
+    Tests del outbox transaccional y su relay sobre SQLite.
+    """
+
+    def test_create_guarda_evento_en_la_misma_transaccion(self, session_factory):
+        db = session_factory()
+        solicitud = CafSolicitudService().create(db, {
+            "Tipo_Contratacion": "Contrato de Obra",
+            "Responsable": "responsable@mpagroup.mx",
+            "Usuario": "solicitante@mpagroup.mx",
+            "Building": "BLDG01",
+        })
+        db.close()
+
+        db = session_factory()
+        entries = db.query(TBL_CAF_Outbox).all()
+        assert len(entries) == 1
+        assert entries[0].Tipo_Evento == "SolicitudCreada"
+        assert entries[0].id_solicitud == solicitud.id_solicitud
+        assert entries[0].Estado == OutboxStatus.pendiente.value
+
+        event = deserialize_event(entries[0].Tipo_Evento, entries[0].Payload)
+        assert isinstance(event, SolicitudCreada)
+        assert event.solicitud_id == solicitud.id_solicitud
+        assert event.responsable == "responsable@mpagroup.mx"
+        assert event.solicitud.Building == "BLDG01"
+        db.close()
+
+    def test_rollback_descarta_el_evento(self, session_factory):
+        db = session_factory()
+        solicitud = TBL_CAF_Solicitud(Tipo_Contratacion="Orden de Servicio")
+        db.add(solicitud)
+        db.flush()
+        CafSolicitudService()._stage_event(db, SolicitudCreada(solicitud=solicitud))
+        db.rollback()
+
+        assert db.query(TBL_CAF_Outbox).count() == 0
+        db.close()
+
+    def test_relay_entrega_y_marca_entregado(self, session_factory):
+        db = session_factory()
+        solicitud = CafSolicitudService().create(db, {"Tipo_Contratacion": "Orden de Cambio"})
+        CafSolicitudService().approve_or_reject(db, solicitud.id_solicitud, "aprobado", row_version=solicitud.RowVersion)
+        db.close()
+
+        observer = RecordingObserver()
+        relay = _relay(session_factory, observer)
+        assert relay.process_batch() == 2
+        assert relay.process_batch() == 0
+
+        assert [type(e) for e in observer.events] == [SolicitudCreada, SolicitudAprobada]
+        assert observer.events[1].solicitud.approve == 1
+
+        db = session_factory()
+        estados = {e.Estado for e in db.query(TBL_CAF_Outbox).all()}
+        assert estados == {OutboxStatus.entregado.value}
+        db.close()
+
+    def test_fallo_reintenta_con_backoff_y_luego_marca_fallido(self, session_factory):
+        db = session_factory()
+        CafSolicitudService().create(db, {"Tipo_Contratacion": "Pago a Dependencia"})
+        db.close()
+
+        relay = _relay(session_factory, RecordingObserver(fail=True), max_attempts=2, backoff_base_seconds=60)
+        assert relay.process_batch() == 1
+
+        db = session_factory()
+        entry = db.query(TBL_CAF_Outbox).one()
+        assert entry.Estado == OutboxStatus.pendiente.value
+        assert entry.Intentos == 1
+        assert entry.Proximo_Intento > datetime.now() + timedelta(seconds=30)
+        assert "Graph no disponible" in entry.Ultimo_Error
+        db.close()
+
+        # Aún no toca reintentar
+        assert relay.process_batch() == 0
+
+        db = session_factory()
+        db.query(TBL_CAF_Outbox).update({"Proximo_Intento": datetime.now() - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+
+        assert relay.process_batch() == 1
+        db = session_factory()
+        entry = db.query(TBL_CAF_Outbox).one()
+        assert entry.Estado == OutboxStatus.fallido.value
+        assert entry.Intentos == 2
+        db.close()
+
+    def test_bloqueo_vencido_se_vuelve_a_reclamar(self, session_factory):
+        db = session_factory()
+        CafSolicitudService().create(db, {"Tipo_Contratacion": "Firma de Documento"})
+        db.query(TBL_CAF_Outbox).update({
+            "Estado": OutboxStatus.procesando.value,
+            "Bloqueado_Hasta": datetime.now() - timedelta(seconds=1),
+        })
+        db.commit()
+        db.close()
+
+        observer = RecordingObserver()
+        assert _relay(session_factory, observer).process_batch() == 1
+        assert len(observer.events) == 1
+
+    def test_reintento_omite_los_observers_que_ya_entregaron(self, session_factory):
+        db = session_factory()
+        CafSolicitudService().create(db, {"Tipo_Contratacion": "Pago a Dependencia"})
+        db.close()
+
+        class FlakyObserver(RecordingObserver):
+            """Falla en el primer intento."""
+            def handle(self, event):
+                if not self.fail:
+                    self.fail = True
+                    raise Exception("Graph no disponible")
+                self.events.append(event)
+
+        mailer, flaky = RecordingObserver(), FlakyObserver()
+        relay = _relay(session_factory, mailer, backoff_base_seconds=60)
+        relay.dispatcher.subscribe(flaky)
+
+        assert relay.process_batch() == 1
+        db = session_factory()
+        entry = db.query(TBL_CAF_Outbox).one()
+        assert (entry.Estado, entry.Observers_Entregados) == (OutboxStatus.pendiente.value, "RecordingObserver")
+        entry.Proximo_Intento = datetime.now() - timedelta(seconds=1)
+        db.commit()
+        db.close()
+
+        assert relay.process_batch() == 1
+        # El reintento solo llama al observer que falló: sin correo duplicado
+        assert (len(mailer.events), len(flaky.events)) == (1, 1)
+        db = session_factory()
+        entry = db.query(TBL_CAF_Outbox).one()
+        assert entry.Estado == OutboxStatus.entregado.value
+        assert entry.Observers_Entregados == "FlakyObserver,RecordingObserver"
+        db.close()
+
+    def test_bloqueo_perdido_no_duplica_la_entrega(self, session_factory):
+        db = session_factory()
+        service = CafSolicitudService()
+        service.create(db, {"Tipo_Contratacion": "Contrato de Obra"})
+        service.create(db, {"Tipo_Contratacion": "Orden de Servicio"})
+        db.close()
+
+        class StealingObserver(RecordingObserver):
+            """Mientras entrega el primer evento, otro relay reclama ambos (bloqueo vencido)."""
+            def handle(self, event):
+                super().handle(event)
+                other = session_factory()
+                other.query(TBL_CAF_Outbox).update({"Reclamado_Por": "otro-relay"})
+                other.commit()
+                other.close()
+
+        observer = StealingObserver()
+        assert _relay(session_factory, observer).process_batch() == 2
+
+        # El segundo evento no se entrega y el primero no se marca: los registra el otro relay
+        assert len(observer.events) == 1
+        db = session_factory()
+        assert {e.Estado for e in db.query(TBL_CAF_Outbox).all()} == {OutboxStatus.procesando.value}
+        db.close()
+
+    def test_tabla_inexistente_deshabilita_el_outbox(self, monkeypatch):
+        monkeypatch.setattr(settings, "OUTBOX_ENABLED", True)
+        assert ensure_outbox_available(create_engine("sqlite://")) is False
+        assert settings.OUTBOX_ENABLED is False
+
+        monkeypatch.setattr(settings, "OUTBOX_ENABLED", True)
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine, tables=[TBL_CAF_Outbox.__table__])
+        assert ensure_outbox_available(engine) is True
@@ -0,0 +1,67 @@
+import sys
+import os
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app.core.responses import FastJSONResponse, dumps
+from app.models.caf_solicitud import SolicitudStatus
+from app.schemas.user import User, UserListResponse
+
+
+class TestFastJSONResponse:
+    """
+    Tests de la respuesta JSON serializada con orjson.
+    """
+
+    def test_mismo_json_que_jsonable_encoder(self):
+        users = UserListResponse(total=1, users=[
+            User(id="1", display_name="José Núñez", email="jose@mpagroup.mx", job_title=None, department="Finanzas")
+        ])
+        content = {
+            "users": users,
+            "fecha": date(2024, 3, 1),
+            "creado": datetime(2024, 3, 1, 10, 30, 5, 120),
+            "monto": Decimal("1250.75"),
+            "cantidad": Decimal("3"),
+            "estados": {SolicitudStatus.aprobado.value: "aprobado"},
+            "tags": {"a"},
+        }
+        assert json.loads(dumps(content)) == json.loads(json.dumps(jsonable_encoder(content)))
+
+    def test_tipo_no_soportado(self):
+        with pytest.raises(TypeError):
+            dumps({"valor": object()})
+
+    def test_default_response_class(self):
+        app = FastAPI(default_response_class=FastJSONResponse)
+
+        @app.get("/fecha")
+        def fecha():
+            return {"fecha": date(2024, 1, 2), "monto": Decimal("10.5")}
+
+        response = TestClient(app).get("/fecha")
+        assert response.headers["content-type"] == "application/json"
+        assert response.content == b'{"fecha":"2024-01-02","monto":10.5}'
+
+    def test_decimal_y_datetime_en_respuesta(self):
+        response = FastJSONResponse({
+            "creado": datetime(2024, 3, 1, 10, 30, 5, 120),
+            "aprobado": datetime(2024, 3, 2, 8, 0, tzinfo=timezone.utc),
+            "monto": Decimal("1250.75"),
+            "cantidad": Decimal("3"),
+        })
+        assert response.body == (
+            b'{"creado":"2024-03-01T10:30:05.000120",'
+            b'"aprobado":"2024-03-02T08:00:00+00:00",'
+            b'"monto":1250.75,"cantidad":3}'
+        )
+        assert response.headers["content-length"] == str(len(response.body))
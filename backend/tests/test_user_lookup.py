@@ -0,0 +1,131 @@
+import sys
+import os
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from urllib.parse import unquote
+
+import pytest
+
+from app.core.cache import MISSING, TTLCache
+from app.services import user_service
+from app.services.eligibility_rules import EligibilityRules
+from app.services.user_service import UserService
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeGraphClient:
+    """Responde $batch desde un directorio simulado y registra cada petición."""
+    def __init__(self, directory, throttled=()):
+        self.directory = directory
+        self.throttled = set(throttled)
+        self.batches = []
+
+    def post(self, url, json=None, headers=None):
+        self.batches.append(json["requests"])
+        responses = []
+        for request in json["requests"]:
+            email = unquote(request["url"]).split("mail eq '")[1].split("'")[0]
+            if email in self.throttled:
+                responses.append({"id": request["id"], "status": 429, "body": {}})
+                continue
+            user = self.directory.get(email)
+            responses.append({"id": request["id"], "status": 200, "body": {"value": [user] if user else []}})
+        return FakeResponse(200, {"responses": responses})
+
+
+class FakeSnapshot:
+    def __init__(self, users=()):
+        self.users = {user["mail"]: user for user in users}
+
+    def find_by_emails(self, emails):
+        return {email: self.users[email] for email in emails if email in self.users}
+
+
+def _graph_user(user_id, email):
+    return {"id": user_id, "displayName": user_id, "mail": email, "jobTitle": "Gerente", "department": "Finanzas"}
+
+
+@pytest.fixture
+def lookup(monkeypatch):
+    directory = {f"u{i}@mpagroup.mx": _graph_user(f"u{i}", f"u{i}@mpagroup.mx") for i in range(30)}
+    graph = FakeGraphClient(directory, throttled={"u29@mpagroup.mx"})
+    snapshot = FakeSnapshot([_graph_user("s1", "s1@mpagroup.mx")])
+    cache = TTLCache(maxsize=100, ttl_seconds=900)
+    rules = EligibilityRules(["@mpagroup.mx"], ["Finanzas"], ["Gerente"])
+
+    monkeypatch.setattr(user_service, "get_graph_client", lambda: graph)
+    monkeypatch.setattr(user_service, "get_directory_snapshot", lambda: snapshot)
+    monkeypatch.setattr(user_service, "get_user_lookup_cache", lambda: cache)
+    monkeypatch.setattr(UserService, "get_rules", lambda self: rules)
+    return UserService(db=None), graph, cache
+
+
+class TestTTLCache:
+    """
+    Tests de la caché LRU con TTL.
+    """
+
+    def test_lru_descarta_la_entrada_menos_usada(self):
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+    def test_expiracion_y_valores_negativos(self):
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        cache.set("nadie@mpagroup.mx", None, ttl_seconds=0.01)
+        assert cache.get("nadie@mpagroup.mx") is None
+        time.sleep(0.02)
+        assert cache.get("nadie@mpagroup.mx") is MISSING
+
+
+class TestUserLookup:
+    """
+    Tests de la búsqueda de usuarios por email en lote.
+    """
+
+    def test_un_batch_para_varios_emails(self, lookup):
+        service, graph, _ = lookup
+        result = service.get_users_by_email(["U1@mpagroup.mx", "u2@mpagroup.mx", "s1@mpagroup.mx", "x@gmail.com", "nadie@mpagroup.mx"])
+
+        assert result["u1@mpagroup.mx"]["id"] == "u1"
+        assert result["u2@mpagroup.mx"]["email"] == "u2@mpagroup.mx"
+        # Resuelto desde el snapshot, sin Graph
+        assert result["s1@mpagroup.mx"]["id"] == "s1"
+        # Dominio no permitido: ni siquiera se consulta
+        assert result["x@gmail.com"] is None
+        assert result["nadie@mpagroup.mx"] is None
+        assert len(graph.batches) == 1
+        assert len(graph.batches[0]) == 3
+
+    def test_cache_positiva_y_negativa(self, lookup):
+        service, graph, _ = lookup
+        service.get_users_by_email(["u1@mpagroup.mx", "nadie@mpagroup.mx"])
+        assert service.get_user_by_email("U1@MPAgroup.mx")["id"] == "u1"
+        assert service.get_user_by_email("nadie@mpagroup.mx") is None
+        assert len(graph.batches) == 1
+
+    def test_lotes_de_20_y_errores_sin_cachear(self, lookup):
+        service, graph, cache = lookup
+        emails = [f"u{i}@mpagroup.mx" for i in range(30)]
+        result = service.get_users_by_email(emails)
+
+        assert [len(batch) for batch in graph.batches] == [20, 10]
+        assert sum(1 for user in result.values() if user) == 29
+        # 429 para u29: no queda cacheado como inexistente
+        assert cache.get("u29@mpagroup.mx") is MISSING
@@ -0,0 +1,99 @@
+import sys
+import os
+
+# Agregar el directorio del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+
+import pytest
+
+from app.services.user_search import InvalidCursorError, UserSearchIndex, tokenize
+
+PRIORIDAD = {"Operaciones": 0, "Finanzas": 1}
+
+
+def _priority(department):
+    return PRIORIDAD.get(department, 999)
+
+
+def _user(user_id, name, email, department="Finanzas"):
+    return {"id": user_id, "display_name": name, "email": email, "job_title": "Gerente", "department": department}
+
+
+USERS = [
+    _user("1", "José Pérez", "jose.perez@mpagroup.mx"),
+    _user("2", "Ana López", "ana.lopez@mpagroup.mx", "Operaciones"),
+    _user("3", "Andrés Ruiz", "aruiz@mpagroup.mx"),
+    _user("4", "Beatriz Anaya", "banaya@mpagroup.mx", "Operaciones"),
+    _user("5", "Carla Díaz", "cdiaz@mpagroup.mx", "Legal"),
+]
+
+
+class TestUserSearchIndex:
+    """
+    Tests del índice de búsqueda en memoria de /users.
+    """
+
+    def test_tokens_normalizados(self):
+        assert tokenize("José.Pérez@MPAgroup.mx") == ["jose", "perez", "mpagroup", "mx"]
+
+    def test_busqueda_por_prefijo_en_nombre_y_email(self):
+        index = UserSearchIndex(USERS, _priority)
+
+        # Orden: prioridad de departamento y luego nombre
+        assert [u["id"] for u in index.search(q="an")["users"]] == ["2", "4", "3"]
+        assert [u["id"] for u in index.search(q="jose")["users"]] == ["1"]
+        assert [u["id"] for u in index.search(q="perez jo")["users"]] == ["1"]
+        assert [u["id"] for u in index.search(q="aruiz")["users"]] == ["3"]
+        assert index.search(q="zzz") == {"total": 0, "users": [], "next_cursor": None}
+
+    def test_filtro_por_departamento(self):
+        index = UserSearchIndex(USERS, _priority)
+        result = index.search(q="an", department="operaciones")
+        assert [u["id"] for u in result["users"]] == ["2", "4"]
+        assert index.search(department="Legal")["total"] == 1
+
+    def test_paginacion_con_cursor(self):
+        index = UserSearchIndex(USERS, _priority)
+        seen = []
+        cursor = None
+        while True:
+            page = index.search(limit=2, cursor=cursor)
+            assert page["total"] == 5
+            seen.extend(u["id"] for u in page["users"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == ["2", "4", "3", "1", "5"]
+
+    def test_cursor_sobrevive_reconstruccion_del_indice(self):
+        page = UserSearchIndex(USERS, _priority).search(limit=2)
+        # Se agrega un usuario que ordena antes del cursor: no se repiten ni se saltan los demás
+        rebuilt = UserSearchIndex(USERS + [_user("6", "Aarón Gil", "agil@mpagroup.mx", "Operaciones")], _priority)
+        assert [u["id"] for u in rebuilt.search(limit=10, cursor=page["next_cursor"])["users"]] == ["3", "1", "5"]
+
+    def test_cursor_invalido(self):
+        index = UserSearchIndex(USERS, _priority)
+        with pytest.raises(InvalidCursorError):
+            index.search(cursor="no-es-un-cursor")
+
+    def test_latencia_type_ahead(self):
+        departments = ["Operaciones", "Finanzas", "Legal", "Compras"]
+        users = [
+            _user(str(i), f"Nombre{i % 997} Apellido{i % 331}", f"usuario{i}@mpagroup.mx", departments[i % 4])
+            for i in range(20000)
+        ]
+        index = UserSearchIndex(users, _priority)
+
+        timings = []
+        for query in ("n", "nombre1", "apellido3 nombre", "usuario199"):
+            started = time.perf_counter()
+            result = index.search(q=query, limit=20)
+            timings.append(time.perf_counter() - started)
+            assert len(result["users"]) <= 20
+        # Respuesta de una página de 20 vs la lista completa
+        page_bytes = len(json.dumps(index.search(q="nombre12", limit=20)))
+        assert page_bytes * 50 < len(json.dumps(users))
+        assert max(timings) < 0.010, f"{max(timings) * 1000:.1f} ms"
@@ -109,7 +109,9 @@ const ApprovalActions: React.FC<ApprovalActionsProps> = ({
     try {
       const result = await cafSolicitudService.approveOrRejectSolicitud(
         solicitudId,
-        "aprobado"
+        "aprobado",
+        undefined,
+        solicitudData?.RowVersion
       );
 
       setSuccess(`✅ Solicitud #${solicitudId} aprobada exitosamente`);
@@ -151,7 +153,8 @@ const ApprovalActions: React.FC<ApprovalActionsProps> = ({
       const result = await cafSolicitudService.approveOrRejectSolicitud(
         solicitudId,
         "requiere_correcciones",
-        comentarios
+        comentarios,
+        solicitudData?.RowVersion
       );
 
       setSuccess(`📝 Solicitud #${solicitudId} marcada para correcciones`);
@@ -194,7 +197,8 @@ const ApprovalActions: React.FC<ApprovalActionsProps> = ({
       const result = await cafSolicitudService.approveOrRejectSolicitud(
         solicitudId,
         "rechazado_definitivo",
-        comentarios.trim() || undefined
+        comentarios.trim() || undefined,
+        solicitudData?.RowVersion
       );
 
       setSuccess(`❌ Solicitud #${solicitudId} rechazada definitivamente`);
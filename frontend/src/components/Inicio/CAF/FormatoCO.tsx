@@ -160,16 +160,17 @@ const FormatoCO: React.FC<Props> = ({ tipoContrato }) => {
     setLoading(true);
 
     try {
-      const solicitudData = mapFormatoCOToAPI(formData);
+      const apiData = mapFormatoCOToAPI(formData);
 
       if (isEditMode && id) {
         // Modo edición: actualizar solicitud existente
-        const response = await cafSolicitudService.updateSolicitud(parseInt(id), solicitudData);
+        const response = await cafSolicitudService.updateSolicitud(parseInt(id), apiData, solicitudData?.RowVersion);
+        setSolicitudData(response); // RowVersion nuevo para el siguiente guardado
         setSuccess(`Solicitud CAF actualizada exitosamente con ID: ${response.id_solicitud}`);
         console.log("Solicitud actualizada:", response);
       } else {
         // Modo creación: crear nueva solicitud
-        const response = await cafSolicitudService.createSolicitudCO(solicitudData);
+        const response = await cafSolicitudService.createSolicitudCO(apiData);
         setSuccess(`Solicitud CAF creada exitosamente con ID: ${response.id_solicitud}`);
         console.log("Solicitud creada:", response);
       }
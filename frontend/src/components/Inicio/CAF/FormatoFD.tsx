@@ -136,14 +136,15 @@ const FormatoFD: React.FC<Props> = ({ tipoContrato }) => {
     setLoading(true);
 
     try {
-      const solicitudData = mapFormatoFDToAPI(formData);
+      const apiData = mapFormatoFDToAPI(formData);
 
       if (isEditMode && id) {
-        const response = await cafSolicitudService.updateSolicitud(parseInt(id), solicitudData);
+        const response = await cafSolicitudService.updateSolicitud(parseInt(id), apiData, solicitudData?.RowVersion);
+        setSolicitudData(response); // RowVersion nuevo para el siguiente guardado
         setSuccess(`Solicitud CAF actualizada exitosamente con ID: ${response.id_solicitud}`);
         console.log("Solicitud actualizada:", response);
       } else {
-        const response = await cafSolicitudService.createSolicitudFD(solicitudData);
+        const response = await cafSolicitudService.createSolicitudFD(apiData);
         setSuccess(`Solicitud CAF creada exitosamente con ID: ${response.id_solicitud}`);
         console.log("Solicitud creada:", response);
       }
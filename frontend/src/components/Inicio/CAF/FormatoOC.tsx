@@ -150,14 +150,15 @@ const FormatoOC: React.FC<Props> = ({ tipoContrato }) => {
     setLoading(true);
 
     try {
-      const solicitudData = mapFormatoOCToAPI(formData);
+      const apiData = mapFormatoOCToAPI(formData);
       
       if (isEditMode && id) {
-        const response = await cafSolicitudService.updateSolicitud(parseInt(id), solicitudData);
+        const response = await cafSolicitudService.updateSolicitud(parseInt(id), apiData, solicitudData?.RowVersion);
+        setSolicitudData(response); // RowVersion nuevo para el siguiente guardado
         setSuccess(`Solicitud CAF actualizada exitosamente con ID: ${response.id_solicitud}`);
         console.log("Solicitud actualizada:", response);
       } else {
-        const response = await cafSolicitudService.createSolicitudOC(solicitudData);
+        const response = await cafSolicitudService.createSolicitudOC(apiData);
         setSuccess(`Solicitud CAF creada exitosamente con ID: ${response.id_solicitud}`);
         console.log("Solicitud creada:", response);
       }
@@ -140,14 +140,15 @@ const FormatoOS: React.FC<Props> = ({ tipoContrato }) => {
     setLoading(true);
 
     try {
-      const solicitudData = mapFormatoOSToAPI(formData);
+      const apiData = mapFormatoOSToAPI(formData);
 
       if (isEditMode && id) {
-        const response = await cafSolicitudService.updateSolicitud(parseInt(id), solicitudData);
+        const response = await cafSolicitudService.updateSolicitud(parseInt(id), apiData, solicitudData?.RowVersion);
+        setSolicitudData(response); // RowVersion nuevo para el siguiente guardado
         setSuccess(`Solicitud CAF actualizada exitosamente con ID: ${response.id_solicitud}`);
         console.log("Solicitud actualizada:", response);
       } else {
-        const response = await cafSolicitudService.createSolicitudOS(solicitudData);
+        const response = await cafSolicitudService.createSolicitudOS(apiData);
         setSuccess(`Solicitud CAF creada exitosamente con ID: ${response.id_solicitud}`);
         console.log("Solicitud creada:", response);
       }
@@ -2,6 +2,7 @@ import axios, { AxiosInstance } from 'axios';
 import { 
   CAFSolicitud, 
   CAFSolicitudResponse,
+  CAFSolicitudListResponse,
   CAFSolicitudCO,
   CAFSolicitudOS,
   CAFSolicitudOC,
@@ -59,11 +60,13 @@ class CAFSolicitudService {
 
   /**
    * Obtener detalle de una solicitud por ID
+   * @param fields Columnas a traer (default: todas); id_solicitud siempre se incluye
    */
-  async getSolicitudById(id: number): Promise<CAFSolicitudResponse> {
+  async getSolicitudById(id: number, fields?: string[]): Promise<CAFSolicitudResponse> {
     try {
       const response = await this.api.get<CAFSolicitudResponse>(
-        `/caf-solicitud/${id}`
+        `/caf-solicitud/${id}`,
+        { params: fields ? { fields: fields.join(',') } : undefined }
       );
       return response.data;
     } catch (error) {
@@ -73,16 +76,22 @@ class CAFSolicitudService {
   }
 
   /**
-   * Listar todas las solicitudes
+   * Listar solicitudes (más recientes primero) con paginación por cursor.
+   * Para la siguiente página enviar `cursor` = `next_cursor` de la respuesta.
    */
   async listSolicitudes(params?: {
-    skip?: number;
-    limit?: number;
-    tipo_contratacion?: string;
+    approve?: 'pendiente' | 'requiere_correcciones' | 'aprobado' | 'rechazado_definitivo';
     responsable?: string;
-  }): Promise<CAFSolicitudResponse[]> {
+    usuario?: string;
+    building?: string;
+    tipo?: string;
+    fecha_desde?: string;
+    fecha_hasta?: string;
+    limit?: number;
+    cursor?: number;
+  }): Promise<CAFSolicitudListResponse> {
     try {
-      const response = await this.api.get<CAFSolicitudResponse[]>(
+      const response = await this.api.get<CAFSolicitudListResponse>(
         '/caf-solicitud',
         { params }
       );
@@ -95,15 +104,18 @@ class CAFSolicitudService {
 
   /**
    * Actualizar una solicitud existente
+   * 
+   * @param rowVersion RowVersion del detalle (obligatorio); si otro usuario la modificó, el backend responde 409
    */
   async updateSolicitud(
     id: number,
-    data: Partial<CAFSolicitud>
+    data: Partial<CAFSolicitud>,
+    rowVersion?: number
   ): Promise<CAFSolicitudResponse> {
     try {
       const response = await this.api.put<CAFSolicitudResponse>(
         `/caf-solicitud/${id}`,
-        data
+        { ...data, RowVersion: rowVersion }
       );
       return response.data;
     } catch (error) {
@@ -119,11 +131,14 @@ class CAFSolicitudService {
    * - 'requiere_correcciones': Solicita correcciones (comentarios OBLIGATORIOS)
    * - 'aprobado': Aprueba definitivamente
    * - 'rechazado_definitivo': Rechaza definitivamente (comentarios OPCIONALES)
+   * 
+   * @param rowVersion RowVersion del detalle (obligatorio); evita sobrescribir la decisión de otro aprobador
    */
   async approveOrRejectSolicitud(
     id: number,
     approve: 'requiere_correcciones' | 'aprobado' | 'rechazado_definitivo',
-    comentarios?: string
+    comentarios?: string,
+    rowVersion?: number
   ): Promise<any> {
     try {
       const payload: any = { approve };
@@ -133,6 +148,9 @@ class CAFSolicitudService {
         payload.comentarios = comentarios;
       }
       
+      // Versión leída con la solicitud (obligatoria): si otro aprobador la cambió, el backend responde 409
+      payload.row_version = rowVersion;
+      
       const response = await this.api.patch(
         `/caf-solicitud/${id}/approval`,
         payload
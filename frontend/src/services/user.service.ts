@@ -11,6 +11,18 @@ export interface User {
 export interface UserListResponse {
   total: number;
   users: User[];
+  next_cursor?: string | null;
+}
+
+export interface UserLookupResponse {
+  users: Record<string, User | null>;
+}
+
+export interface UserSearchParams {
+  q?: string;
+  department?: string;
+  limit?: number;
+  cursor?: string;
 }
 
 class UserService {
@@ -52,6 +64,22 @@ class UserService {
     }
   }
 
+  /**
+   * Búsqueda paginada de usuarios (type-ahead)
+   * Usar next_cursor de la respuesta para pedir la siguiente página
+   */
+  async searchUsers(params: UserSearchParams): Promise<UserListResponse> {
+    try {
+      const response = await this.api.get<UserListResponse>('/users', {
+        params: { limit: 50, ...params },
+      });
+      return response.data;
+    } catch (error) {
+      console.error('Error al buscar usuarios:', error);
+      throw error;
+    }
+  }
+
   /**
    * Obtiene información de un usuario específico por email
    * No aplica filtros de job title
@@ -65,6 +93,20 @@ class UserService {
       throw error;
     }
   }
+
+  /**
+   * Obtiene varios usuarios por email en una sola petición
+   * Las llaves de la respuesta son los emails en minúsculas
+   */
+  async getUsersByEmail(emails: string[]): Promise<Record<string, User | null>> {
+    try {
+      const response = await this.api.post<UserLookupResponse>('/users/by-email', { emails });
+      return response.data.users;
+    } catch (error) {
+      console.error('Error al obtener usuarios por email:', error);
+      throw error;
+    }
+  }
 }
 
 // Singleton
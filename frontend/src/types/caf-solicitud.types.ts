@@ -130,4 +130,24 @@ export interface CAFSolicitudResponse {
   // ... incluir todos los campos según necesites
   approve?: number;
   Mode?: string;  // Campo para control de edición
-}
\ No newline at end of file
+  RowVersion?: number;  // Versión de la fila (concurrencia optimista)
+}
+
+// Listado paginado (GET /caf-solicitud): solo columnas del listado
+export interface CAFSolicitudListItem {
+  id_solicitud: number;
+  Tipo_Contratacion?: string;
+  Responsable?: string;
+  Usuario?: string;
+  Fecha?: string;
+  Cliente?: string;
+  Building?: string;
+  Proveedor?: string;
+  CveSol?: string;
+  approve?: number | null;
+}
+
+export interface CAFSolicitudListResponse {
+  items: CAFSolicitudListItem[];
+  next_cursor: number | null;
+}